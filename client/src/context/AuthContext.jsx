@@ -1,5 +1,5 @@
 import { createContext, useState, useEffect } from 'react';
-import { exchangeCodeForToken, getAccessibleResources, getUserProfile, getUserTasks } from '../services/api';
+import { exchangeCodeForToken, getDashboardBootstrap, getUserTasks, subscribeToTaskEvents, deployProject, waitForDeployJob } from '../services/api';
 
 const AuthContext = createContext();
 
@@ -18,17 +18,20 @@ export const AuthProvider = ({ children }) => {
       const token = urlParams.get('token');
       const cloudId = urlParams.get('cloud_id');
       
-      // Handle direct token and cloud ID from Flask server redirect
-      if (token && cloudId) {
+      // Handle token from Flask server redirect (the server redirects right
+      // after the token exchange, so the cloud ID may come from the bootstrap call)
+      if (token) {
         try {
-          // Save token and cloud ID to local storage
+          // Save token to local storage
           localStorage.setItem('jiraToken', token);
-          localStorage.setItem('jiraCloudId', cloudId);
           setJiraToken(token);
-          setJiraCloudId(cloudId);
           
-          // Load user data with the new token
-          await loadJiraUserData();
+          // Load user data with the new token; the server has already started prefetching it
+          const { profile, cloud_id: resolvedCloudId, tasks } = await getDashboardBootstrap(token, cloudId);
+          localStorage.setItem('jiraCloudId', resolvedCloudId);
+          setJiraCloudId(resolvedCloudId);
+          setUser(profile);
+          setJiraTasks(tasks?.issues || []);
           
           // Clean up URL after processing
           window.history.replaceState({}, document.title, window.location.pathname);
@@ -58,6 +61,38 @@ export const AuthProvider = ({ children }) => {
     checkJiraAuth();
   }, []);
 
+  // Re-read the task list when an issue changes instead of re-polling the tasks endpoint.
+  // Events only carry the issue key: the refetch goes through our own token, so the
+  // server answers with what this user may see.
+  useEffect(() => {
+    if (!jiraToken || !jiraCloudId) return;
+    
+    let refreshTimer = null;
+    const scheduleRefresh = (refresh) => {
+      // Coalesce bursts of events (bulk edits) into one refetch
+      clearTimeout(refreshTimer);
+      refreshTimer = setTimeout(() => {
+        getUserTasks(jiraToken, jiraCloudId, { refresh })
+          .then((tasksResponse) => setJiraTasks(tasksResponse.issues || []))
+          .catch(() => {});
+      }, 1000);
+    };
+    
+    const source = subscribeToTaskEvents(jiraToken, jiraCloudId, (eventType, data) => {
+      if (eventType === 'issue_deleted') {
+        setJiraTasks((tasks) => tasks.filter((task) => task.key !== data.key));
+        return;
+      }
+      // A new issue is only in our view after a sync with our token, so skip the sync interval
+      scheduleRefresh(eventType !== 'reset');
+    });
+    
+    return () => {
+      clearTimeout(refreshTimer);
+      source.close();
+    };
+  }, [jiraToken, jiraCloudId]);
+
   // Load Jira user data
   const loadJiraUserData = async () => {
     try {
@@ -66,13 +101,11 @@ export const AuthProvider = ({ children }) => {
         return;
       }
       
-      // Get user profile
-      const userProfile = await getUserProfile(jiraToken);
+      // Get profile and tasks in one round-trip
+      const { profile: userProfile, tasks: tasksResponse } = await getDashboardBootstrap(jiraToken, jiraCloudId);
       console.log('User profile loaded:', userProfile);
       setUser(userProfile);
-      
-      // Get tasks
-      await handleRefreshTasks();
+      setJiraTasks(tasksResponse?.issues || []);
       
       return userProfile;
     } catch (error) {
@@ -92,22 +125,15 @@ export const AuthProvider = ({ children }) => {
       localStorage.setItem('jiraToken', accessToken);
       setJiraToken(accessToken);
       
-      // Get accessible resources (Jira sites)
-      const resources = await getAccessibleResources(accessToken);
-      if (resources && resources.length > 0) {
-        const cloudId = resources[0].id;
-        
+      // Get accessible resources (Jira sites), profile and tasks together
+      const { profile: userProfile, cloud_id: cloudId, tasks: tasksResponse } = await getDashboardBootstrap(accessToken);
+      if (cloudId) {
         // Save the cloud ID to local storage and state
         localStorage.setItem('jiraCloudId', cloudId);
         setJiraCloudId(cloudId);
         
-        // Load user profile
-        const userProfile = await getUserProfile(accessToken);
         setUser(userProfile);
-        
-        // Load tasks
-        const tasksResponse = await getUserTasks(accessToken, cloudId);
-        setJiraTasks(tasksResponse.issues || []);
+        setJiraTasks(tasksResponse?.issues || []);
       }
     } catch (error) {
       console.error('Error in handleJiraCallback:', error);
@@ -152,34 +178,49 @@ export const AuthProvider = ({ children }) => {
     }
   };
 
-  // Trigger deployment manually
+  // Trigger deployment manually; the server queues a job, which is polled until it finishes
   const triggerDeployment = async (taskTitle = 'Manual Deployment') => {
     try {
       setDeploymentStatus('deploying');
       
-      const response = await fetch('http://localhost:3000/api/deploy', {
-        method: 'POST',
-        headers: {
-          'Content-Type': 'application/json',
-        },
-        body: JSON.stringify({ taskTitle }),
-      });
-      
-      const result = await response.json();
+      const queued = await deployProject(taskTitle);
+      if (!queued.success) {
+        setDeploymentStatus('error');
+        return {
+          success: false,
+          error: queued.error
+        };
+      }
+
+      if (queued.unchanged) {
+        // Nothing changed since the last deploy; the server answers with that deployment
+        setDeploymentStatus('success');
+        return {
+          success: true,
+          jobId: queued.job_id,
+          deployedUrl: queued.deployed_url,
+          message: queued.message,
+          platform: queued.platform || 'Vercel'
+        };
+      }
+
+      const job = await waitForDeployJob(queued.job_id);
       
-      if (result.success) {
+      if (job.status === 'completed') {
         setDeploymentStatus('success');
         return {
           success: true,
-          deployedUrl: result.deployed_url,
-          message: result.message,
-          platform: result.platform || 'Vercel'
+          jobId: queued.job_id,
+          deployedUrl: job.deployed_url,
+          message: job.message,
+          platform: job.platform || 'Vercel'
         };
       } else {
         setDeploymentStatus('error');
         return {
           success: false,
-          error: result.error
+          jobId: queued.job_id,
+          error: job.error || job.message
         };
       }
     } catch (error) {
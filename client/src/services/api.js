@@ -62,11 +62,14 @@ export const getAccessibleResources = async (accessToken) => {
  * Gets the user's Jira tasks
  * @param {string} accessToken - The Jira access token
  * @param {string} cloudId - The Jira cloud ID
+ * @param {Object} [options]
+ * @param {boolean} [options.refresh] - Sync with Jira first even if the last sync is still fresh
  * @returns {Promise<Object>} - The response containing the user's tasks
  */
-export const getUserTasks = async (accessToken, cloudId) => {
+export const getUserTasks = async (accessToken, cloudId, { refresh = false } = {}) => {
   try {
-    const response = await fetch(`${API_BASE_URL}/api/jira/${cloudId}/tasks`, {
+    const query = refresh ? '?refresh=1' : '';
+    const response = await fetch(`${API_BASE_URL}/api/jira/${cloudId}/tasks${query}`, {
       method: 'GET',
       headers: {
         'Authorization': `Bearer ${accessToken}`,
@@ -113,6 +116,116 @@ export const getUserProfile = async (accessToken) => {
   }
 };
 
+/**
+ * Gets the profile, accessible resources and tasks in a single request
+ * @param {string} accessToken - The Jira access token
+ * @param {string} [cloudId] - The Jira cloud ID (defaults to the first accessible site)
+ * @returns {Promise<Object>} - { profile, resources, cloud_id, tasks }
+ */
+export const getDashboardBootstrap = async (accessToken, cloudId) => {
+  try {
+    const query = cloudId ? `?cloud_id=${encodeURIComponent(cloudId)}` : '';
+    const response = await fetch(`${API_BASE_URL}/api/jira/bootstrap${query}`, {
+      method: 'GET',
+      headers: {
+        'Authorization': `Bearer ${accessToken}`,
+      },
+      credentials: 'include',
+    });
+    
+    if (!response.ok) {
+      const errorData = await response.json();
+      throw new Error(errorData.error || 'Failed to load dashboard data');
+    }
+    
+    return await response.json();
+  } catch (error) {
+    console.error('Error loading dashboard data:', error);
+    throw error;
+  }
+};
+
+/**
+ * Subscribes to live issue changes for a Jira site (server-sent events)
+ * EventSource cannot send the token, so each connection first trades it for a short-lived stream ticket.
+ * @param {string} accessToken - The Jira access token
+ * @param {string} cloudId - The Jira cloud ID
+ * @param {Function} onEvent - Called with (eventType, data) for issue_created, issue_updated, issue_deleted and reset; data is { key } (or { reason } for reset), never the issue itself
+ * @returns {{close: Function}} - Call .close() to unsubscribe
+ */
+export const subscribeToTaskEvents = (accessToken, cloudId, onEvent) => {
+  let source = null;
+  let closed = false;
+
+  const connect = async () => {
+    try {
+      const response = await fetch(`${API_BASE_URL}/api/jira/${cloudId}/events/ticket`, {
+        method: 'POST',
+        headers: { 'Authorization': `Bearer ${accessToken}` }
+      });
+      if (!response.ok) throw new Error(`Failed to get a stream ticket: ${response.status}`);
+      const { ticket } = await response.json();
+      if (closed) return;
+
+      source = new EventSource(`${API_BASE_URL}/api/jira/${cloudId}/events?ticket=${encodeURIComponent(ticket)}`);
+      ['issue_created', 'issue_updated', 'issue_deleted', 'reset'].forEach((eventType) => {
+        source.addEventListener(eventType, (event) => {
+          try {
+            onEvent(eventType, JSON.parse(event.data));
+          } catch (error) {
+            console.error('Error handling task event:', error);
+          }
+        });
+      });
+      source.onerror = () => {
+        // EventSource retries by itself; once it gives up (e.g. the ticket expired) start over with a new ticket
+        if (source.readyState === EventSource.CLOSED && !closed) {
+          onEvent('reset', { reason: 'reconnected' });
+          setTimeout(connect, 5000);
+        }
+      };
+    } catch (error) {
+      console.error('Task event stream error:', error);
+      if (!closed) setTimeout(connect, 5000);
+    }
+  };
+
+  connect();
+  return {
+    close: () => {
+      closed = true;
+      if (source) source.close();
+    }
+  };
+};
+
+/**
+ * Follows a deploy job (server-sent events) until it completes, fails or is cancelled
+ * @param {string} jobId - The deploy job ID
+ * @param {Function} onLog - Optional, called with each deploy log line
+ * @returns {Promise<Object>} - The final job status
+ */
+export const waitForDeployJob = (jobId, onLog) => new Promise((resolve, reject) => {
+  const source = new EventSource(`${API_BASE_URL}/api/deploy/${jobId}/events`);
+
+  source.addEventListener('status', (event) => {
+    const job = JSON.parse(event.data);
+    if (['completed', 'failed', 'cancelled'].includes(job.status)) {
+      source.close();
+      resolve(job);
+    }
+  });
+  source.addEventListener('log', (event) => {
+    if (onLog) onLog(JSON.parse(event.data).line);
+  });
+  source.onerror = () => {
+    // EventSource reconnects by itself while the server is reachable
+    if (source.readyState === EventSource.CLOSED) {
+      reject(new Error('Lost the deploy event stream'));
+    }
+  };
+});
+
 // VoidChat API functions
 export const sendTaskToVoid = async (taskData) => {
   try {
@@ -182,22 +295,53 @@ export const openVoidWithTask = async (taskData) => {
 };
 
 // Deployment API functions
-export const deployProject = async () => {
+// Queues a deploy job; resolves to { success, job_id, status } without waiting for the deploy
+export const deployProject = async (taskTitle = 'Manual Deployment') => {
   try {
     const response = await fetch('http://localhost:3000/api/deploy', {
       method: 'POST',
       headers: {
         'Content-Type': 'application/json',
       },
+      body: JSON.stringify({ taskTitle }),
     });
     
+    const result = await response.json();
+    if (!response.ok && !result.error) {
+      throw new Error(`HTTP error! status: ${response.status}`);
+    }
+    
+    return result;
+  } catch (error) {
+    console.error('Deploy project error:', error);
+    throw error;
+  }
+};
+
+export const getDeployJob = async (jobId) => {
+  try {
+    const response = await fetch(`http://localhost:3000/api/deploy/${jobId}/status`);
+    
     if (!response.ok) {
       throw new Error(`HTTP error! status: ${response.status}`);
     }
     
     return await response.json();
   } catch (error) {
-    console.error('Deploy project error:', error);
+    console.error('Get deploy job error:', error);
+    throw error;
+  }
+};
+
+export const cancelDeployJob = async (jobId) => {
+  try {
+    const response = await fetch(`http://localhost:3000/api/deploy/${jobId}/cancel`, {
+      method: 'POST',
+    });
+    
+    return await response.json();
+  } catch (error) {
+    console.error('Cancel deploy job error:', error);
     throw error;
   }
 };
@@ -0,0 +1,308 @@
+# coding=utf-8
+"""ASGI serving mode for the Flask app in oauth.py
+
+The Jira proxy routes are served natively on the event loop with
+httpx.AsyncClient, so many slow Atlassian calls share one process without a
+thread per request. The SSE streams (Jira issue events, build and deploy
+jobs) are native too: a stream is open for as long as a dashboard is, and
+through Flask each would hold one of the WSGI threads. Every other route (login/callback, deploy, void, stats)
+falls through to the existing Flask app, which a2wsgi runs on a bounded
+thread pool. URLs and JSON contracts are the same in both modes.
+
+Run with:
+    uvicorn asgi:app --port 3000
+"""
+
+import asyncio
+import contextlib
+import json
+from dotenv import load_dotenv
+
+# Before the Jira/deploy modules below read their settings (oauth.py does the same, but is imported later)
+load_dotenv()
+
+from a2wsgi import WSGIMiddleware
+from starlette.middleware.cors import CORSMiddleware
+from starlette.responses import JSONResponse, Response, StreamingResponse
+from starlette.routing import Match, Route, Router
+import httpx
+import async_jira_client as jira
+import oauth
+from event_stream import END_OF_STREAM_RETRY_MS, format_sse, parse_last_event_id
+from http_cache import body_etag, etag_matches, choose_encoding, compress, COMPRESS_MIN_SIZE
+from jira_issues import parse_fields_param, project_issues, upstream_params
+from job_registry import TERMINAL_STATES
+
+WSGI_WORKERS = 16  # Threads for routes that still run through Flask
+
+def _bearer_token(request):
+    auth_header = request.headers.get("Authorization")
+    if not auth_header or not auth_header.startswith("Bearer "):
+        return None
+    return auth_header.split(" ")[1]
+
+def conditional_json(request, data, headers=None):
+    """JSON response with the same ETag/304/compression rules as http_cache"""
+    body = json.dumps(data, separators=(",", ":")).encode("utf-8")
+    etag = body_etag(body)
+    headers = dict(headers or {})
+    headers.update({
+        "ETag": etag,
+        "Cache-Control": "private, no-cache",
+        "Vary": "Authorization, Accept-Encoding",
+    })
+    if etag_matches(request.headers.get("If-None-Match"), etag):
+        return Response(status_code=304, headers=headers)
+    encoding = choose_encoding(request.headers.get("Accept-Encoding"))
+    if encoding and len(body) >= COMPRESS_MIN_SIZE:
+        body = compress(body, encoding)
+        headers["Content-Encoding"] = encoding
+    return Response(body, media_type="application/json", headers=headers)
+
+def _token_required():
+    return JSONResponse({"error": "Bearer token is required"}, status_code=401)
+
+def _upstream_error(e):
+    """Same mapping as oauth.upstream_error_response: 429 with Retry-After, otherwise 500 without the URL"""
+    if e.response.status_code == 429:
+        # Still throttled after our own retries: let the client back off too
+        return JSONResponse(
+            {"error": "Jira rate limit exceeded, try again later"},
+            status_code=429,
+            headers={"Retry-After": e.response.headers.get("Retry-After", "30")},
+        )
+    return JSONResponse({"error": f"Error fetching tasks: {e.response.status_code}"}, status_code=500)
+
+async def get_jira_resources(request):
+    token = _bearer_token(request)
+    if token is None:
+        return _token_required()
+    try:
+        return conditional_json(request, await jira.get_accessible_resources(token))
+    except Exception as e:
+        return JSONResponse({"error": str(e)}, status_code=500)
+
+async def get_jira_profile(request):
+    token = _bearer_token(request)
+    if token is None:
+        return _token_required()
+    try:
+        return conditional_json(request, await jira.get_profile(token))
+    except Exception as e:
+        return JSONResponse({"error": str(e)}, status_code=500)
+
+async def stream_tasks(access_token, cloud_id, fields=None):
+    pages = jira.iter_search_pages(access_token, cloud_id, params=upstream_params(fields))
+    try:
+        first = await pages.__anext__()
+    except httpx.HTTPStatusError as e:
+        return _upstream_error(e)
+
+    async def generate():
+        for issue in project_issues(first.get("issues", []), fields):
+            yield json.dumps(issue, separators=(",", ":")) + "\n"
+        try:
+            async for page in pages:
+                for issue in project_issues(page.get("issues", []), fields):
+                    yield json.dumps(issue, separators=(",", ":")) + "\n"
+        except httpx.HTTPError as e:
+            status = e.response.status_code if isinstance(e, httpx.HTTPStatusError) else type(e).__name__
+            yield json.dumps({"error": f"Error fetching tasks: {status}"}) + "\n"
+        finally:
+            await pages.aclose()
+
+    return StreamingResponse(
+        generate(),
+        media_type="application/x-ndjson",
+        headers={"X-Total-Count": str(first.get("total", 0))},
+    )
+
+async def load_tasks(access_token, cloud_id, fields=None, force=False):
+    """Async counterpart of oauth.load_tasks, sharing its tasks_cache (which the login prefetch fills)"""
+    if oauth.issue_store is not None:
+        key = ("tasks", jira.token_hash(access_token), cloud_id, tuple(fields or ()), force)
+        return await jira.inflight.do(key, jira.get_stored_tasks, oauth.issue_store, access_token, cloud_id, fields, force)
+    key = ("tasks", jira.token_hash(access_token), cloud_id, tuple(fields or ()))
+    tasks_data = oauth.tasks_cache.get(key)
+    if tasks_data is None:
+        tasks_data = await jira.inflight.do(key, jira.get_tasks, access_token, cloud_id, fields)
+        if "error" not in tasks_data:
+            oauth.tasks_cache.set(key, tasks_data)
+    return tasks_data, None
+
+async def get_jira_tasks(request):
+    token = _bearer_token(request)
+    if token is None:
+        return _token_required()
+    cloud_id = request.path_params["cloud_id"]
+    try:
+        try:
+            fields = parse_fields_param(request.query_params.get("fields"))
+        except ValueError as e:
+            return JSONResponse({"error": str(e)}, status_code=400)
+        if request.query_params.get("stream") == "ndjson":
+            return await stream_tasks(token, cloud_id, fields)
+        tasks_data, sync = await load_tasks(token, cloud_id, fields, force=request.query_params.get("refresh") == "1")
+        headers = {"X-Jira-Sync": f"{sync['mode']}; fetched={sync['fetched']}"} if sync is not None else None
+        return conditional_json(request, tasks_data, headers)
+    except httpx.HTTPStatusError as e:
+        return _upstream_error(e)
+    except Exception as e:
+        return JSONResponse({"error": str(e)}, status_code=500)
+
+async def get_jira_bootstrap(request):
+    token = _bearer_token(request)
+    if token is None:
+        return _token_required()
+    try:
+        try:
+            fields = parse_fields_param(request.query_params.get("fields"))
+        except ValueError as e:
+            return JSONResponse({"error": str(e)}, status_code=400)
+        cloud_id = request.query_params.get("cloud_id")
+
+        profile_task = asyncio.ensure_future(jira.get_profile(token))
+        resources_task = asyncio.ensure_future(jira.get_accessible_resources(token))
+        try:
+            if not cloud_id:
+                resources = await resources_task
+                if not resources:
+                    return JSONResponse({"error": "No accessible Jira resources found"}, status_code=404)
+                cloud_id = resources[0]["id"]
+            (tasks_data, _), profile, resources = await asyncio.gather(
+                load_tasks(token, cloud_id, fields), profile_task, resources_task
+            )
+        finally:
+            profile_task.cancel()
+            resources_task.cancel()
+        return conditional_json(request, {
+            "profile": profile,
+            "resources": resources,
+            "cloud_id": cloud_id,
+            "tasks": tasks_data,
+        })
+    except httpx.HTTPStatusError as e:
+        return _upstream_error(e)
+    except Exception as e:
+        return JSONResponse({"error": str(e)}, status_code=500)
+
+def _last_event_id(request):
+    return parse_last_event_id(request.headers.get("Last-Event-ID") or request.query_params.get("lastEventId"))
+
+def _event_stream(events):
+    return StreamingResponse(
+        events,
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+async def get_jira_events(request):
+    """Same stream and auth as the Flask /api/jira/<cloud_id>/events route"""
+    cloud_id = request.path_params["cloud_id"]
+    if not oauth.stream_tickets.check(request.query_params.get("ticket"), ("jira", cloud_id)):
+        token = _bearer_token(request)
+        if token is None:
+            return JSONResponse({"error": "A stream ticket or bearer token is required"}, status_code=401)
+        try:
+            resources = await jira.get_accessible_resources(token)
+        except Exception as e:
+            return JSONResponse({"error": str(e)}, status_code=500)
+        if not any(resource.get("id") == cloud_id for resource in resources):
+            return JSONResponse({"error": "No access to this Jira site"}, status_code=403)
+    last_event_id = _last_event_id(request)
+    oauth.jira_events.open(cloud_id)
+
+    async def generate():
+        async for event_id, event_type, data in oauth.jira_events.subscribe_async(cloud_id, last_event_id):
+            yield format_sse(event_id, event_type, data)
+
+    return _event_stream(generate())
+
+def job_status_events(request, events, job_id):
+    """Async counterpart of oauth.job_status_events (same events, final id, retry hint and 204)"""
+    status = oauth.build_jobs.get(job_id)
+    last_event_id = _last_event_id(request)
+    if status.get("status") in TERMINAL_STATES and last_event_id is not None:
+        return Response(status_code=204)
+
+    def final(snapshot, event_id=None):
+        event_id = event_id if event_id is not None else events.last_id(job_id)
+        return format_sse(event_id, "status", snapshot, retry=END_OF_STREAM_RETRY_MS)
+
+    async def generate():
+        snapshot = oauth.build_jobs.get(job_id) or status
+        if snapshot.get("status") in TERMINAL_STATES:
+            yield final(snapshot)
+            return
+        cursor = last_event_id
+        if cursor is None:
+            last = events.last_event(job_id)
+            cursor = last[0] if last else 0
+            yield format_sse(cursor, "status", last[2] if last else snapshot)
+        async for event_id, event_type, data in events.subscribe_async(job_id, cursor):
+            if event_id is None:
+                # Idle: catch a job that finished while we were subscribing
+                snapshot = oauth.build_jobs.get(job_id) or snapshot
+                if snapshot.get("status") in TERMINAL_STATES:
+                    yield final(snapshot)
+                    return
+            elif event_type == "status" and data.get("status") in TERMINAL_STATES:
+                yield final(data, event_id)
+                continue
+            yield format_sse(event_id, event_type, data)
+
+    return _event_stream(generate())
+
+async def get_build_events(request):
+    task_id = request.path_params["task_id"]
+    if oauth.build_jobs.get(task_id) is None:
+        return JSONResponse({"success": False, "error": "Unknown build task"}, status_code=404)
+    return job_status_events(request, oauth.build_events, task_id)
+
+async def get_deploy_events(request):
+    job_id = request.path_params["job_id"]
+    status = oauth.build_jobs.get(job_id)
+    if status is None or status.get("kind") != "deploy":
+        return JSONResponse({"success": False, "error": "Unknown deploy job"}, status_code=404)
+    return job_status_events(request, oauth.deploy_events, job_id)
+
+@contextlib.asynccontextmanager
+async def lifespan(_app):
+    yield
+    await jira.close_client()
+    if oauth.issue_store is not None:
+        oauth.issue_store.close()
+
+native_routes = [
+    Route("/api/jira/resources", get_jira_resources, methods=["GET"]),
+    Route("/api/jira/profile", get_jira_profile, methods=["GET"]),
+    Route("/api/jira/bootstrap", get_jira_bootstrap, methods=["GET"]),
+    Route("/api/jira/{cloud_id}/tasks", get_jira_tasks, methods=["GET"]),
+    Route("/api/jira/{cloud_id}/events", get_jira_events, methods=["GET"]),
+    Route("/api/build/{task_id}/events", get_build_events, methods=["GET"]),
+    Route("/api/deploy/{job_id}/events", get_deploy_events, methods=["GET"]),
+]
+
+native_app = CORSMiddleware(
+    Router(routes=native_routes, lifespan=lifespan),
+    allow_origins=["http://localhost:5173"],
+    allow_credentials=True,
+    allow_methods=["*"],
+    allow_headers=["*"],
+    expose_headers=["ETag", "X-Total-Count", "X-Jira-Sync"],
+)
+flask_app = WSGIMiddleware(oauth.app, workers=WSGI_WORKERS)
+
+def _is_native(scope):
+    return any(route.matches(scope)[0] != Match.NONE for route in native_routes)
+
+async def app(scope, receive, send):
+    """Dispatch native async routes first, everything else to Flask"""
+    if scope["type"] == "lifespan" or (scope["type"] == "http" and _is_native(scope)):
+        await native_app(scope, receive, send)
+    else:
+        await flask_app(scope, receive, send)
+
+if __name__ == "__main__":
+    import uvicorn
+    uvicorn.run(app, port=3000)
@@ -0,0 +1,222 @@
+# coding=utf-8
+"""Non-blocking Atlassian client used by the ASGI serving mode (asgi.py)
+
+Mirrors jira_client.py on top of httpx.AsyncClient and shares its config,
+caches and token hashing, so both serving modes see the same cached data.
+"""
+
+import asyncio
+import contextlib
+import time
+import httpx
+from jira_client import (
+    CONNECT_TIMEOUT, READ_TIMEOUT, MAX_RETRIES, POOL_MAXSIZE, RETRY_BACKOFF, RETRY_STATUSES,
+    SEARCH_PAGE_SIZE, SEARCH_WORKERS, SEARCH_POOL_SIZE, TASKS_JQL,
+    api_url, token_hash, resources_cache, profile_cache, rate_limiter,
+)
+from rate_limit import RATE_LIMIT_RETRIES, retry_after_seconds
+from issue_store import sync_plan
+from jira_issues import upstream_params, project_issues
+from singleflight import AsyncSingleFlight
+
+_client = None
+inflight = AsyncSingleFlight()
+_search_slots = None  # Semaphore bounding page fetches across all searches, like jira_client's search pool
+
+class RetryTransport(httpx.AsyncHTTPTransport):
+    """Connection retries plus jira_client's urllib3 Retry policy for 502/503/504
+
+    Idempotent requests answered with a RETRY_STATUSES code are sent again
+    up to MAX_RETRIES times, after Retry-After if given, else an
+    exponential RETRY_BACKOFF, so both serving modes survive the same
+    upstream hiccups.
+    """
+
+    async def handle_async_request(self, request):
+        for attempt in range(MAX_RETRIES + 1):
+            response = await super().handle_async_request(request)
+            if (request.method not in ("GET", "HEAD", "OPTIONS") or response.status_code not in RETRY_STATUSES
+                    or attempt == MAX_RETRIES):
+                return response
+            await response.aclose()
+            delay = retry_after_seconds(response.headers.get("Retry-After"))
+            await asyncio.sleep(delay if delay is not None else RETRY_BACKOFF * (2 ** attempt))
+
+def get_client():
+    """Return the event loop's shared AsyncClient, creating it on first use"""
+    global _client
+    if _client is None:
+        _client = httpx.AsyncClient(
+            limits=httpx.Limits(max_connections=POOL_MAXSIZE, max_keepalive_connections=POOL_MAXSIZE),
+            timeout=httpx.Timeout(READ_TIMEOUT, connect=CONNECT_TIMEOUT),
+            transport=RetryTransport(retries=MAX_RETRIES),
+            headers={"Accept": "application/json"},
+        )
+    return _client
+
+async def close_client():
+    global _client
+    if _client is not None:
+        await _client.aclose()
+        _client = None
+
+async def atlassian_get(path, access_token, params=None):
+    """Same rate limiting and 429 handling as jira_client.atlassian_get, without blocking the loop"""
+    keys = rate_limiter.keys_for(path, token_hash(access_token))
+    for attempt in range(RATE_LIMIT_RETRIES + 1):
+        delay = rate_limiter.reserve(keys)
+        if delay > 0:
+            await asyncio.sleep(delay)
+        response = await get_client().get(
+            api_url(path),
+            params=params,
+            headers={"Authorization": f"Bearer {access_token}"},
+        )
+        if response.status_code != 429 or attempt == RATE_LIMIT_RETRIES:
+            break
+        rate_limiter.on_throttled(keys, response.headers.get("Retry-After"), attempt)
+    if response.status_code == 401:
+        key = token_hash(access_token)
+        resources_cache.invalidate(key)
+        profile_cache.invalidate(key)
+    return response
+
+async def _fetch_json(path, access_token, cache, key):
+    response = await atlassian_get(path, access_token)
+    response.raise_for_status()
+    data = response.json()
+    cache.set(key, data)
+    return data
+
+async def get_accessible_resources(access_token):
+    key = token_hash(access_token)
+    resources = resources_cache.get(key)
+    if resources is not None:
+        return resources
+    return await inflight.do(
+        ("resources", key), _fetch_json, "/oauth/token/accessible-resources", access_token, resources_cache, key
+    )
+
+async def get_profile(access_token):
+    key = token_hash(access_token)
+    profile = profile_cache.get(key)
+    if profile is not None:
+        return profile
+    return await inflight.do(("profile", key), _fetch_json, "/me", access_token, profile_cache, key)
+
+# === Issue Search ===
+
+async def search_page(access_token, cloud_id, jql=TASKS_JQL, start_at=0, max_results=SEARCH_PAGE_SIZE, params=None):
+    query = dict(params or {})
+    query.update({"jql": jql, "startAt": start_at, "maxResults": max_results})
+    response = await atlassian_get(f"/ex/jira/{cloud_id}/rest/api/3/search", access_token, params=query)
+    response.raise_for_status()
+    return response.json()
+
+async def _pooled_search_page(*args):
+    global _search_slots
+    if _search_slots is None:
+        _search_slots = asyncio.Semaphore(SEARCH_POOL_SIZE)
+    async with _search_slots:
+        return await search_page(*args)
+
+async def iter_search_pages(access_token, cloud_id, jql=TASKS_JQL, page_size=SEARCH_PAGE_SIZE, workers=SEARCH_WORKERS, params=None):
+    """Async counterpart of jira_client.iter_search_pages (same ordering rules)"""
+    first = await search_page(access_token, cloud_id, jql, 0, page_size, params)
+    yield first
+
+    total = first.get("total", 0)
+    step = first.get("maxResults") or page_size
+    offsets = iter(range(step, total, step))
+
+    def submit(start_at):
+        return asyncio.ensure_future(_pooled_search_page(access_token, cloud_id, jql, start_at, step, params))
+
+    in_flight = set()
+    try:
+        for start_at in offsets:
+            in_flight.add(submit(start_at))
+            if len(in_flight) >= workers:
+                break
+        while in_flight:
+            done, in_flight = await asyncio.wait(in_flight, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                next_start = next(offsets, None)
+                if next_start is not None:
+                    in_flight.add(submit(next_start))
+                yield task.result()
+    finally:
+        for task in in_flight:
+            task.cancel()
+
+async def get_tasks(access_token, cloud_id, fields=None):
+    """Same contract as oauth.get_tasks"""
+    query = {"jql": TASKS_JQL}
+    query.update(upstream_params(fields))
+    response = await atlassian_get(f"/ex/jira/{cloud_id}/rest/api/3/search", access_token, params=query)
+    if response.status_code != 200:
+        return {"error": f"Error fetching tasks: {response.status_code}"}
+    tasks_data = response.json()
+    if fields is not None:
+        tasks_data = {
+            "startAt": tasks_data.get("startAt"),
+            "maxResults": tasks_data.get("maxResults"),
+            "total": tasks_data.get("total"),
+            "issues": project_issues(tasks_data.get("issues", []), fields),
+        }
+    return tasks_data
+
+@contextlib.asynccontextmanager
+async def _holding(scope_lock):
+    """Hold an issue_store ScopeLock without blocking the loop while waiting for it"""
+    acquiring = asyncio.ensure_future(asyncio.to_thread(scope_lock.acquire))
+    try:
+        await asyncio.shield(acquiring)
+    except asyncio.CancelledError:
+        # The executor thread still gets the lock eventually; hand it straight back
+        acquiring.add_done_callback(lambda _: scope_lock.release())
+        raise
+    try:
+        yield
+    finally:
+        scope_lock.release()
+
+async def sync_tasks(store, access_token, cloud_id, account_id, force=False):
+    """Async counterpart of issue_store.sync_tasks; SQLite work runs off the loop
+
+    Takes the store's own sync_lock, so a sync here and a threaded one (the
+    login prefetch, or a route served through the WSGI fallback) never run
+    for the same scope at once.
+    """
+    async with _holding(store.sync_lock(cloud_id, account_id)):
+        started = time.time()
+        state = await asyncio.to_thread(store.sync_state, cloud_id, account_id)
+        plan = sync_plan(state, started, force)
+        if plan is None:
+            return {"mode": "fresh", "fetched": 0, "last_sync": state["last_sync"]}
+        mode, jql = plan
+
+        fetched = 0
+        seen = set()
+        async for page in iter_search_pages(access_token, cloud_id, jql=jql):
+            issues = page.get("issues", [])
+            fetched += await asyncio.to_thread(store.upsert_issues, cloud_id, issues, account_id)
+            seen.update(issue["key"] for issue in issues)
+        summary = {"mode": mode, "fetched": fetched, "last_sync": started}
+        if mode == "full":
+            summary["removed"] = await asyncio.to_thread(store.reconcile, cloud_id, account_id, seen)
+        await asyncio.to_thread(store.mark_synced, cloud_id, account_id, started, mode == "full")
+        return summary
+
+async def get_stored_tasks(store, access_token, cloud_id, fields=None, force=False):
+    """Same contract as oauth.get_stored_tasks: returns (tasks_data, sync_summary)"""
+    account_id = (await get_profile(access_token))["account_id"]
+    sync = await sync_tasks(store, access_token, cloud_id, account_id, force=force)
+    issues = await asyncio.to_thread(store.tasks_for, cloud_id, account_id)
+    tasks_data = {
+        "startAt": 0,
+        "maxResults": len(issues),
+        "total": len(issues),
+        "issues": project_issues(issues, fields),
+    }
+    return tasks_data, sync
@@ -0,0 +1,164 @@
+"""Local stand-in for the parts of the Atlassian API the Jira routes use
+
+Usage:
+    python atlassian_standin.py --port 8788 --token alice=SEC,PUB --token bob=PUB
+    ATLASSIAN_API=http://localhost:8788 python oauth.py
+
+Implements /oauth/token/accessible-resources, /me, the issue search
+(/ex/jira/<cloud_id>/rest/api/3/search, with the task JQL and the
+"updated >= -Nm" delta JQL) and issue deletion. Each --token NAME=KEYS
+is a user (account id NAME) who can see the issues of those projects;
+without --token any bearer token sees every project. Connections are
+kept alive (HTTP/1.1) like api.atlassian.com's, so the pooled client can
+be compared with one connection per call (see bench_atlassian.py).
+"""
+
+import argparse
+import json
+import threading
+import time
+from datetime import datetime, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse, parse_qs
+
+CLOUD_ID = 'cloud1'
+MAX_RESULTS = 100
+
+issues = {}  # key -> issue
+updated_at = {}  # key -> epoch seconds of the last update
+tokens = {}  # token -> visible project keys; empty: any token sees everything
+lock = threading.Lock()
+searches = 0
+
+def make_issue(project, number, now):
+    key = f'{project}-{number}'
+    return {
+        'id': str(len(issues) + 10000),
+        'key': key,
+        'fields': {
+            'summary': f'Stand-in issue {key}',
+            'status': {'name': 'Done' if number % 5 == 0 else 'To Do'},
+            'assignee': {'accountId': 'alice', 'displayName': 'Alice'} if number % 3 == 0 else None,
+            'priority': {'name': 'Medium'},
+            'issuetype': {'name': 'Task'},
+            'updated': datetime.fromtimestamp(now, timezone.utc).strftime('%Y-%m-%dT%H:%M:%S.000+0000'),
+        },
+    }
+
+class Handler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+    disable_nagle_algorithm = True
+    latency = 0.0
+    throttle_every = 0
+    retry_after = 7
+
+    def log_message(self, format, *args):
+        pass
+
+    def send(self, status, body=None, headers=None):
+        data = json.dumps(body).encode('utf-8') if body is not None else b''
+        if self.latency:
+            time.sleep(self.latency)
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(data)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(data)
+
+    def account(self):
+        """(account id, visible projects or None for all), or None for an unknown token"""
+        auth = self.headers.get('Authorization') or ''
+        token = auth[len('Bearer '):] if auth.startswith('Bearer ') else None
+        if not token:
+            return None
+        if not tokens:
+            return 'standin', None
+        if token not in tokens:
+            return None
+        return token, tokens[token]
+
+    def do_GET(self):
+        url = urlparse(self.path)
+        account = self.account()
+        if account is None:
+            return self.send(401, {'message': 'Unauthorized'})
+        account_id, projects = account
+
+        if url.path == '/oauth/token/accessible-resources':
+            return self.send(200, [{'id': CLOUD_ID, 'name': 'stand-in', 'url': 'https://standin.atlassian.net'}])
+        if url.path == '/me':
+            return self.send(200, {'account_id': account_id, 'name': account_id, 'email': f'{account_id}@example.com'})
+        if url.path == f'/ex/jira/{CLOUD_ID}/rest/api/3/search':
+            return self.search(parse_qs(url.query), account_id, projects)
+        self.send(404, {'errorMessages': ['Not found']})
+
+    def search(self, query, account_id, projects):
+        global searches
+        with lock:
+            searches += 1
+            throttled = self.throttle_every and searches % self.throttle_every == 0
+        if throttled:
+            return self.send(429, {'errorMessages': ['Rate limit exceeded']}, {'Retry-After': str(self.retry_after)})
+
+        jql = query.get('jql', [''])[0]
+        start_at = int(query.get('startAt', ['0'])[0])
+        max_results = min(int(query.get('maxResults', ['50'])[0]), MAX_RESULTS)
+        now = time.time()
+        with lock:
+            matching = [issue for key, issue in issues.items()
+                        if projects is None or key.split('-')[0] in projects]
+            if jql.startswith('updated >= -') and jql.endswith('m'):
+                since = now - int(jql[len('updated >= -'):-1]) * 60
+                matching = [issue for issue in matching if updated_at[issue['key']] >= since]
+            elif 'currentUser()' in jql:
+                matching = [issue for issue in matching
+                            if (issue['fields']['assignee'] or {}).get('accountId') == account_id
+                            or issue['fields']['status']['name'] != 'Done']
+        self.send(200, {
+            'startAt': start_at,
+            'maxResults': max_results,
+            'total': len(matching),
+            'issues': matching[start_at:start_at + max_results],
+        })
+
+    def do_DELETE(self):
+        parts = urlparse(self.path).path.strip('/').split('/')
+        if self.account() is None:
+            return self.send(401, {'message': 'Unauthorized'})
+        if parts[:2] == ['ex', 'jira'] and parts[3:6] == ['rest', 'api', '3'] and parts[6:7] == ['issue'] \
+                and len(parts) == 8:
+            with lock:
+                found = issues.pop(parts[7], None) is not None
+                updated_at.pop(parts[7], None)
+            return self.send(204) if found else self.send(404, {'errorMessages': ['Issue does not exist']})
+        self.send(404, {'errorMessages': ['Not found']})
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='Local stand-in for the Atlassian Jira API')
+    parser.add_argument('--port', type=int, default=8788)
+    parser.add_argument('--projects', default='PROJ', help='Comma-separated project keys')
+    parser.add_argument('--issues', type=int, default=250, help='Issues per project')
+    parser.add_argument('--token', action='append', default=[], metavar='NAME=KEYS',
+                        help='A user token and the projects it can see, e.g. alice=SEC,PUB')
+    parser.add_argument('--latency', type=float, default=0.0, help='Seconds added to every response')
+    parser.add_argument('--throttle-every', type=int, default=0, help='Answer every Nth search with 429')
+    parser.add_argument('--retry-after', type=int, default=7)
+    args = parser.parse_args()
+
+    started = time.time()
+    for project in args.projects.split(','):
+        for number in range(1, args.issues + 1):
+            issue = make_issue(project, number, started)
+            issues[issue['key']] = issue
+            updated_at[issue['key']] = started
+    for spec in args.token:
+        name, _, keys = spec.partition('=')
+        tokens[name] = set(filter(None, keys.split(',')))
+    Handler.latency = args.latency
+    Handler.throttle_every = args.throttle_every
+    Handler.retry_after = args.retry_after
+
+    print(f'Atlassian stand-in on http://localhost:{args.port} ({len(issues)} issues, cloud_id {CLOUD_ID})')
+    ThreadingHTTPServer(('127.0.0.1', args.port), Handler).serve_forever()
@@ -0,0 +1,52 @@
+"""Time sequential Atlassian GETs: a bare requests.get per call vs the pooled jira_client session
+
+Usage:
+    python atlassian_standin.py --port 8788
+    python bench_atlassian.py --api http://localhost:8788 --requests 1000
+
+Against the stand-in only connection setup differs between the two runs;
+against api.atlassian.com the pooled client also saves a TLS handshake
+per call. The client-side rate limiter is opened up for the run so it
+measures the HTTP client rather than the request budget.
+"""
+
+import argparse
+import os
+import time
+
+def timed(label, fn, count):
+    fn()  # Warm up (DNS, first connection)
+    started = time.perf_counter()
+    for _ in range(count):
+        fn()
+    per_request = (time.perf_counter() - started) / count * 1000
+    print(f'{label:<22} {per_request:.2f} ms/req')
+    return per_request
+
+def main():
+    parser = argparse.ArgumentParser(description='Compare bare requests.get with the pooled Atlassian session')
+    parser.add_argument('--api', default='http://localhost:8788')
+    parser.add_argument('--requests', type=int, default=1000)
+    parser.add_argument('--token', default='bench')
+    parser.add_argument('--path', default='/me')
+    args = parser.parse_args()
+
+    # jira_client reads these at import
+    os.environ['ATLASSIAN_API'] = args.api
+    os.environ.setdefault('ATLASSIAN_TOKEN_RATE', '1000000')
+    os.environ.setdefault('ATLASSIAN_TOKEN_BURST', '1000000')
+    os.environ.setdefault('ATLASSIAN_SITE_RATE', '1000000')
+    os.environ.setdefault('ATLASSIAN_SITE_BURST', '1000000')
+    import requests
+    from jira_client import api_url, atlassian_get
+
+    headers = {'Authorization': f'Bearer {args.token}', 'Accept': 'application/json'}
+    url = api_url(args.path)
+    print(f'{args.requests} sequential GET {url}')
+    bare = timed('bare requests.get', lambda: requests.get(url, headers=headers).raise_for_status(), args.requests)
+    pooled = timed('pooled atlassian_get', lambda: atlassian_get(args.path, args.token).raise_for_status(),
+                   args.requests)
+    print(f'pooled client saves {bare - pooled:.2f} ms/req ({(1 - pooled / bare) * 100:.0f}%)')
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,173 @@
+# coding=utf-8
+"""Priority build scheduler: bounded worker pool, admission control and cancellation"""
+
+import heapq
+import itertools
+import threading
+import time
+
+# Same priority names VoidChatPaster.format_message understands
+PRIORITY_RANK = {"high": 0, "medium": 1, "low": 2}
+DEFAULT_PRIORITY = "medium"
+
+class QueueFull(Exception):
+    """Raised by submit() when the queue is at its admission limit"""
+
+class BuildScheduler:
+    """Runs run_fn(job_id, task_data, cancel_event) on a fixed number of workers
+
+    Jobs wait in a heap ordered by (priority rank, submission order).
+    Jobs submitted with the same key never run at the same time: while one
+    runs, the others stay queued (in order) and workers take other jobs
+    instead of blocking on them. Cancelling a queued job drops it before it
+    starts; cancelling a running job sets its cancel_event, which run_fn is
+    expected to check. on_cancelled(job_id) is called for jobs cancelled
+    while still queued. Worker threads are named "<name>-<n>".
+    """
+
+    def __init__(self, run_fn, workers=2, max_queue=50, on_cancelled=None, name="build-worker"):
+        self.run_fn = run_fn
+        self.name = name
+        self.workers = workers
+        self.max_queue = max_queue
+        self.on_cancelled = on_cancelled
+        self._heap = []
+        self._queued = {}  # job_id -> (enqueued_at, task_data, key)
+        self._running = {}  # job_id -> cancel_event
+        self._busy_keys = {}  # key -> job_id running with it
+        self._seq = itertools.count()
+        self._cond = threading.Condition()
+        self._threads = []
+        self.submitted = 0
+        self.rejected = 0
+        self.finished = 0
+        self.cancelled = 0
+        self.max_depth_seen = 0
+        self._wait_total = 0.0
+        self._started = 0
+
+    @staticmethod
+    def priority_of(task_data):
+        priority = str((task_data or {}).get("priority") or DEFAULT_PRIORITY).lower()
+        return priority if priority in PRIORITY_RANK else DEFAULT_PRIORITY
+
+    def _ensure_workers(self):
+        while len(self._threads) < self.workers:
+            thread = threading.Thread(target=self._worker, name=f"{self.name}-{len(self._threads)}", daemon=True)
+            self._threads.append(thread)
+            thread.start()
+
+    def submit(self, job_id, task_data, key=None):
+        """Queue a job; raises QueueFull when max_queue jobs are already waiting
+
+        key (e.g. a deploy target) serializes jobs that must not overlap.
+        """
+        with self._cond:
+            if job_id in self._queued or job_id in self._running:
+                raise ValueError(f"Build {job_id} is already queued or running")
+            if len(self._queued) >= self.max_queue:
+                self.rejected += 1
+                raise QueueFull(f"Build queue is full ({self.max_queue} waiting)")
+            rank = PRIORITY_RANK[self.priority_of(task_data)]
+            heapq.heappush(self._heap, (rank, next(self._seq), job_id))
+            self._queued[job_id] = (time.monotonic(), task_data, key)
+            self.submitted += 1
+            self.max_depth_seen = max(self.max_depth_seen, len(self._queued))
+            self._ensure_workers()
+            self._cond.notify()
+            return len(self._queued)
+
+    def cancel(self, job_id):
+        """Returns 'queued' or 'running' for the state it was cancelled in, or None"""
+        with self._cond:
+            if job_id in self._queued:
+                # The heap entry is skipped lazily when a worker pops it
+                del self._queued[job_id]
+                self.cancelled += 1
+                state = "queued"
+            elif job_id in self._running:
+                self._running[job_id].set()
+                self.cancelled += 1
+                return "running"
+            else:
+                return None
+        if self.on_cancelled is not None:
+            self.on_cancelled(job_id)
+        return state
+
+    def position(self, job_id):
+        """1-based position in the queue, or None if not queued"""
+        with self._cond:
+            if job_id not in self._queued:
+                return None
+            ordered = sorted(entry for entry in self._heap if entry[2] in self._queued)
+            return next(i for i, entry in enumerate(ordered, 1) if entry[2] == job_id)
+
+    def is_busy(self, key):
+        """True while a job with this key is running"""
+        with self._cond:
+            return key in self._busy_keys
+
+    def _next_job(self):
+        with self._cond:
+            while True:
+                deferred = []  # Entries whose key is busy; they go back on the heap
+                try:
+                    while self._heap:
+                        heap_entry = heapq.heappop(self._heap)
+                        job_id = heap_entry[2]
+                        entry = self._queued.get(job_id)
+                        if entry is None:
+                            continue  # Cancelled while queued
+                        enqueued_at, task_data, key = entry
+                        if key is not None and key in self._busy_keys:
+                            deferred.append(heap_entry)
+                            continue
+                        del self._queued[job_id]
+                        self._wait_total += time.monotonic() - enqueued_at
+                        self._started += 1
+                        cancel_event = threading.Event()
+                        self._running[job_id] = cancel_event
+                        if key is not None:
+                            self._busy_keys[key] = job_id
+                        return job_id, task_data, cancel_event
+                finally:
+                    for heap_entry in deferred:
+                        heapq.heappush(self._heap, heap_entry)
+                self._cond.wait()
+
+    def _worker(self):
+        while True:
+            job_id, task_data, cancel_event = self._next_job()
+            try:
+                self.run_fn(job_id, task_data, cancel_event)
+            except Exception as e:
+                print(f'[!] Build {job_id} crashed: {str(e)}')
+            finally:
+                with self._cond:
+                    self._running.pop(job_id, None)
+                    for key, running_id in list(self._busy_keys.items()):
+                        if running_id == job_id:
+                            del self._busy_keys[key]
+                            self._cond.notify()  # A job deferred on this key can start now
+                    self.finished += 1
+
+    def stats(self):
+        with self._cond:
+            by_priority = {name: 0 for name in PRIORITY_RANK}
+            for _, task_data, _ in self._queued.values():
+                by_priority[self.priority_of(task_data)] += 1
+            return {
+                "workers": self.workers,
+                "queue_depth": len(self._queued),
+                "queue_depth_by_priority": by_priority,
+                "max_queue": self.max_queue,
+                "max_depth_seen": self.max_depth_seen,
+                "running": len(self._running),
+                "busy_keys": sorted(self._busy_keys),
+                "submitted": self.submitted,
+                "rejected": self.rejected,
+                "finished": self.finished,
+                "cancelled": self.cancelled,
+                "avg_queue_wait_seconds": round(self._wait_total / self._started, 3) if self._started else 0.0,
+            }
@@ -0,0 +1,151 @@
+# coding=utf-8
+"""Deploy manifests: parallel Merkle tree hashing of the deploy folder, persisted between runs"""
+
+import hashlib
+import json
+import mmap
+import os
+import re
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+HASH_WORKERS = int(os.getenv("DEPLOY_HASH_WORKERS", "8"))
+MMAP_THRESHOLD = int(os.getenv("DEPLOY_MMAP_THRESHOLD", str(1024 * 1024)))  # Files this big are hashed via mmap
+SKIP_DIRS = {'.git', '.vercel', 'node_modules'}
+DIFF_LIST_LIMIT = 100  # Paths listed per change type in diff summaries
+
+# hashlib releases the GIL on large buffers, so threads hash files in parallel
+_pool = ThreadPoolExecutor(max_workers=HASH_WORKERS, thread_name_prefix="tree-hash")
+
+def hash_file(path, size):
+    """SHA-1 of a file (the digest Vercel addresses uploads by)"""
+    digest = hashlib.sha1()
+    with open(path, 'rb') as f:
+        if size >= MMAP_THRESHOLD:
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+                digest.update(mapped)
+        else:
+            digest.update(f.read())
+    return digest.hexdigest()
+
+def tree_hash(files):
+    """Merkle root over {rel path: {'sha': ...}}: each directory hashes its sorted children"""
+    tree = {}
+    for rel, entry in files.items():
+        node = tree
+        *dirs, name = rel.split('/')
+        for part in dirs:
+            node = node.setdefault(part, {})
+        node[name] = entry['sha']
+
+    def digest(node):
+        lines = []
+        for name in sorted(node):
+            child = node[name]
+            if isinstance(child, dict):
+                lines.append(f'tree {digest(child)} {name}')
+            else:
+                lines.append(f'blob {child} {name}')
+        return hashlib.sha1('\n'.join(lines).encode('utf-8')).hexdigest()
+
+    return digest(tree)
+
+def scan_tree(root, previous=None):
+    """Hash every file under root; returns {'root', 'files', 'scanned_at_ns', 'hashed'}
+
+    files maps relative posix paths to {'sha', 'size', 'mtime_ns', 'path'}.
+    A file whose size and mtime match the previous scan keeps its hash
+    without being read, unless its mtime is not older than that scan
+    (it could have changed again within the same timestamp tick).
+    """
+    started_ns = time.time_ns()
+    previous = previous or {}
+    known = previous.get('files') or {}
+    trusted_before = previous.get('scanned_at_ns', 0)
+    files = {}
+    to_hash = []
+    for dirpath, dirnames, filenames in os.walk(root):
+        dirnames[:] = [d for d in dirnames if d not in SKIP_DIRS]
+        for name in filenames:
+            path = os.path.join(dirpath, name)
+            stat = os.stat(path)
+            rel = os.path.relpath(path, root).replace(os.sep, '/')
+            entry = {'sha': None, 'size': stat.st_size, 'mtime_ns': stat.st_mtime_ns, 'path': path}
+            old = known.get(rel)
+            if old and old['size'] == stat.st_size and old['mtime_ns'] == stat.st_mtime_ns \
+                    and stat.st_mtime_ns < trusted_before:
+                entry['sha'] = old['sha']
+            else:
+                to_hash.append(entry)
+            files[rel] = entry
+    for entry, sha in zip(to_hash, _pool.map(lambda e: hash_file(e['path'], e['size']), to_hash)):
+        entry['sha'] = sha
+    return {'root': tree_hash(files), 'files': files, 'scanned_at_ns': started_ns, 'hashed': len(to_hash)}
+
+def diff_files(old, new):
+    """Compare two {rel path: sha} maps; lists are capped at DIFF_LIST_LIMIT paths each"""
+    added = sorted(rel for rel in new if rel not in old)
+    removed = sorted(rel for rel in old if rel not in new)
+    modified = sorted(rel for rel in new if rel in old and old[rel] != new[rel])
+    summary = {}
+    for name, paths in (('added', added), ('modified', modified), ('removed', removed)):
+        summary[name] = len(paths)
+        summary[f'{name}_files'] = paths[:DIFF_LIST_LIMIT]
+    return summary
+
+def scan_changes(scan, deployed):
+    """diff_files between the last deployed tree (None: nothing deployed yet) and a scan"""
+    return diff_files((deployed or {}).get('files') or {}, {rel: entry['sha'] for rel, entry in scan['files'].items()})
+
+class ManifestStore:
+    """One JSON document per deploy target: the latest scan and what was last deployed"""
+
+    def __init__(self, directory):
+        self.directory = directory
+        self._lock = threading.Lock()
+
+    def _path(self, key):
+        return os.path.join(self.directory, re.sub(r'[^A-Za-z0-9_.-]', '_', key) + '.json')
+
+    def load(self, key):
+        try:
+            with open(self._path(key)) as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def _save(self, key, document):
+        os.makedirs(self.directory, exist_ok=True)
+        path = self._path(key)
+        tmp = f'{path}.{threading.get_ident()}.tmp'
+        with open(tmp, 'w') as f:
+            json.dump(document, f, separators=(',', ':'))
+        os.replace(tmp, path)
+
+    def scan(self, key, folder):
+        """Rescan folder (reusing hashes of untouched files); returns (scan, deployed or None)"""
+        document = self.load(key)
+        scan = scan_tree(folder, document.get('scan'))
+        with self._lock:
+            document = self.load(key)
+            document['folder'] = folder
+            document['scan'] = {
+                'root': scan['root'],
+                'scanned_at_ns': scan['scanned_at_ns'],
+                'files': {rel: {k: v for k, v in entry.items() if k != 'path'} for rel, entry in scan['files'].items()},
+            }
+            self._save(key, document)
+        return scan, document.get('deployed')
+
+    def mark_deployed(self, key, scan, **info):
+        """Record scan as the tree now live for key, with e.g. deployed_url and job_id"""
+        with self._lock:
+            document = self.load(key)
+            document['deployed'] = {
+                'root': scan['root'],
+                'files': {rel: entry['sha'] for rel, entry in scan['files'].items()},
+                'at': time.time(),
+                **info,
+            }
+            self._save(key, document)
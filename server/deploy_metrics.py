@@ -0,0 +1,185 @@
+# coding=utf-8
+"""Deploy pipeline instrumentation: per-deploy traces and process-wide histograms
+
+A DeployTrace collects spans (stages, git subprocesses, upstream HTTP
+calls) for one deploy and is attached to its job. Every span is also
+folded into the histograms/counters of `metrics`, which the metrics
+endpoint exports. Code deep in the pipeline finds the trace of the deploy
+it is running for through current_trace() (thread-local; worker pools use
+bind() to carry it over).
+"""
+
+import bisect
+import threading
+import time
+from contextlib import contextmanager
+from urllib.parse import urlparse
+import requests
+
+SECONDS_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300)
+BYTES_BUCKETS = (1024, 10 * 1024, 100 * 1024, 1024 ** 2, 10 * 1024 ** 2, 100 * 1024 ** 2)
+
+class Histogram:
+    """Cumulative-bucket histogram (Prometheus style) with count, sum, min and max"""
+
+    def __init__(self, buckets):
+        self.bounds = tuple(buckets)
+        self.counts = [0] * (len(self.bounds) + 1)  # Last slot is +Inf
+        self.count = 0
+        self.sum = 0.0
+        self.min = None
+        self.max = None
+
+    def observe(self, value):
+        self.counts[bisect.bisect_left(self.bounds, value)] += 1
+        self.count += 1
+        self.sum += value
+        self.min = value if self.min is None else min(self.min, value)
+        self.max = value if self.max is None else max(self.max, value)
+
+    def snapshot(self):
+        cumulative = 0
+        buckets = {}
+        for bound, count in zip(self.bounds + ('+Inf',), self.counts):
+            cumulative += count
+            buckets[str(bound)] = cumulative
+        return {
+            'count': self.count,
+            'sum': round(self.sum, 6),
+            'avg': round(self.sum / self.count, 6) if self.count else None,
+            'min': self.min,
+            'max': self.max,
+            'buckets': buckets,
+        }
+
+class MetricsRegistry:
+    """Named histograms and counters, each split by a label string"""
+
+    def __init__(self):
+        self._histograms = {}  # (name, label) -> Histogram
+        self._counters = {}  # (name, label) -> int
+        self._lock = threading.Lock()
+        self.started_at = time.time()
+
+    def observe(self, name, label, value, buckets=SECONDS_BUCKETS):
+        with self._lock:
+            histogram = self._histograms.get((name, label))
+            if histogram is None:
+                histogram = self._histograms[(name, label)] = Histogram(buckets)
+            histogram.observe(value)
+
+    def increment(self, name, label, amount=1):
+        with self._lock:
+            self._counters[(name, label)] = self._counters.get((name, label), 0) + amount
+
+    def snapshot(self):
+        with self._lock:
+            histograms = {}
+            for (name, label), histogram in sorted(self._histograms.items()):
+                histograms.setdefault(name, {})[label] = histogram.snapshot()
+            counters = {}
+            for (name, label), value in sorted(self._counters.items()):
+                counters.setdefault(name, {})[label] = value
+        return {'since': self.started_at, 'histograms': histograms, 'counters': counters}
+
+metrics = MetricsRegistry()
+
+class DeployTrace:
+    """Spans of one deploy: [{'kind', 'name', 'start', 'seconds', ...attrs}] with start relative to the trace"""
+
+    def __init__(self, engine=None):
+        self.engine = engine
+        self.started = time.monotonic()
+        self.spans = []
+        self._lock = threading.Lock()
+
+    def add(self, kind, name, seconds, started=None, **attrs):
+        """Record a finished span and feed it into the metrics histograms"""
+        span = {
+            'kind': kind,
+            'name': name,
+            'start': round((started if started is not None else time.monotonic() - seconds) - self.started, 3),
+            'seconds': round(seconds, 3),
+            **{key: value for key, value in attrs.items() if value is not None},
+        }
+        with self._lock:
+            self.spans.append(span)
+        # HTTP span names carry resource paths; label their metrics by service to keep them bounded
+        label = attrs.get('service', name) if kind == 'http' else name
+        metrics.observe(f'deploy_{kind}_seconds', label, seconds)
+        if attrs.get('bytes') is not None:
+            metrics.observe(f'deploy_{kind}_bytes', label, attrs['bytes'], BYTES_BUCKETS)
+        return span
+
+    @contextmanager
+    def span(self, kind, name, **attrs):
+        """Time a block as a span; the yielded dict can take attributes known only at the end"""
+        started = time.monotonic()
+        extra = dict(attrs)
+        try:
+            yield extra
+        except Exception as e:
+            extra.setdefault('error', type(e).__name__)
+            raise
+        finally:
+            self.add(kind, name, time.monotonic() - started, started=started, **extra)
+
+    def stages(self):
+        with self._lock:
+            return [span for span in self.spans if span['kind'] == 'stage']
+
+    def to_dict(self):
+        with self._lock:
+            spans = list(self.spans)
+        totals = {}
+        for span in spans:
+            totals[span['kind']] = round(totals.get(span['kind'], 0) + span['seconds'], 3)
+        return {
+            'engine': self.engine,
+            'total_seconds': round(time.monotonic() - self.started, 3),
+            'seconds_by_kind': totals,
+            'bytes_pushed': sum(span.get('bytes', 0) for span in spans if span['kind'] == 'git'),
+            'bytes_uploaded': sum(span.get('bytes', 0) for span in spans if span['kind'] == 'http'),
+            'spans': spans,
+        }
+
+_local = threading.local()
+
+def current_trace():
+    return getattr(_local, 'trace', None)
+
+@contextmanager
+def bind(trace):
+    """Make trace the current trace of this thread for the duration of the block"""
+    previous = current_trace()
+    _local.trace = trace
+    try:
+        yield trace
+    finally:
+        _local.trace = previous
+
+def traced_request(service, method, url, session=None, **kwargs):
+    """requests call that records an 'http' span (status code, timing, bytes sent) on the current trace
+
+    Only the URL path is recorded, never the query string or headers.
+    """
+    started = time.monotonic()
+    sent = kwargs.get('headers', {}).get('Content-Length')
+    name = f'{method} {urlparse(url).path}'
+    try:
+        response = (session or requests).request(method, url, **kwargs)
+    except requests.RequestException as e:
+        metrics.increment('deploy_http_responses', f'{service} error')
+        trace = current_trace()
+        if trace is not None:
+            trace.add('http', name, time.monotonic() - started, started=started, service=service,
+                      error=type(e).__name__)
+        raise
+    metrics.increment('deploy_http_responses', f'{service} {response.status_code}')
+    trace = current_trace()
+    if trace is not None:
+        trace.add('http', name, time.monotonic() - started, started=started, service=service,
+                  status_code=response.status_code, bytes=int(sent) if sent else None)
+    else:
+        metrics.observe('deploy_http_seconds', service, time.monotonic() - started)
+    return response
@@ -0,0 +1,100 @@
+# coding=utf-8
+"""Cached capability probes for deploy readiness (tools, credentials, folders, remotes)
+
+A probe runs in the background at startup and again whenever its result
+is older than its TTL; readers always get the last result from memory
+and never wait for a subprocess or a network call (except for the very
+first result, or an explicit forced refresh).
+"""
+
+import shutil
+import subprocess
+import threading
+import time
+import requests
+
+class CachedProbe:
+    """Holds the latest result of probe_fn() and refreshes it in the background after ttl seconds"""
+
+    def __init__(self, probe_fn, ttl, first_wait=10):
+        self.probe_fn = probe_fn
+        self.ttl = ttl
+        self.first_wait = first_wait  # Seconds a reader waits for the very first result
+        self._result = None
+        self._checked_at = None
+        self._checked_mono = 0.0
+        self._refreshing = False
+        self._lock = threading.Lock()
+        self._ready = threading.Event()
+        self.refreshes = 0
+        self.failures = 0
+
+    def _run(self):
+        try:
+            result = self.probe_fn()
+        except Exception as e:
+            result = {'error': str(e)}
+            self.failures += 1
+        with self._lock:
+            self._result = result
+            self._checked_at = time.time()
+            self._checked_mono = time.monotonic()
+            self._refreshing = False
+            self.refreshes += 1
+        self._ready.set()
+
+    def _start_refresh(self):
+        """Start a background refresh unless one is already running (caller must not hold the lock)"""
+        with self._lock:
+            if self._refreshing:
+                return
+            self._refreshing = True
+        threading.Thread(target=self._run, name='deploy-probe', daemon=True).start()
+
+    def start(self):
+        self._start_refresh()
+        return self
+
+    def get(self, force=False):
+        """Latest result plus checked_at / age_seconds; force=True probes again synchronously"""
+        if force:
+            self._run()
+        elif not self._ready.is_set():
+            self._start_refresh()
+            self._ready.wait(self.first_wait)
+        elif time.monotonic() - self._checked_mono > self.ttl:
+            self._start_refresh()  # Serve the stale result meanwhile
+        with self._lock:
+            if self._result is None:
+                return {'pending': True}
+            return {
+                **self._result,
+                'checked_at': self._checked_at,
+                'age_seconds': round(time.monotonic() - self._checked_mono, 3),
+            }
+
+def probe_git():
+    """git on PATH and its version, without a shell"""
+    path = shutil.which('git')
+    if path is None:
+        return {'git_available': False, 'git_version': None}
+    try:
+        result = subprocess.run([path, '--version'], capture_output=True, text=True, timeout=10, check=True)
+        return {'git_available': True, 'git_version': result.stdout.strip()}
+    except (subprocess.SubprocessError, OSError):
+        return {'git_available': False, 'git_version': None}
+
+def probe_endpoint(url, headers=None, timeout=(3.05, 5)):
+    """reachable: any HTTP answer; authorized: a 2xx with these credentials"""
+    started = time.monotonic()
+    try:
+        response = requests.get(url, headers=headers, timeout=timeout)
+    except requests.RequestException as e:
+        return {'url': url, 'reachable': False, 'authorized': False, 'error': type(e).__name__}
+    return {
+        'url': url,
+        'reachable': True,
+        'authorized': 200 <= response.status_code < 300,
+        'status_code': response.status_code,
+        'latency_ms': round((time.monotonic() - started) * 1000, 1),
+    }
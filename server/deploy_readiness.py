@@ -0,0 +1,123 @@
+# coding=utf-8
+"""Readiness polling for deploy stages: exponential backoff, a deadline and per-stage timing
+
+Instead of sleeping a fixed time after creating the repo or pushing, the
+deploy polls the upstream state it depends on and moves on as soon as it
+is there. Slow remotes get up to DEPLOY_READY_TIMEOUT seconds per stage.
+"""
+
+import os
+import threading
+import time
+import requests
+from deploy_metrics import traced_request
+
+READY_TIMEOUT = float(os.getenv("DEPLOY_READY_TIMEOUT", "60"))  # Deadline per stage
+READY_INITIAL_DELAY = float(os.getenv("DEPLOY_READY_INITIAL_DELAY", "0.25"))
+READY_MAX_DELAY = float(os.getenv("DEPLOY_READY_MAX_DELAY", "4"))
+REQUEST_TIMEOUT = (3.05, 10)  # (connect, read) per poll request
+
+VERCEL_FAILED_STATES = ('ERROR', 'CANCELED')
+
+_session = requests.Session()
+
+class DeployCancelled(Exception):
+    """Raised between deployment stages once a deploy job has been cancelled"""
+
+class NotReady(Exception):
+    """Raised when a stage is still not ready at its deadline"""
+
+def check_cancelled(cancel_event):
+    if cancel_event is not None and cancel_event.is_set():
+        raise DeployCancelled('Deployment cancelled')
+
+def poll_until(check, stage, timeout=READY_TIMEOUT, initial_delay=READY_INITIAL_DELAY,
+               max_delay=READY_MAX_DELAY, cancel_event=None):
+    """Call check() until it returns something truthy, doubling the delay between attempts
+
+    check() may raise to abort on a terminal upstream error. Returns
+    (value, timing) with timing = {'stage', 'seconds', 'attempts'}; raises
+    NotReady at the deadline and DeployCancelled if cancel_event is set.
+    """
+    cancel_event = cancel_event or threading.Event()
+    started = time.monotonic()
+    deadline = started + timeout
+    delay = initial_delay
+    attempts = 0
+    while True:
+        check_cancelled(cancel_event)
+        attempts += 1
+        value = check()
+        if value:
+            return value, {'stage': stage, 'seconds': round(time.monotonic() - started, 3), 'attempts': attempts}
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            raise NotReady(f'{stage} not ready after {timeout:g}s ({attempts} attempts)')
+        if cancel_event.wait(min(delay, remaining)):
+            raise DeployCancelled('Deployment cancelled')
+        delay = min(delay * 2, max_delay)
+
+def _get(url, headers, params=None, service='GitHub'):
+    """GET that treats connection problems as "not ready yet" (returns None)"""
+    try:
+        return traced_request(service.lower(), 'GET', url, _session, headers=headers, params=params,
+                              timeout=REQUEST_TIMEOUT)
+    except (requests.ConnectionError, requests.Timeout):
+        return None
+
+def _ready_json(response, service):
+    """Body of a 200, False while pending (404 or 5xx), raises on auth and other client errors"""
+    if response is None or response.status_code == 404 or response.status_code >= 500:
+        return False
+    if response.status_code == 200:
+        return response.json() or True
+    raise Exception(f'{service} Error: {response.status_code}, {response.text}')
+
+def wait_for_github_repo(api, owner, repo, token, **options):
+    """Wait until the repository is visible through the API at api; returns the timing"""
+    url = f'{api}/repos/{owner}/{repo}'
+    headers = {'Authorization': f'token {token}'}
+    _, timing = poll_until(lambda: _ready_json(_get(url, headers), 'GitHub'), 'github_repo_ready', **options)
+    return timing
+
+def wait_for_github_ref(api, owner, repo, token, branch, sha=None, **options):
+    """Wait until refs/heads/<branch> exists (and points at sha, if given); returns the timing"""
+    url = f'{api}/repos/{owner}/{repo}/git/ref/heads/{branch}'
+    headers = {'Authorization': f'token {token}'}
+
+    def check():
+        ref = _ready_json(_get(url, headers), 'GitHub')
+        if not ref:
+            return False
+        return sha is None or (ref.get('object') or {}).get('sha') == sha
+
+    _, timing = poll_until(check, 'github_ref_ready', **options)
+    return timing
+
+def wait_for_vercel_project(api, name, token, **options):
+    """Wait until the project can be read back; returns (project, timing)"""
+    url = f'{api}/v9/projects/{name}'
+    headers = {'Authorization': f'Bearer {token}'}
+    return poll_until(lambda: _ready_json(_get(url, headers, service='Vercel'), 'Vercel'), 'vercel_project_ready',
+                      **options)
+
+def wait_for_vercel_deployment(api, deployment_id, token, **options):
+    """Wait until the given deployment is READY; returns (deployment, timing)
+
+    Polls that deployment itself rather than the project's latest one,
+    which may be another deploy's. Raises as soon as it ends in ERROR or
+    CANCELED.
+    """
+    url = f'{api}/v13/deployments/{deployment_id}'
+    headers = {'Authorization': f'Bearer {token}'}
+
+    def check():
+        deployment = _ready_json(_get(url, headers, service='Vercel'), 'Vercel')
+        if not isinstance(deployment, dict):
+            return False
+        state = deployment.get('readyState') or deployment.get('state')
+        if state in VERCEL_FAILED_STATES:
+            raise Exception(f'Vercel deployment {deployment_id} ended in {state}')
+        return deployment if state == 'READY' else False
+
+    return poll_until(check, 'vercel_deployment_ready', **options)
@@ -0,0 +1,150 @@
+# coding=utf-8
+"""Deploy targets: which folder goes to which repo/project, and one lock per target"""
+
+import json
+import os
+import re
+import threading
+import time
+from deploy_readiness import check_cancelled
+
+REPO_NAME_PATTERN = re.compile(r'^[A-Za-z0-9_.-]{1,100}$')
+
+class DeployTarget:
+    """One deployable project: a source folder, its GitHub repo / Vercel project and its workspace repo
+
+    Everything a deploy touches is derived from the target, so deploys of
+    different targets share no paths and can run side by side.
+    """
+
+    def __init__(self, repo_name, folder_path, workspace_dir):
+        self.repo_name = repo_name
+        self.folder_path = folder_path
+        self.git_dir = os.path.join(workspace_dir, f'{repo_name}.git')
+
+    @property
+    def key(self):
+        return self.repo_name
+
+    @property
+    def project_name(self):
+        return self.repo_name.replace('_', '-')
+
+    def to_dict(self):
+        return {'repo_name': self.repo_name, 'folder': self.folder_path}
+
+def resolve_target(local_dir, workspace_dir, repo_name, folder):
+    """Build a target; folder must stay inside local_dir. Raises ValueError on bad input"""
+    if not repo_name or not REPO_NAME_PATTERN.match(repo_name):
+        raise ValueError(f'Invalid repo name: {repo_name!r}')
+    if not local_dir or not folder:
+        raise ValueError('LOCAL_DIR and a deploy folder are required')
+    root = os.path.realpath(local_dir)
+    folder_path = os.path.realpath(os.path.join(root, folder))
+    if os.path.commonpath([root, folder_path]) != root:
+        raise ValueError(f'Deploy folder must be inside LOCAL_DIR: {folder!r}')
+    return DeployTarget(repo_name, folder_path, workspace_dir)
+
+def parse_targets(spec, default_repo=None, default_folder=None):
+    """Deployable targets from "repo=folder,repo2=folder2"; {default_repo: default_folder} when spec is empty
+
+    Only these repos can be deployed (and created on GitHub/Vercel), whatever a request asks for.
+    """
+    targets = {}
+    for item in filter(None, (part.strip() for part in (spec or '').split(','))):
+        repo_name, _, folder = item.partition('=')
+        repo_name, folder = repo_name.strip(), folder.strip()
+        if not REPO_NAME_PATTERN.match(repo_name) or not folder:
+            raise ValueError(f'Invalid DEPLOY_TARGETS entry: {item!r}')
+        targets[repo_name] = folder
+    if not targets and default_repo and default_folder:
+        targets[default_repo] = default_folder
+    return targets
+
+class TargetLocks:
+    """One lock per target key: deploys to the same target run one at a time"""
+
+    def __init__(self):
+        self._locks = {}
+        self._guard = threading.Lock()
+
+    def get(self, key):
+        with self._guard:
+            lock = self._locks.get(key)
+            if lock is None:
+                lock = self._locks[key] = threading.Lock()
+            return lock
+
+    def acquire(self, key, cancel_event=None, on_wait=None):
+        """Block until key's lock is held, checking cancel_event every second; returns the lock
+
+        The deploy scheduler already keeps a target's jobs from overlapping,
+        so this normally returns at once; it guards any other caller.
+        """
+        lock = self.get(key)
+        if lock.acquire(blocking=False):
+            return lock
+        if on_wait is not None:
+            on_wait()
+        while not lock.acquire(timeout=1):
+            check_cancelled(cancel_event)
+        return lock
+
+    def busy(self):
+        with self._guard:
+            return sorted(key for key, lock in self._locks.items() if lock.locked())
+
+class TargetRegistry:
+    """Remembers the upstream resources created for each target (GitHub repo, Vercel project)
+
+    Persisted as one JSON file so later deploys, also after a restart,
+    reuse them instead of creating them again.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._lock = threading.Lock()
+        self._targets = self._load()
+
+    def _load(self):
+        try:
+            with open(self.path) as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def _save(self):
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        tmp = f'{self.path}.tmp'
+        with open(tmp, 'w') as f:
+            json.dump(self._targets, f, indent=2, sort_keys=True)
+        os.replace(tmp, self.path)
+
+    def get(self, key):
+        with self._lock:
+            return dict(self._targets.get(key) or {})
+
+    def update(self, key, **fields):
+        """Merge fields into key's record; returns the new record"""
+        with self._lock:
+            record = self._targets.setdefault(key, {'created_at': time.time()})
+            record.update(fields, updated_at=time.time())
+            self._save()
+            return dict(record)
+
+    def forget(self, key, *fields):
+        """Drop some fields (e.g. a project that no longer exists), or the whole record"""
+        with self._lock:
+            record = self._targets.get(key)
+            if record is None:
+                return
+            if fields:
+                for name in fields:
+                    record.pop(name, None)
+            else:
+                del self._targets[key]
+            self._save()
+
+    def all(self):
+        with self._lock:
+            return {key: dict(record) for key, record in self._targets.items()}
@@ -0,0 +1,246 @@
+# coding=utf-8
+"""In-process event fan-out with Server-Sent Events framing and Last-Event-ID resume"""
+
+import asyncio
+import json
+import os
+import secrets
+import threading
+import time
+from collections import OrderedDict, deque
+from ttl_cache import TTLCache
+
+HISTORY_SIZE = int(os.getenv("SSE_HISTORY_SIZE", "256"))  # Events kept per topic for resume
+HEARTBEAT_SECONDS = float(os.getenv("SSE_HEARTBEAT", "15"))
+CLOSED_TOPICS_KEPT = 4096  # Closed topics whose last event id is remembered
+END_OF_STREAM_RETRY_MS = 60000  # retry: hint sent with a stream's final event
+STREAM_TICKET_TTL = float(os.getenv("SSE_TICKET_TTL", "60"))
+
+class _Topic:
+    def __init__(self):
+        self.cond = threading.Condition()
+        self.history = deque(maxlen=HISTORY_SIZE)  # (event_id, event_type, data)
+        self.last_id = 0
+        self.closed = False
+        self.waiters = set()  # (loop, asyncio.Event) of async subscribers
+
+    def wake(self):
+        """Wake every subscriber; call with cond held"""
+        self.cond.notify_all()
+        for loop, event in self.waiters:
+            try:
+                loop.call_soon_threadsafe(event.set)
+            except RuntimeError:
+                pass  # Loop already closed; its subscriber is gone
+
+class EventHub:
+    """Topics of numbered events; subscribers follow a topic from any event id
+
+    Each topic keeps a bounded history instead of per-subscriber queues, so
+    a slow or disconnected client never holds memory, and a reconnecting
+    client can resume from its Last-Event-ID as long as that is still in
+    the history window. Publishers are threads; subscribers are threads
+    (subscribe) or coroutines on an event loop (subscribe_async).
+
+    Only publish() and open() create topics. Subscribing to a topic that
+    was closed, or never opened, ends at once, so late subscribers cannot
+    bring a finished job's topic back.
+    """
+
+    def __init__(self):
+        self._topics = {}
+        self._closed_ids = OrderedDict()  # name -> last event id of a closed topic
+        self._lock = threading.Lock()
+        self.published = 0
+        self.subscribers = 0
+
+    def _topic(self, name):
+        with self._lock:
+            topic = self._topics.get(name)
+            if topic is None:
+                topic = self._topics[name] = _Topic()
+                self._closed_ids.pop(name, None)
+            return topic
+
+    def open(self, name):
+        """Create a topic ahead of its first event, for subscribers that may come before it"""
+        self._topic(name)
+
+    def _subscribed_topic(self, name):
+        """The live topic for a new subscription, or None if it is closed or unknown"""
+        with self._lock:
+            return self._topics.get(name)
+
+    def publish(self, name, event_type, data):
+        """Append an event to a topic and wake its subscribers; returns the event id"""
+        topic = self._topic(name)
+        with topic.cond:
+            topic.last_id += 1
+            topic.history.append((topic.last_id, event_type, data))
+            topic.wake()
+        with self._lock:
+            self.published += 1
+        return topic.last_id
+
+    def close(self, name):
+        """End all subscriptions to a topic (after its final event) and forget it"""
+        with self._lock:
+            topic = self._topics.pop(name, None)
+            if topic is not None:
+                self._closed_ids[name] = topic.last_id
+                self._closed_ids.move_to_end(name)
+                while len(self._closed_ids) > CLOSED_TOPICS_KEPT:
+                    self._closed_ids.popitem(last=False)
+        if topic is not None:
+            with topic.cond:
+                topic.closed = True
+                topic.wake()
+
+    def last_id(self, name):
+        """Id of the topic's latest event, also after it was closed (0 if unknown)"""
+        with self._lock:
+            topic = self._topics.get(name)
+            if topic is None:
+                return self._closed_ids.get(name, 0)
+        with topic.cond:
+            return topic.last_id
+
+    def last_event(self, name):
+        with self._lock:
+            topic = self._topics.get(name)
+        if topic is None:
+            return None
+        with topic.cond:
+            return topic.history[-1] if topic.history else None
+
+    @staticmethod
+    def _start(topic, last_event_id):
+        """Initial cursor and an optional reset event for a new subscription; call with cond held"""
+        if last_event_id is None:
+            return topic.last_id, None
+        oldest = topic.history[0][0] if topic.history else topic.last_id + 1
+        if last_event_id + 1 < oldest or last_event_id > topic.last_id:
+            return topic.last_id, (topic.last_id, "reset", {"reason": "history_expired"})
+        return last_event_id, None
+
+    def subscribe(self, name, last_event_id=None, heartbeat=HEARTBEAT_SECONDS):
+        """Yield (event_id, event_type, data) forever; (None, None, None) on idle heartbeats
+
+        With last_event_id, events after it are replayed first. If it has
+        already fallen out of the history a ("reset") event is sent so the
+        client knows to refetch the full state.
+        """
+        topic = self._subscribed_topic(name)
+        if topic is None:
+            return
+        with self._lock:
+            self.subscribers += 1
+        try:
+            with topic.cond:
+                cursor, reset = self._start(topic, last_event_id)
+            if reset is not None:
+                yield reset
+            while True:
+                with topic.cond:
+                    pending = [event for event in topic.history if event[0] > cursor]
+                    if not pending and not topic.closed:
+                        topic.cond.wait(timeout=heartbeat)
+                        pending = [event for event in topic.history if event[0] > cursor]
+                    closed = topic.closed
+                for event in pending:
+                    cursor = event[0]
+                    yield event
+                if closed and not pending:
+                    return
+                if not pending:
+                    yield None, None, None
+        finally:
+            with self._lock:
+                self.subscribers -= 1
+
+    async def subscribe_async(self, name, last_event_id=None, heartbeat=HEARTBEAT_SECONDS):
+        """subscribe() for an event loop: waits without holding a thread"""
+        topic = self._subscribed_topic(name)
+        if topic is None:
+            return
+        waiter = (asyncio.get_running_loop(), asyncio.Event())
+        with topic.cond:
+            topic.waiters.add(waiter)
+            cursor, reset = self._start(topic, last_event_id)
+        with self._lock:
+            self.subscribers += 1
+        try:
+            if reset is not None:
+                yield reset
+            woken = waiter[1]
+            while True:
+                woken.clear()
+                with topic.cond:
+                    pending = [event for event in topic.history if event[0] > cursor]
+                    closed = topic.closed
+                if not pending and not closed:
+                    try:
+                        await asyncio.wait_for(woken.wait(), timeout=heartbeat)
+                    except asyncio.TimeoutError:
+                        pass
+                    with topic.cond:
+                        pending = [event for event in topic.history if event[0] > cursor]
+                        closed = topic.closed
+                for event in pending:
+                    cursor = event[0]
+                    yield event
+                if closed and not pending:
+                    return
+                if not pending:
+                    yield None, None, None
+        finally:
+            with topic.cond:
+                topic.waiters.discard(waiter)
+            with self._lock:
+                self.subscribers -= 1
+
+    def stats(self):
+        with self._lock:
+            return {
+                "topics": len(self._topics),
+                "subscribers": self.subscribers,
+                "published": self.published,
+            }
+
+class StreamTickets:
+    """Short-lived opaque tickets that stand in for a bearer token on EventSource URLs
+
+    EventSource cannot send an Authorization header, and a token in the
+    query string ends up in access logs and browser history. A client
+    exchanges its token for a ticket bound to one stream; the ticket stays
+    valid for its TTL so EventSource can reconnect with the same URL.
+    """
+
+    def __init__(self, ttl=STREAM_TICKET_TTL, maxsize=4096):
+        self.ttl = ttl
+        self._tickets = TTLCache(maxsize=maxsize, ttl=ttl)
+
+    def issue(self, scope):
+        ticket = secrets.token_urlsafe(24)
+        self._tickets.set(ticket, scope)
+        return ticket
+
+    def check(self, ticket, scope):
+        """True if ticket is live and was issued for scope"""
+        return bool(ticket) and self._tickets.get(ticket) == scope
+
+def format_sse(event_id, event_type, data, retry=None):
+    """Frame one event for text/event-stream; a heartbeat is an SSE comment
+
+    retry (milliseconds) tells EventSource how long to wait before it reconnects.
+    """
+    if event_id is None:
+        return f": keep-alive {int(time.time())}\n\n"
+    retry_line = f"retry: {retry}\n" if retry is not None else ""
+    return f"{retry_line}id: {event_id}\nevent: {event_type}\ndata: {json.dumps(data, separators=(',', ':'))}\n\n"
+
+def parse_last_event_id(value):
+    try:
+        return int(value) if value not in (None, "") else None
+    except ValueError:
+        return None
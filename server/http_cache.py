@@ -0,0 +1,81 @@
+# coding=utf-8
+"""ETag / If-None-Match handling and response compression for proxy endpoints"""
+
+import gzip
+import hashlib
+import os
+from flask import request
+
+try:
+    import brotli  # Optional: pip install brotli
+except ImportError:
+    brotli = None
+
+COMPRESS_MIN_SIZE = int(os.getenv("COMPRESS_MIN_SIZE", "1024"))  # Bytes; smaller bodies are sent as-is
+GZIP_LEVEL = int(os.getenv("GZIP_LEVEL", "6"))
+BROTLI_QUALITY = int(os.getenv("BROTLI_QUALITY", "5"))
+
+def body_etag(body):
+    """Weak ETag from the identity body, so it stays valid across encodings"""
+    return 'W/"' + hashlib.blake2b(body, digest_size=16).hexdigest() + '"'
+
+def etag_matches(if_none_match, etag):
+    """Weak comparison: W/"x" and "x" match each other, "*" matches anything"""
+    candidates = {tag.strip() for tag in (if_none_match or "").split(",")}
+    return "*" in candidates or etag in candidates or etag[2:] in candidates
+
+def choose_encoding(accept_encoding):
+    """Pick br (if available) or gzip from an Accept-Encoding header, else None"""
+    accepted = set()
+    for part in (accept_encoding or "").split(","):
+        name, _, params = part.strip().partition(";")
+        if name and params.replace(" ", "") != "q=0":
+            accepted.add(name.lower())
+    if brotli is not None and "br" in accepted:
+        return "br"
+    if "gzip" in accepted:
+        return "gzip"
+    return None
+
+def compress(body, encoding):
+    if encoding == "br":
+        return brotli.compress(body, quality=BROTLI_QUALITY)
+    return gzip.compress(body, compresslevel=GZIP_LEVEL)
+
+def conditional_response(response):
+    """Add an ETag, answer If-None-Match with 304, and compress large bodies"""
+    if response.status_code != 200 or response.direct_passthrough or response.is_streamed:
+        return response
+    if response.headers.get("Content-Encoding"):
+        return response
+
+    body = response.get_data()
+    etag = body_etag(body)
+    response.headers["ETag"] = etag
+    response.headers["Cache-Control"] = "private, no-cache"
+    response.vary.add("Authorization")
+
+    if etag_matches(request.headers.get("If-None-Match"), etag):
+        response.status_code = 304
+        response.set_data(b"")
+        response.headers.pop("Content-Type", None)
+        response.headers.pop("Content-Length", None)
+        return response
+
+    response.vary.add("Accept-Encoding")
+    encoding = choose_encoding(request.headers.get("Accept-Encoding"))
+    if encoding and len(body) >= COMPRESS_MIN_SIZE:
+        response.set_data(compress(body, encoding))
+        response.headers["Content-Encoding"] = encoding
+    return response
+
+def setup_conditional_responses(app, prefix="/api/jira/"):
+    """Apply ETag and compression handling to every route under prefix"""
+
+    @app.after_request
+    def _conditional_jira_response(response):
+        if request.method == "GET" and request.path.startswith(prefix):
+            return conditional_response(response)
+        return response
+
+    return app
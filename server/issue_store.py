@@ -0,0 +1,308 @@
+# coding=utf-8
+"""Persistent local Jira issue store (SQLite, WAL mode) with incremental sync"""
+
+import json
+import os
+import sqlite3
+import threading
+import time
+from jira_client import TASKS_JQL, iter_search_pages
+
+STORE_PATH = os.getenv("JIRA_STORE_PATH", os.path.join(os.path.dirname(os.path.abspath(__file__)), "jira_issues.db"))
+SYNC_INTERVAL = float(os.getenv("JIRA_SYNC_INTERVAL", "15"))  # Seconds a sync stays fresh
+SYNC_OVERLAP = 60  # Seconds re-fetched on every delta to cover clock skew and JQL minute rounding
+# Seconds between full passes, which drop issues deleted upstream or no longer visible to the user
+RECONCILE_INTERVAL = float(os.getenv("JIRA_RECONCILE_INTERVAL", "900"))
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS issues (
+    cloud_id    TEXT NOT NULL,
+    issue_key   TEXT NOT NULL,
+    issue_id    TEXT,
+    status      TEXT,
+    assignee_id TEXT,
+    updated     TEXT,
+    data        TEXT NOT NULL,
+    PRIMARY KEY (cloud_id, issue_key)
+);
+CREATE INDEX IF NOT EXISTS issues_by_updated ON issues (cloud_id, updated DESC);
+CREATE TABLE IF NOT EXISTS issue_visibility (
+    cloud_id   TEXT NOT NULL,
+    account_id TEXT NOT NULL,
+    issue_key  TEXT NOT NULL,
+    PRIMARY KEY (cloud_id, account_id, issue_key)
+);
+CREATE INDEX IF NOT EXISTS visibility_by_issue ON issue_visibility (cloud_id, issue_key);
+CREATE TABLE IF NOT EXISTS user_sync (
+    cloud_id       TEXT NOT NULL,
+    account_id     TEXT NOT NULL,
+    last_sync      REAL NOT NULL,
+    last_full_sync REAL NOT NULL,
+    PRIMARY KEY (cloud_id, account_id)
+);
+"""
+
+# Upgrades for existing databases, by the PRAGMA user_version each one brings them to
+MIGRATIONS = {
+    2: "DROP TABLE IF EXISTS sync_state;",  # Per-site sync times, replaced by user_sync
+}
+SCHEMA_VERSION = max(MIGRATIONS)
+
+class ScopeLock:
+    """One holder's handle on a (site, user) sync lock; see IssueStore.sync_lock
+
+    acquire() and release() may run on different threads, which lets the
+    ASGI mode wait for the lock in an executor and release it on the loop.
+    """
+
+    def __init__(self, store, key, lock):
+        self._store = store
+        self._key = key
+        self._lock = lock
+
+    def acquire(self):
+        self._lock.acquire()
+
+    def release(self):
+        self._lock.release()
+        self._store._unlease_sync_lock(self._key)
+
+    def __enter__(self):
+        self.acquire()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.release()
+
+class IssueStore:
+    """Issues keyed by (cloud_id, issue key), which users may see them, and each user's sync times
+
+    An issue row is stored once per site, but a user is only ever answered
+    with issues their own token fetched (issue_visibility), since Jira
+    permissions differ per user. Within those, the same rule as the
+    upstream JQL (assignee=currentUser() OR status!=Done) is applied
+    locally, so delta syncs can fetch "everything updated since" and still
+    notice issues that left the set. Periodic full passes drop what a user
+    can no longer see, and issues nobody can see are deleted.
+    """
+
+    def __init__(self, path=STORE_PATH):
+        self.path = path
+        self._local = threading.local()
+        self._connections = set()  # One per thread that used the store; closed by close()
+        self._connections_lock = threading.Lock()
+        self._write_lock = threading.Lock()
+        self._sync_locks = {}  # (cloud_id, account_id) -> [lock, holders and waiters]
+        self._sync_locks_lock = threading.Lock()
+        with self._connect() as conn:
+            version = conn.execute("PRAGMA user_version").fetchone()[0]
+            for target in sorted(v for v in MIGRATIONS if v > version):
+                conn.executescript(MIGRATIONS[target])
+            conn.executescript(SCHEMA)
+            if version < SCHEMA_VERSION:
+                conn.execute(f"PRAGMA user_version = {SCHEMA_VERSION}")
+
+    def _connect(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None or conn not in self._connections:
+            # check_same_thread=False only so close() can close it; each thread still uses its own
+            conn = sqlite3.connect(self.path, timeout=30, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+            with self._connections_lock:
+                self._connections.add(conn)
+        return conn
+
+    def close(self):
+        """Close every thread's connection (on shutdown); a later call reconnects"""
+        with self._connections_lock:
+            connections, self._connections = self._connections, set()
+        for conn in connections:
+            conn.close()
+
+    def sync_lock(self, cloud_id, account_id):
+        """ScopeLock that serializes syncs for one (site, user) scope, in either serving mode
+
+        Each call must be paired with one acquire() and release() (or a with
+        block). An entry is dropped once nobody holds or waits for it, so the
+        map only grows with the scopes syncing right now.
+        """
+        key = (cloud_id, account_id)
+        with self._sync_locks_lock:
+            entry = self._sync_locks.setdefault(key, [threading.Lock(), 0])
+            entry[1] += 1
+            return ScopeLock(self, key, entry[0])
+
+    def _unlease_sync_lock(self, key):
+        with self._sync_locks_lock:
+            entry = self._sync_locks[key]
+            entry[1] -= 1
+            if not entry[1]:
+                del self._sync_locks[key]
+
+    def sync_state(self, cloud_id, account_id):
+        """{'last_sync', 'last_full_sync'} for a user on a site, or None before their first sync"""
+        row = self._connect().execute(
+            "SELECT last_sync, last_full_sync FROM user_sync WHERE cloud_id = ? AND account_id = ?",
+            (cloud_id, account_id),
+        ).fetchone()
+        return {"last_sync": row[0], "last_full_sync": row[1]} if row else None
+
+    def mark_synced(self, cloud_id, account_id, synced_at, full=False):
+        with self._write_lock, self._connect() as conn:
+            conn.execute(
+                "INSERT INTO user_sync (cloud_id, account_id, last_sync, last_full_sync) VALUES (?, ?, ?, ?) "
+                "ON CONFLICT (cloud_id, account_id) DO UPDATE SET last_sync = excluded.last_sync, "
+                "last_full_sync = CASE WHEN ? THEN excluded.last_full_sync ELSE last_full_sync END",
+                (cloud_id, account_id, synced_at, synced_at, full),
+            )
+
+    def upsert_issues(self, cloud_id, issues, account_id=None):
+        """Write issues; returns how many rows were written
+
+        With account_id (issues that user's token fetched) rows are inserted
+        or replaced and marked visible to that user. Without it (webhook
+        deltas) only issues already in the store are updated: nobody is known
+        to be allowed to see a new one until their own sync fetches it.
+        """
+        rows = []
+        for issue in issues:
+            fields = issue.get("fields") or {}
+            rows.append((
+                cloud_id,
+                issue["key"],
+                issue.get("id"),
+                (fields.get("status") or {}).get("name"),
+                (fields.get("assignee") or {}).get("accountId"),
+                fields.get("updated"),
+                json.dumps(issue, separators=(",", ":")),
+            ))
+        if not rows:
+            return 0
+        with self._write_lock, self._connect() as conn:
+            if account_id is None:
+                cursor = conn.executemany(
+                    "UPDATE issues SET issue_id = ?, status = ?, assignee_id = ?, updated = ?, data = ? "
+                    "WHERE cloud_id = ? AND issue_key = ?",
+                    [(*row[2:], row[0], row[1]) for row in rows],
+                )
+                return cursor.rowcount
+            conn.executemany(
+                "INSERT OR REPLACE INTO issues "
+                "(cloud_id, issue_key, issue_id, status, assignee_id, updated, data) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                rows,
+            )
+            conn.executemany(
+                "INSERT OR IGNORE INTO issue_visibility (cloud_id, account_id, issue_key) VALUES (?, ?, ?)",
+                [(cloud_id, account_id, row[1]) for row in rows],
+            )
+        return len(rows)
+
+    def reconcile(self, cloud_id, account_id, seen_keys):
+        """After a full pass: forget what the user no longer sees, then drop issues nobody sees
+
+        Returns how many issues were removed from the user's view.
+        """
+        with self._write_lock, self._connect() as conn:
+            visible = {row[0] for row in conn.execute(
+                "SELECT issue_key FROM issue_visibility WHERE cloud_id = ? AND account_id = ?",
+                (cloud_id, account_id),
+            )}
+            stale = visible - set(seen_keys)
+            conn.executemany(
+                "DELETE FROM issue_visibility WHERE cloud_id = ? AND account_id = ? AND issue_key = ?",
+                [(cloud_id, account_id, key) for key in stale],
+            )
+            conn.execute(
+                "DELETE FROM issues WHERE cloud_id = ? AND NOT EXISTS (SELECT 1 FROM issue_visibility v "
+                "WHERE v.cloud_id = issues.cloud_id AND v.issue_key = issues.issue_key)",
+                (cloud_id,),
+            )
+        return len(stale)
+
+    def delete_issue(self, cloud_id, issue_key):
+        with self._write_lock, self._connect() as conn:
+            conn.execute("DELETE FROM issues WHERE cloud_id = ? AND issue_key = ?", (cloud_id, issue_key))
+            conn.execute("DELETE FROM issue_visibility WHERE cloud_id = ? AND issue_key = ?", (cloud_id, issue_key))
+
+    def is_visible(self, cloud_id, account_id, issue_key):
+        row = self._connect().execute(
+            "SELECT 1 FROM issue_visibility WHERE cloud_id = ? AND account_id = ? AND issue_key = ?",
+            (cloud_id, account_id, issue_key),
+        ).fetchone()
+        return row is not None
+
+    def get_issue(self, cloud_id, issue_key):
+        row = self._connect().execute(
+            "SELECT data FROM issues WHERE cloud_id = ? AND issue_key = ?",
+            (cloud_id, issue_key),
+        ).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def tasks_for(self, cloud_id, account_id):
+        """Issues visible to the user matching assignee=currentUser() OR status!=Done, newest first"""
+        rows = self._connect().execute(
+            "SELECT i.data FROM issues i JOIN issue_visibility v "
+            "ON v.cloud_id = i.cloud_id AND v.issue_key = i.issue_key "
+            "WHERE i.cloud_id = ? AND v.account_id = ? "
+            "AND (i.assignee_id = ? OR i.status IS NULL OR i.status != 'Done') "
+            "ORDER BY i.updated DESC",
+            (cloud_id, account_id, account_id),
+        ).fetchall()
+        return [json.loads(row[0]) for row in rows]
+
+    def count(self, cloud_id=None):
+        if cloud_id is None:
+            return self._connect().execute("SELECT COUNT(*) FROM issues").fetchone()[0]
+        return self._connect().execute("SELECT COUNT(*) FROM issues WHERE cloud_id = ?", (cloud_id,)).fetchone()[0]
+
+def delta_jql(last_sync, now=None):
+    """JQL for issues updated since last_sync
+
+    Uses a relative "-Nm" offset so the query does not depend on the Jira
+    user's profile timezone, padded by SYNC_OVERLAP to avoid gaps.
+    """
+    now = now or time.time()
+    minutes = int((now - last_sync + SYNC_OVERLAP) // 60) + 1
+    return f"updated >= -{minutes}m"
+
+def sync_plan(state, started, force=False):
+    """(mode, jql) for a user's next sync, or None while the last one is still fresh
+
+    The first sync, and one every RECONCILE_INTERVAL after that, is a full
+    pass over the task search; the others only fetch issues updated since.
+    """
+    if state is None or started - state["last_full_sync"] >= RECONCILE_INTERVAL:
+        return "full", TASKS_JQL
+    if not force and started - state["last_sync"] < SYNC_INTERVAL:
+        return None
+    return "delta", delta_jql(state["last_sync"], started)
+
+def sync_tasks(store, access_token, cloud_id, account_id, force=False):
+    """Bring the store up to date for one user on one site; returns a small summary
+
+    Everything fetched is recorded as visible to this user only. A full
+    pass also removes the user's issues that it did not return (deleted
+    upstream, permission lost, or out of the task set).
+    """
+    with store.sync_lock(cloud_id, account_id):
+        started = time.time()
+        state = store.sync_state(cloud_id, account_id)
+        plan = sync_plan(state, started, force)
+        if plan is None:
+            return {"mode": "fresh", "fetched": 0, "last_sync": state["last_sync"]}
+        mode, jql = plan
+
+        fetched = 0
+        seen = set()
+        for page in iter_search_pages(access_token, cloud_id, jql=jql):
+            issues = page.get("issues", [])
+            fetched += store.upsert_issues(cloud_id, issues, account_id)
+            seen.update(issue["key"] for issue in issues)
+        summary = {"mode": mode, "fetched": fetched, "last_sync": started}
+        if mode == "full":
+            summary["removed"] = store.reconcile(cloud_id, account_id, seen)
+        store.mark_synced(cloud_id, account_id, started, full=mode == "full")
+        return summary
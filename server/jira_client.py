@@ -0,0 +1,205 @@
+# coding=utf-8
+"""Shared, pooled HTTP client for Atlassian API calls"""
+
+import hashlib
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+from ttl_cache import TTLCache
+from singleflight import SingleFlight
+from rate_limit import RateLimiter, RATE_LIMIT_RETRIES
+
+# === Atlassian Client Config ===
+ATLASSIAN_API = os.getenv("ATLASSIAN_API", "https://api.atlassian.com").rstrip("/")
+POOL_CONNECTIONS = int(os.getenv("ATLASSIAN_POOL_CONNECTIONS", "4"))  # Number of hosts to keep pools for
+POOL_MAXSIZE = int(os.getenv("ATLASSIAN_POOL_MAXSIZE", "20"))  # Keep-alive connections per host
+CONNECT_TIMEOUT = float(os.getenv("ATLASSIAN_CONNECT_TIMEOUT", "3.05"))
+READ_TIMEOUT = float(os.getenv("ATLASSIAN_READ_TIMEOUT", "30"))
+MAX_RETRIES = int(os.getenv("ATLASSIAN_MAX_RETRIES", "3"))
+RETRY_BACKOFF = float(os.getenv("ATLASSIAN_RETRY_BACKOFF", "0.3"))
+RETRY_STATUSES = (502, 503, 504)  # Retried for idempotent requests, like connection errors
+
+_session = None
+_session_lock = threading.Lock()
+
+# Smooths bursts per cloud_id and per token, and backs off on 429 Retry-After
+rate_limiter = RateLimiter()
+
+def _build_session():
+    """Create a keep-alive session with a bounded connection pool and retry policy"""
+    retry = Retry(
+        total=MAX_RETRIES,
+        connect=MAX_RETRIES,
+        read=MAX_RETRIES,
+        backoff_factor=RETRY_BACKOFF,
+        status_forcelist=RETRY_STATUSES,
+        allowed_methods=frozenset(["GET", "HEAD", "OPTIONS"]),
+        raise_on_status=False,
+    )
+    adapter = HTTPAdapter(
+        pool_connections=POOL_CONNECTIONS,
+        pool_maxsize=POOL_MAXSIZE,
+        max_retries=retry,
+        pool_block=False,
+    )
+    session = requests.Session()
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    session.headers.update({"Accept": "application/json"})
+    return session
+
+def get_session():
+    """Return the process-wide Atlassian session, creating it on first use"""
+    global _session
+    if _session is None:
+        with _session_lock:
+            if _session is None:
+                _session = _build_session()
+    return _session
+
+def api_url(path):
+    """Build an absolute Atlassian API URL from a path like '/me'"""
+    if path.startswith("http://") or path.startswith("https://"):
+        return path
+    return f"{ATLASSIAN_API}/{path.lstrip('/')}"
+
+def atlassian_get(path, access_token, params=None, timeout=None):
+    """GET an Atlassian API path with the shared pooled session
+
+    Waits for the site/token rate-limit budget first. A 429 blocks the
+    matching buckets for Retry-After (with jitter) and is retried up to
+    RATE_LIMIT_RETRIES times before being returned to the caller.
+    """
+    keys = rate_limiter.keys_for(path, token_hash(access_token))
+    for attempt in range(RATE_LIMIT_RETRIES + 1):
+        delay = rate_limiter.reserve(keys)
+        if delay > 0:
+            time.sleep(delay)
+        response = get_session().get(
+            api_url(path),
+            params=params,
+            headers={
+                "Authorization": f"Bearer {access_token}",
+                "Accept": "application/json",
+            },
+            timeout=timeout or (CONNECT_TIMEOUT, READ_TIMEOUT),
+        )
+        if response.status_code != 429 or attempt == RATE_LIMIT_RETRIES:
+            break
+        rate_limiter.on_throttled(keys, response.headers.get("Retry-After"), attempt)
+    if response.status_code == 401:
+        # Token was revoked or expired: nothing cached for it can be trusted
+        key = token_hash(access_token)
+        resources_cache.invalidate(key)
+        profile_cache.invalidate(key)
+    return response
+
+# === Accessible Resources / Profile Cache ===
+RESOURCES_CACHE_TTL = float(os.getenv("ATLASSIAN_RESOURCES_TTL", "600"))
+RESOURCES_CACHE_SIZE = int(os.getenv("ATLASSIAN_RESOURCES_CACHE_SIZE", "1024"))
+
+resources_cache = TTLCache(maxsize=RESOURCES_CACHE_SIZE, ttl=RESOURCES_CACHE_TTL)
+profile_cache = TTLCache(maxsize=RESOURCES_CACHE_SIZE, ttl=RESOURCES_CACHE_TTL)
+
+# Coalesces identical concurrent upstream calls, keyed (endpoint, token hash, params...)
+inflight = SingleFlight()
+
+def token_hash(access_token):
+    """Stable cache key for a token that never keeps the raw secret around"""
+    return hashlib.sha256(access_token.encode("utf-8")).hexdigest()
+
+def get_accessible_resources(access_token):
+    """Return the token's accessible Jira sites, served from cache when fresh
+
+    Raises requests.HTTPError on a non-200 response. Any 401 seen by
+    atlassian_get drops the cached entry for that token.
+    """
+    key = token_hash(access_token)
+    resources = resources_cache.get(key)
+    if resources is not None:
+        return resources
+
+    return inflight.do(("resources", key), _fetch_accessible_resources, access_token, key)
+
+def _fetch_accessible_resources(access_token, key):
+    response = atlassian_get("/oauth/token/accessible-resources", access_token)
+    response.raise_for_status()
+    resources = response.json()
+    resources_cache.set(key, resources)
+    return resources
+
+def get_profile(access_token):
+    """Return the token owner's /me profile, served from cache when fresh"""
+    key = token_hash(access_token)
+    profile = profile_cache.get(key)
+    if profile is not None:
+        return profile
+
+    return inflight.do(("profile", key), _fetch_profile, access_token, key)
+
+def _fetch_profile(access_token, key):
+    response = atlassian_get("/me", access_token)
+    response.raise_for_status()
+    profile = response.json()
+    profile_cache.set(key, profile)
+    return profile
+
+# === Issue Search ===
+TASKS_JQL = "assignee=currentUser() OR status!=Done"
+SEARCH_PAGE_SIZE = int(os.getenv("JIRA_SEARCH_PAGE_SIZE", "100"))
+SEARCH_WORKERS = int(os.getenv("JIRA_SEARCH_WORKERS", "4"))  # Pages in flight per search
+SEARCH_POOL_SIZE = int(os.getenv("JIRA_SEARCH_POOL_SIZE", "16"))  # Pages in flight across all searches
+
+# One pool for every paginated search (streams, store syncs), so concurrent requests share its bound
+_search_pool = ThreadPoolExecutor(max_workers=SEARCH_POOL_SIZE, thread_name_prefix="jira-search")
+
+def search_page(access_token, cloud_id, jql=TASKS_JQL, start_at=0, max_results=SEARCH_PAGE_SIZE, params=None):
+    """Fetch one page of rest/api/3/search, raising requests.HTTPError on failure"""
+    query = dict(params or {})
+    query.update({"jql": jql, "startAt": start_at, "maxResults": max_results})
+    response = atlassian_get(f"/ex/jira/{cloud_id}/rest/api/3/search", access_token, params=query)
+    response.raise_for_status()
+    return response.json()
+
+def iter_search_pages(access_token, cloud_id, jql=TASKS_JQL, page_size=SEARCH_PAGE_SIZE, workers=SEARCH_WORKERS, params=None):
+    """Yield every search page: the first one, then the rest as they complete
+
+    The first page tells us the total; the remaining startAt offsets are
+    fetched on the shared search pool with at most `workers` requests in
+    flight for this search (and SEARCH_POOL_SIZE across all of them), so
+    memory stays bounded to a handful of pages no matter how large the site
+    is. Pages after the first are yielded in completion order, not startAt
+    order.
+    """
+    first = search_page(access_token, cloud_id, jql, 0, page_size, params)
+    yield first
+
+    total = first.get("total", 0)
+    # Jira may cap maxResults below what we asked for; page by what it returned
+    step = first.get("maxResults") or page_size
+    offsets = iter(range(step, total, step))
+
+    def submit(start_at):
+        return _search_pool.submit(search_page, access_token, cloud_id, jql, start_at, step, params)
+
+    in_flight = set()
+    try:
+        for start_at in offsets:
+            in_flight.add(submit(start_at))
+            if len(in_flight) >= workers:
+                break
+        while in_flight:
+            done, in_flight = wait(in_flight, return_when=FIRST_COMPLETED)
+            for future in done:
+                next_start = next(offsets, None)
+                if next_start is not None:
+                    in_flight.add(submit(next_start))
+                yield future.result()
+    finally:
+        # Abandoned (client gone, or a page failed): drop this search's queued pages
+        for future in in_flight:
+            future.cancel()
@@ -0,0 +1,65 @@
+# coding=utf-8
+"""Compact issue records projected from Jira search results"""
+
+def _name(value):
+    return value.get("name") if isinstance(value, dict) else None
+
+def _display_name(value):
+    return value.get("displayName") if isinstance(value, dict) else None
+
+# Compact record key -> (Jira field id to request upstream, extractor over issue["fields"])
+PROJECTIONS = {
+    "summary": ("summary", lambda f: f.get("summary")),
+    "status": ("status", lambda f: _name(f.get("status"))),
+    "priority": ("priority", lambda f: _name(f.get("priority"))),
+    "assignee": ("assignee", lambda f: _display_name(f.get("assignee"))),
+    "reporter": ("reporter", lambda f: _display_name(f.get("reporter"))),
+    "issuetype": ("issuetype", lambda f: _name(f.get("issuetype"))),
+    "project": ("project", lambda f: (f.get("project") or {}).get("key")),
+    "labels": ("labels", lambda f: f.get("labels") or []),
+    "components": ("components", lambda f: [c.get("name") for c in f.get("components") or []]),
+    "created": ("created", lambda f: f.get("created")),
+    "updated": ("updated", lambda f: f.get("updated")),
+    "duedate": ("duedate", lambda f: f.get("duedate")),
+}
+
+DEFAULT_COMPACT_FIELDS = ["summary", "status", "priority", "assignee", "updated"]
+
+def parse_fields_param(value):
+    """Turn the ?fields= query value into a list of compact keys, or None
+
+    None means "no projection" (full Jira issues). "compact" selects the
+    default set; otherwise a comma-separated list of PROJECTIONS keys.
+    Raises ValueError for unknown keys.
+    """
+    if not value or value == "all":
+        return None
+    if value == "compact":
+        return list(DEFAULT_COMPACT_FIELDS)
+    fields = [f.strip() for f in value.split(",") if f.strip()]
+    unknown = [f for f in fields if f not in PROJECTIONS and f not in ("key", "id")]
+    if unknown:
+        raise ValueError(f"Unknown fields: {', '.join(unknown)}. Allowed: {', '.join(sorted(PROJECTIONS))}")
+    return [f for f in fields if f not in ("key", "id")]
+
+def upstream_params(fields):
+    """Search query params that make Jira return only what the projection needs"""
+    if fields is None:
+        return {}
+    return {
+        "fields": ",".join(PROJECTIONS[f][0] for f in fields) or "summary",
+        "expand": "",
+    }
+
+def compact_issue(issue, fields):
+    """Map a full Jira issue to a flat record with only the requested keys"""
+    source = issue.get("fields") or {}
+    record = {"id": issue.get("id"), "key": issue.get("key")}
+    for field in fields:
+        record[field] = PROJECTIONS[field][1](source)
+    return record
+
+def project_issues(issues, fields):
+    if fields is None:
+        return issues
+    return [compact_issue(issue, fields) for issue in issues]
@@ -0,0 +1,88 @@
+# coding=utf-8
+"""Reusable atlassian.jira.Jira clients and a project-list cache"""
+
+import os
+import threading
+from collections import OrderedDict
+from atlassian.jira import Jira
+from jira_client import ATLASSIAN_API, token_hash
+from singleflight import SingleFlight
+from ttl_cache import TTLCache
+
+CLIENT_REGISTRY_SIZE = int(os.getenv("JIRA_CLIENT_REGISTRY_SIZE", "64"))
+PROJECTS_CACHE_TTL = float(os.getenv("JIRA_PROJECTS_TTL", "900"))
+
+class JiraClientRegistry:
+    """One Jira client (and its HTTP session) per (token, cloud_id), LRU-evicted"""
+
+    def __init__(self, client_id, maxsize=CLIENT_REGISTRY_SIZE):
+        self.client_id = client_id
+        self.maxsize = maxsize
+        self._clients = OrderedDict()
+        self._lock = threading.Lock()
+        self.created = 0
+        self.reused = 0
+        self.evicted = 0
+
+    def get(self, access_token, cloud_id):
+        key = (token_hash(access_token), cloud_id)
+        with self._lock:
+            client = self._clients.get(key)
+            if client is not None:
+                self._clients.move_to_end(key)
+                self.reused += 1
+                return client
+
+            oauth2_dict = {
+                "client_id": self.client_id,
+                "token": {
+                    "access_token": access_token,
+                    "token_type": "Bearer",
+                },
+            }
+            client = Jira(url=f"{ATLASSIAN_API}/ex/jira/{cloud_id}", oauth2=oauth2_dict)
+            self._clients[key] = client
+            self.created += 1
+            while len(self._clients) > self.maxsize:
+                _, evicted = self._clients.popitem(last=False)
+                self.evicted += 1
+                evicted.close()
+            return client
+
+    def discard(self, access_token, cloud_id):
+        """Drop a client, e.g. after its token was rejected"""
+        with self._lock:
+            client = self._clients.pop((token_hash(access_token), cloud_id), None)
+        if client is not None:
+            client.close()
+
+    def stats(self):
+        with self._lock:
+            return {
+                "size": len(self._clients),
+                "maxsize": self.maxsize,
+                "created": self.created,
+                "reused": self.reused,
+                "evicted": self.evicted,
+            }
+
+projects_cache = TTLCache(maxsize=512, ttl=PROJECTS_CACHE_TTL)
+_projects_inflight = SingleFlight()
+
+def get_project_list(registry, access_token, cloud_id):
+    """Projects visible to the token on a site, cached per (token, cloud_id)"""
+    key = (token_hash(access_token), cloud_id)
+    projects = projects_cache.get(key)
+    if projects is not None:
+        return projects
+    return _projects_inflight.do(("projects",) + key, _fetch_projects, registry, access_token, cloud_id, key)
+
+def _fetch_projects(registry, access_token, cloud_id, key):
+    try:
+        projects = registry.get(access_token, cloud_id).projects() or []
+    except Exception:
+        # A rejected token or broken session should not stay in the registry
+        registry.discard(access_token, cloud_id)
+        raise
+    projects_cache.set(key, projects)
+    return projects
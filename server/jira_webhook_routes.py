@@ -0,0 +1,134 @@
+# coding=utf-8
+import hashlib
+import hmac
+import os
+from flask import Response, request, jsonify, stream_with_context
+from event_stream import format_sse, parse_last_event_id
+from jira_client import get_accessible_resources
+
+ISSUE_EVENTS = {
+    "jira:issue_created": "issue_created",
+    "jira:issue_updated": "issue_updated",
+    "jira:issue_deleted": "issue_deleted",
+}
+
+def webhook_secret():
+    """Same secret as configured on the Jira webhook; read per request, so .env and later changes apply"""
+    return os.getenv("JIRA_WEBHOOK_SECRET")
+
+def valid_signature(body, header, secret):
+    """Check Jira's X-Hub-Signature (sha256=<hex HMAC of the raw body>)"""
+    if not header or "=" not in header:
+        return False
+    method, _, signature = header.partition("=")
+    if method != "sha256":
+        return False
+    expected = hmac.new(secret.encode("utf-8"), body, hashlib.sha256).hexdigest()
+    return hmac.compare_digest(expected, signature)
+
+def bearer_token():
+    auth_header = request.headers.get('Authorization')
+    if auth_header and auth_header.startswith('Bearer '):
+        return auth_header.split(' ')[1]
+    return None
+
+def setup_jira_webhook_routes(app, issue_store, hub, tickets, on_change=None):
+    """Add the Jira webhook receiver and the dashboard SSE stream to the Flask app
+
+    Webhook events are applied to issue_store (if enabled), then published on
+    the hub topic for their cloud_id as {'key'} only, never the issue body. on_change(cloud_id) lets the caller drop
+    other caches that the event makes stale. tickets (StreamTickets) grants
+    EventSource access to a site's stream.
+    """
+
+    @app.route('/api/jira/webhook', methods=['POST'])
+    def jira_webhook():
+        try:
+            secret = webhook_secret()
+            if not secret:
+                # Unsigned events would go straight into the store and to every dashboard
+                return jsonify({
+                    'success': False,
+                    'error': 'Webhook receiver disabled: JIRA_WEBHOOK_SECRET is not set',
+                }), 503
+            body = request.get_data()
+            if not valid_signature(body, request.headers.get('X-Hub-Signature'), secret):
+                return jsonify({'success': False, 'error': 'Invalid webhook signature'}), 401
+
+            cloud_id = request.args.get('cloud_id')
+            if not cloud_id:
+                return jsonify({'success': False, 'error': 'cloud_id query parameter is required'}), 400
+
+            payload = request.get_json(silent=True)
+            if not payload:
+                return jsonify({'success': False, 'error': 'JSON payload is required'}), 400
+
+            event_type = ISSUE_EVENTS.get(payload.get('webhookEvent'))
+            issue = payload.get('issue') or {}
+            if event_type is None or not issue.get('key'):
+                return jsonify({'success': True, 'ignored': True}), 202
+
+            if issue_store is not None:
+                if event_type == 'issue_deleted':
+                    issue_store.delete_issue(cloud_id, issue['key'])
+                else:
+                    issue_store.upsert_issues(cloud_id, [issue])
+
+            if on_change is not None:
+                on_change(cloud_id)
+            # Only the key goes out: every dashboard on the site listens here, and each one
+            # re-reads the issue through its own token (and the store's per-user visibility)
+            event_id = hub.publish(cloud_id, event_type, {'key': issue['key']})
+            return jsonify({'success': True, 'event': event_type, 'event_id': event_id})
+
+        except Exception as e:
+            return jsonify({'success': False, 'error': f'Webhook error: {str(e)}'}), 500
+
+    @app.route('/api/jira/<cloud_id>/events/ticket', methods=['POST'])
+    def jira_events_ticket(cloud_id):
+        """Exchange the bearer token for a short-lived ticket to /api/jira/<cloud_id>/events"""
+        try:
+            token = bearer_token()
+            if not token:
+                return jsonify({'error': 'Bearer token is required'}), 401
+            if not any(resource.get('id') == cloud_id for resource in get_accessible_resources(token)):
+                return jsonify({'error': 'No access to this Jira site'}), 403
+            return jsonify({'ticket': tickets.issue(('jira', cloud_id)), 'expires_in': int(tickets.ttl)})
+        except Exception as e:
+            return jsonify({'error': str(e)}), 500
+
+    @app.route('/api/jira/<cloud_id>/events', methods=['GET'])
+    def jira_events(cloud_id):
+        """SSE stream of issue deltas for a site
+
+        EventSource cannot send headers, so browsers pass ?ticket= from
+        POST /api/jira/<cloud_id>/events/ticket; other clients may send the
+        bearer token instead.
+        """
+        try:
+            if not tickets.check(request.args.get('ticket'), ('jira', cloud_id)):
+                token = bearer_token()
+                if not token:
+                    return jsonify({'error': 'A stream ticket or bearer token is required'}), 401
+                if not any(resource.get('id') == cloud_id for resource in get_accessible_resources(token)):
+                    return jsonify({'error': 'No access to this Jira site'}), 403
+
+            last_event_id = parse_last_event_id(
+                request.headers.get('Last-Event-ID') or request.args.get('lastEventId')
+            )
+
+            hub.open(cloud_id)  # A site's topic lives for the process; its first webhook may not have come yet
+
+            def generate():
+                for event_id, event_type, data in hub.subscribe(cloud_id, last_event_id):
+                    yield format_sse(event_id, event_type, data)
+
+            return Response(
+                stream_with_context(generate()),
+                mimetype='text/event-stream',
+                headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'},
+            )
+        except Exception as e:
+            return jsonify({'error': str(e)}), 500
+
+    return app
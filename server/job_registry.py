@@ -0,0 +1,234 @@
+# coding=utf-8
+"""Bounded, thread-safe registry of background jobs (builds, deploys) with optional persistence"""
+
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+TERMINAL_STATES = ('completed', 'failed', 'cancelled')
+LOG_MAX_LINES = int(os.getenv("JOB_LOG_MAX_LINES", "500"))  # Oldest log lines are dropped beyond this
+LOG_FLUSH_SECONDS = float(os.getenv("JOB_LOG_FLUSH_SECONDS", "2"))  # Most often a job is rewritten for its log alone
+
+class JobRecord:
+    """Compact job record; __slots__ keeps per-job memory small and fixed"""
+
+    __slots__ = ('job_id', 'kind', 'status', 'progress', 'message', 'error',
+                 'priority', 'created_at', 'started_at', 'finished_at', 'meta', 'log', 'log_offset')
+
+    FIELDS = __slots__
+
+    def __init__(self, job_id, kind, status='queued', progress=0, message=None, error=None,
+                 priority=None, created_at=None, started_at=None, finished_at=None, meta=None,
+                 log=None, log_offset=0):
+        self.job_id = job_id
+        self.kind = kind
+        self.status = status
+        self.progress = progress
+        self.message = message
+        self.error = error
+        self.priority = priority
+        self.created_at = created_at or time.time()
+        self.started_at = started_at
+        self.finished_at = finished_at
+        self.meta = meta
+        self.log = log  # [[timestamp, line], ...]; kept out of to_dict()
+        self.log_offset = log_offset  # Index of log[0] after old lines were dropped
+
+    @property
+    def finished(self):
+        return self.status in TERMINAL_STATES
+
+    def apply(self, changes):
+        for name, value in changes.items():
+            if name == 'meta' and value is not None:
+                self.meta = {**(self.meta or {}), **value}
+            elif name in self.FIELDS:
+                setattr(self, name, value)
+            else:
+                raise AttributeError(f'Unknown job field: {name}')
+        if self.finished and self.finished_at is None:
+            self.finished_at = time.time()
+
+    def to_dict(self, meta=True):
+        """Snapshot in the shape the API has always returned for build statuses
+
+        meta=False leaves out the meta fields (change lists, traces...), for
+        status events that should stay small.
+        """
+        data = {'job_id': self.job_id, 'kind': self.kind, 'status': self.status, 'progress': self.progress}
+        for name in ('message', 'error', 'priority', 'created_at', 'started_at'):
+            value = getattr(self, name)
+            if value is not None:
+                data[name] = value
+        if self.finished_at is not None:
+            data[f'{self.status}_at'] = self.finished_at
+        if meta and self.meta:
+            data.update(self.meta)
+        return data
+
+    def append_log(self, line, max_lines=LOG_MAX_LINES):
+        """Add a log line; returns its index, which stays stable as old lines are dropped"""
+        if self.log is None:
+            self.log = []
+        self.log.append([time.time(), line])
+        overflow = len(self.log) - max_lines
+        if overflow > 0:
+            del self.log[:overflow]
+            self.log_offset += overflow
+        return self.log_offset + len(self.log) - 1
+
+    def to_row(self):
+        return {name: getattr(self, name) for name in self.FIELDS}
+
+class JobRegistry:
+    """Active jobs are always kept; finished ones are evicted by TTL and LRU
+
+    With a path, every change is written through to SQLite and jobs are
+    reloaded on start; jobs that were still running when the process died
+    come back as failed. Log lines alone are written at most every
+    log_flush seconds per job (and with the next status change), since
+    each write stores the whole record.
+    """
+
+    def __init__(self, max_finished=500, finished_ttl=3600, path=None, log_flush=LOG_FLUSH_SECONDS):
+        self.max_finished = max_finished
+        self.finished_ttl = finished_ttl
+        self.log_flush = log_flush
+        self._saved_at = {}  # job_id -> monotonic time of its last write
+        self._active = {}
+        self._finished = OrderedDict()  # job_id -> JobRecord, oldest first
+        self._lock = threading.RLock()
+        self.evicted = 0
+        self._db = None
+        if path:
+            self._db = sqlite3.connect(path, check_same_thread=False)
+            self._db.execute('PRAGMA journal_mode=WAL')
+            self._db.execute(
+                'CREATE TABLE IF NOT EXISTS jobs (job_id TEXT PRIMARY KEY, kind TEXT, status TEXT, '
+                'updated_at REAL, data TEXT NOT NULL)'
+            )
+            self._load()
+
+    def _load(self):
+        rows = self._db.execute('SELECT data FROM jobs ORDER BY updated_at').fetchall()
+        for (data,) in rows:
+            job = JobRecord(**json.loads(data))
+            if not job.finished:
+                job.apply({'status': 'failed', 'error': 'Interrupted by server restart'})
+                self._save(job)
+            self._finished[job.job_id] = job
+        self._prune()
+
+    def _save(self, job):
+        if self._db is None:
+            return
+        self._saved_at[job.job_id] = time.monotonic()
+        with self._db:
+            self._db.execute(
+                'INSERT OR REPLACE INTO jobs (job_id, kind, status, updated_at, data) VALUES (?, ?, ?, ?, ?)',
+                (job.job_id, job.kind, job.status, time.time(), json.dumps(job.to_row())),
+            )
+
+    def _forget(self, job_ids):
+        for job_id in job_ids:
+            self._saved_at.pop(job_id, None)
+        if self._db is not None and job_ids:
+            with self._db:
+                self._db.executemany('DELETE FROM jobs WHERE job_id = ?', [(job_id,) for job_id in job_ids])
+
+    def _prune(self):
+        """Drop finished jobs past their TTL or beyond max_finished (caller holds the lock)"""
+        cutoff = time.time() - self.finished_ttl
+        dropped = []
+        while self._finished:
+            job_id, job = next(iter(self._finished.items()))
+            if len(self._finished) <= self.max_finished and job.finished_at > cutoff:
+                break
+            del self._finished[job_id]
+            dropped.append(job_id)
+        self.evicted += len(dropped)
+        self._forget(dropped)
+
+    def create(self, job_id, kind, **fields):
+        """Register a job (replacing any earlier job with the same id); returns its snapshot"""
+        with self._lock:
+            self._finished.pop(job_id, None)
+            job = JobRecord(job_id, kind)
+            job.apply(fields)
+            self._store(job)
+            return job.to_dict()
+
+    def update(self, job_id, **fields):
+        """Apply changes to a job; raises KeyError for unknown ids"""
+        with self._lock:
+            job = self._active.get(job_id) or self._finished.get(job_id)
+            if job is None:
+                raise KeyError(job_id)
+            job.apply(fields)
+            self._store(job)
+            return job.to_dict()
+
+    def _store(self, job):
+        if job.finished:
+            self._active.pop(job.job_id, None)
+            self._finished[job.job_id] = job
+            self._finished.move_to_end(job.job_id)
+        else:
+            self._active[job.job_id] = job
+        self._save(job)
+        self._prune()
+
+    def append_log(self, job_id, line):
+        """Add a line to a job's log; returns its index (KeyError for unknown ids)"""
+        with self._lock:
+            job = self._active.get(job_id) or self._finished.get(job_id)
+            if job is None:
+                raise KeyError(job_id)
+            index = job.append_log(line)
+            if time.monotonic() - self._saved_at.get(job_id, float('-inf')) >= self.log_flush:
+                self._save(job)
+            return index
+
+    def get_log(self, job_id, since=0):
+        """Log lines from index since on as {index, time, line} dicts, or None for unknown ids"""
+        with self._lock:
+            job = self._active.get(job_id) or self._finished.get(job_id)
+            if job is None:
+                return None
+            start = max(since - job.log_offset, 0)
+            return [
+                {'index': job.log_offset + start + i, 'time': ts, 'line': line}
+                for i, (ts, line) in enumerate((job.log or [])[start:])
+            ]
+
+    def get(self, job_id, meta=True):
+        with self._lock:
+            job = self._active.get(job_id) or self._finished.get(job_id)
+            return job.to_dict(meta) if job is not None else None
+
+    def list(self, kind=None, status=None, limit=100):
+        """Newest first, optionally filtered by kind and/or status"""
+        with self._lock:
+            self._prune()
+            jobs = list(self._active.values()) + list(self._finished.values())
+        jobs = [job for job in jobs if (kind is None or job.kind == kind) and (status is None or job.status == status)]
+        jobs.sort(key=lambda job: job.created_at, reverse=True)
+        return [job.to_dict() for job in jobs[:limit]]
+
+    def stats(self):
+        with self._lock:
+            counts = {}
+            for job in list(self._active.values()) + list(self._finished.values()):
+                counts[job.status] = counts.get(job.status, 0) + 1
+            return {
+                'active': len(self._active),
+                'finished': len(self._finished),
+                'max_finished': self.max_finished,
+                'finished_ttl': self.finished_ttl,
+                'evicted': self.evicted,
+                'by_status': counts,
+                'persistent': self._db is not None,
+            }
@@ -0,0 +1,144 @@
+# coding=utf-8
+"""Client-side rate limiting for Atlassian calls: token buckets plus 429/Retry-After handling"""
+
+import email.utils
+import os
+import random
+import re
+import threading
+import time
+from collections import OrderedDict
+
+SITE_RATE = float(os.getenv("ATLASSIAN_SITE_RATE", "10"))  # Requests/second per cloud_id
+SITE_BURST = float(os.getenv("ATLASSIAN_SITE_BURST", "20"))
+TOKEN_RATE = float(os.getenv("ATLASSIAN_TOKEN_RATE", "5"))  # Requests/second per access token
+TOKEN_BURST = float(os.getenv("ATLASSIAN_TOKEN_BURST", "10"))
+RATE_LIMIT_RETRIES = int(os.getenv("ATLASSIAN_429_RETRIES", "3"))
+BACKOFF_BASE = float(os.getenv("ATLASSIAN_429_BACKOFF", "1"))  # Seconds, doubled per attempt
+BACKOFF_MAX = float(os.getenv("ATLASSIAN_429_BACKOFF_MAX", "60"))
+MAX_BUCKETS = 4096
+
+_SITE_PATH = re.compile(r"/ex/jira/([^/]+)/")
+
+class TokenBucket:
+    """Token bucket that hands out reservations instead of blocking
+
+    reserve() always takes a token, letting the balance go negative, and
+    returns how long the caller must wait before using it. That works for
+    threads (time.sleep) and coroutines (asyncio.sleep) alike.
+    """
+
+    def __init__(self, rate, capacity):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated = time.monotonic()
+        self.blocked_until = 0.0
+        self.throttled = 0  # Reservations that had to wait
+        self.rejected = 0  # 429 responses seen for this bucket
+        self.waited = 0.0
+
+    def _refill(self, now):
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def reserve(self, now):
+        self._refill(now)
+        self.tokens -= 1
+        # Debt is paid off after any 429 block, so blocked callers are released one by one
+        delay = max(0.0, self.blocked_until - now) + max(0.0, -self.tokens) / self.rate
+        if delay > 0:
+            self.throttled += 1
+            self.waited += delay
+        return delay
+
+    def block(self, now, seconds):
+        """Hold every reservation back for `seconds` (after a 429)"""
+        self.rejected += 1
+        self.blocked_until = max(self.blocked_until, now + seconds)
+        self.tokens = min(self.tokens, 0)
+
+    def snapshot(self, now):
+        self._refill(now)
+        return {
+            "budget": round(self.tokens, 2),
+            "capacity": self.capacity,
+            "rate": self.rate,
+            "blocked_for": round(max(0.0, self.blocked_until - now), 3),
+            "throttled": self.throttled,
+            "rejected": self.rejected,
+            "waited_seconds": round(self.waited, 3),
+        }
+
+class RateLimiter:
+    """Per-site and per-token buckets, LRU-bounded"""
+
+    def __init__(self):
+        self._buckets = OrderedDict()
+        self._lock = threading.Lock()
+        self.retries = 0
+
+    def keys_for(self, path, token_key):
+        keys = [("token", token_key)]
+        match = _SITE_PATH.search(path)
+        if match:
+            keys.append(("site", match.group(1)))
+        return keys
+
+    def _bucket(self, key):
+        bucket = self._buckets.get(key)
+        if bucket is None:
+            rate, burst = (SITE_RATE, SITE_BURST) if key[0] == "site" else (TOKEN_RATE, TOKEN_BURST)
+            bucket = self._buckets[key] = TokenBucket(rate, burst)
+            while len(self._buckets) > MAX_BUCKETS:
+                self._buckets.popitem(last=False)
+        else:
+            self._buckets.move_to_end(key)
+        return bucket
+
+    def reserve(self, keys):
+        """Take a token from every bucket; returns seconds to wait before sending"""
+        now = time.monotonic()
+        with self._lock:
+            return max(self._bucket(key).reserve(now) for key in keys)
+
+    def on_throttled(self, keys, retry_after, attempt):
+        """Record a 429 and block the buckets for Retry-After (or backoff) plus jitter"""
+        delay = retry_after_seconds(retry_after)
+        if delay is None:
+            delay = BACKOFF_BASE * (2 ** attempt)
+        delay = min(BACKOFF_MAX, delay)
+        delay *= 1 + random.uniform(0, 0.25)  # Jitter so waiting callers don't retry in lockstep
+        now = time.monotonic()
+        with self._lock:
+            self.retries += 1
+            for key in keys:
+                self._bucket(key).block(now, delay)
+        return delay
+
+    def stats(self):
+        now = time.monotonic()
+        with self._lock:
+            buckets = {
+                f"{kind}:{name[:12]}": bucket.snapshot(now)
+                for (kind, name), bucket in self._buckets.items()
+            }
+            return {
+                "buckets": buckets,
+                "throttled": sum(b["throttled"] for b in buckets.values()),
+                "rejected": sum(b["rejected"] for b in buckets.values()),
+                "retries": self.retries,
+            }
+
+def retry_after_seconds(value):
+    """Parse a Retry-After header (delta-seconds or HTTP date); None if absent/invalid"""
+    if not value:
+        return None
+    value = value.strip()
+    if value.isdigit():
+        return float(value)
+    try:
+        when = email.utils.parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    return max(0.0, when.timestamp() - time.time())
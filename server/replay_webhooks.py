@@ -0,0 +1,96 @@
+"""Replay Jira webhook events against a local server
+
+Usage:
+    python replay_webhooks.py events.ndjson --cloud-id <id>
+    python replay_webhooks.py --sample 20 --cloud-id <id> --delay 0.5
+
+The input file holds one Jira webhook payload per line (NDJSON) or a JSON
+array of payloads. --sample generates synthetic create/update/delete events
+instead. Payloads are signed with JIRA_WEBHOOK_SECRET (from the environment
+or .env); the server refuses events when it has no secret configured.
+"""
+
+import argparse
+import hashlib
+import hmac
+import json
+import os
+import random
+import time
+import requests
+from dotenv import load_dotenv
+
+def load_events(path):
+    with open(path) as f:
+        text = f.read().strip()
+    if text.startswith('['):
+        return json.loads(text)
+    return [json.loads(line) for line in text.splitlines() if line.strip()]
+
+def sample_events(count, project='DEMO'):
+    """Synthetic events: create issues, update some, delete a few"""
+    events = []
+    keys = []
+    statuses = ['To Do', 'In Progress', 'Done']
+    for i in range(count):
+        now = time.strftime('%Y-%m-%dT%H:%M:%S.000+0000', time.gmtime())
+        if not keys or random.random() < 0.4:
+            key = f'{project}-{1000 + len(keys)}'
+            keys.append(key)
+            event = 'jira:issue_created'
+        elif random.random() < 0.15:
+            key = keys.pop(random.randrange(len(keys)))
+            event = 'jira:issue_deleted'
+        else:
+            key = random.choice(keys)
+            event = 'jira:issue_updated'
+        events.append({
+            'webhookEvent': event,
+            'timestamp': int(time.time() * 1000),
+            'issue': {
+                'id': key.split('-')[1],
+                'key': key,
+                'fields': {
+                    'summary': f'Replayed issue {key}',
+                    'status': {'name': random.choice(statuses)},
+                    'priority': {'name': random.choice(['High', 'Medium', 'Low'])},
+                    'issuetype': {'name': 'Task'},
+                    'assignee': None,
+                    'updated': now,
+                },
+            },
+        })
+    return events
+
+def replay(events, url, cloud_id, delay=0.0, secret=None):
+    session = requests.Session()
+    for event in events:
+        body = json.dumps(event).encode('utf-8')
+        headers = {'Content-Type': 'application/json'}
+        if secret:
+            signature = hmac.new(secret.encode('utf-8'), body, hashlib.sha256).hexdigest()
+            headers['X-Hub-Signature'] = f'sha256={signature}'
+        response = session.post(url, params={'cloud_id': cloud_id}, data=body, headers=headers, timeout=10)
+        key = (event.get('issue') or {}).get('key')
+        print(f"{response.status_code} {event.get('webhookEvent')} {key}")
+        if delay:
+            time.sleep(delay)
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='Replay Jira webhook events against a local server')
+    parser.add_argument('file', nargs='?', help='NDJSON or JSON array of webhook payloads')
+    parser.add_argument('--sample', type=int, default=0, help='Generate N synthetic events instead of reading a file')
+    parser.add_argument('--cloud-id', required=True)
+    parser.add_argument('--url', default='http://localhost:3000/api/jira/webhook')
+    parser.add_argument('--delay', type=float, default=0.0, help='Seconds between events')
+    args = parser.parse_args()
+
+    if args.file:
+        events = load_events(args.file)
+    elif args.sample:
+        events = sample_events(args.sample)
+    else:
+        parser.error('Provide an events file or --sample N')
+
+    load_dotenv()
+    replay(events, args.url, args.cloud_id, args.delay, os.getenv('JIRA_WEBHOOK_SECRET'))
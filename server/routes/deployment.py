@@ -3,6 +3,8 @@ import subprocess
 import requests
 import json
 import time
+# Run from server/ (python -m routes.deployment) so deploy_readiness is importable, like the other routes
+from deploy_readiness import wait_for_github_repo, wait_for_github_ref, wait_for_vercel_project
 
 # Tokens and Config
 GITHUB_TOKEN = ''
@@ -11,6 +13,7 @@ REPO_NAME = 'york'
 LOCAL_DIR = r'C:\Users\91878\Desktop\check'  # Local root folder
 FOLDER_TO_COMMIT = 'NEW'
 GITHUB_API = 'https://api.github.com'
+VERCEL_API = 'https://api.vercel.com'
 VERCEL_TOKEN = ''  # Replace with your actual Vercel token
 
 # Step 1: Create GitHub repo
@@ -53,17 +56,16 @@ def commit_folder():
     subprocess.run(['git', 'remote', 'add', 'origin', remote_url])
     subprocess.run(['git', 'push', '-f', '-u', 'origin', 'main'])
     print('[✔] Folder committed and pushed to GitHub')
+    return subprocess.run(['git', 'rev-parse', 'HEAD'], capture_output=True, text=True).stdout.strip()
 
 # Step 4: Trigger deploy on Vercel
-def deploy_to_vercel():
-    url = 'https://api.vercel.com/v9/projects'
+def deploy_to_vercel(project_name):
+    url = f'{VERCEL_API}/v9/projects'
     headers = {
         'Authorization': f'Bearer {VERCEL_TOKEN}',
         'Content-Type': 'application/json'
     }
 
-    project_name = f"{REPO_NAME.replace('_', '-')}-{int(time.time())}"
-
     payload = {
         "name": project_name,
         "gitRepository": {
@@ -84,13 +86,18 @@ def deploy_to_vercel():
 
 
 
-# Step 5: Run all steps
+# Step 5: Run all steps, waiting for each upstream state instead of sleeping
 def run():
+    timings = []
     create_github_repo()
-    time.sleep(2)
-    commit_folder()
-    time.sleep(5)
-    url = deploy_to_vercel()
+    timings.append(wait_for_github_repo(GITHUB_API, GITHUB_USERNAME, REPO_NAME, GITHUB_TOKEN))
+    sha = commit_folder()
+    timings.append(wait_for_github_ref(GITHUB_API, GITHUB_USERNAME, REPO_NAME, GITHUB_TOKEN, 'main', sha or None))
+    project_name = f"{REPO_NAME.replace('_', '-')}-{int(time.time())}"
+    url = deploy_to_vercel(project_name)
+    timings.append(wait_for_vercel_project(VERCEL_API, project_name, VERCEL_TOKEN)[1])
+    for timing in timings:
+        print(f"[✔] {timing['stage']}: {timing['seconds']}s, {timing['attempts']} checks")
     return url
 
 if __name__ == "__main__":
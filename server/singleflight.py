@@ -0,0 +1,94 @@
+# coding=utf-8
+"""Single-flight request coalescing: concurrent identical calls share one execution"""
+
+import asyncio
+import threading
+
+class _Call:
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+class SingleFlight:
+    """Run fn once per key at a time; callers arriving meanwhile wait and share the result
+
+    Keys are tuples whose first element names the endpoint, e.g.
+    ("profile", token_hash). Nothing is cached once the call completes.
+    """
+
+    def __init__(self):
+        self._calls = {}
+        self._lock = threading.Lock()
+        self._stats = {}  # endpoint -> {"executions": n, "coalesced": n}
+
+    def do(self, key, fn, *args, **kwargs):
+        endpoint = key[0] if isinstance(key, tuple) else key
+        with self._lock:
+            counters = self._stats.setdefault(endpoint, {"executions": 0, "coalesced": 0})
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = _Call()
+                self._calls[key] = call
+                counters["executions"] += 1
+            else:
+                counters["coalesced"] += 1
+
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result
+
+        try:
+            call.result = fn(*args, **kwargs)
+            return call.result
+        except Exception as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.done.set()
+
+    def stats(self):
+        with self._lock:
+            executions = sum(c["executions"] for c in self._stats.values())
+            coalesced = sum(c["coalesced"] for c in self._stats.values())
+            return {
+                "in_flight": len(self._calls),
+                "executions": executions,
+                "coalesced": coalesced,
+                "by_endpoint": {name: dict(c) for name, c in self._stats.items()},
+            }
+
+class AsyncSingleFlight:
+    """asyncio flavour of SingleFlight for coroutines running on one event loop"""
+
+    def __init__(self):
+        self._calls = {}
+        self._stats = {}
+
+    async def do(self, key, fn, *args, **kwargs):
+        endpoint = key[0] if isinstance(key, tuple) else key
+        counters = self._stats.setdefault(endpoint, {"executions": 0, "coalesced": 0})
+        future = self._calls.get(key)
+        if future is not None:
+            counters["coalesced"] += 1
+            # shield: one waiter being cancelled must not cancel the shared call
+            return await asyncio.shield(future)
+
+        counters["executions"] += 1
+        future = asyncio.ensure_future(fn(*args, **kwargs))
+        self._calls[key] = future
+        future.add_done_callback(lambda _: self._calls.pop(key, None))
+        return await asyncio.shield(future)
+
+    def stats(self):
+        return {
+            "in_flight": len(self._calls),
+            "executions": sum(c["executions"] for c in self._stats.values()),
+            "coalesced": sum(c["coalesced"] for c in self._stats.values()),
+            "by_endpoint": {name: dict(c) for name, c in self._stats.items()},
+        }
@@ -0,0 +1,24 @@
+import os
+import sys
+import tempfile
+import threading
+from http.server import ThreadingHTTPServer
+
+import pytest
+
+# The server modules import each other as top-level modules (python oauth.py runs from server/)
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# oauth.py reads its settings at import: keep route tests off the real issue store and deploy workspaces
+_state_dir = tempfile.mkdtemp(prefix='server-tests-')
+os.environ.setdefault('JIRA_STORE_PATH', os.path.join(_state_dir, 'jira_issues.db'))
+os.environ.setdefault('DEPLOY_WORKSPACE_DIR', os.path.join(_state_dir, 'deploy_workspaces'))
+
+@pytest.fixture
+def vercel_api():
+    """Base URL of an in-process Vercel stand-in (vercel_standin.py); its state is shared by all tests"""
+    import vercel_standin
+    server = ThreadingHTTPServer(('127.0.0.1', 0), vercel_standin.Handler)
+    threading.Thread(target=server.serve_forever, args=(0.05,), daemon=True).start()
+    yield f'http://127.0.0.1:{server.server_address[1]}'
+    server.shutdown()
@@ -0,0 +1,80 @@
+import asyncio
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import httpx
+import pytest
+
+import async_jira_client
+from async_jira_client import RetryTransport
+
+class Upstream(BaseHTTPRequestHandler):
+    """Answers the first `failures` requests with `status`, then 200"""
+    failures = 0
+    status = 503
+    seen = 0
+
+    def log_message(self, format, *args):
+        pass
+
+    def reply(self):
+        type(self).seen += 1
+        status = self.status if type(self).seen <= self.failures else 200
+        body = b'{"ok":true}' if status == 200 else b'{}'
+        self.send_response(status)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    do_GET = do_POST = reply
+
+@pytest.fixture
+def upstream(monkeypatch):
+    monkeypatch.setattr(async_jira_client, 'RETRY_BACKOFF', 0.0)
+    Upstream.seen = 0
+    server = ThreadingHTTPServer(('127.0.0.1', 0), Upstream)
+    threading.Thread(target=server.serve_forever, args=(0.05,), daemon=True).start()
+    yield f'http://127.0.0.1:{server.server_address[1]}'
+    server.shutdown()
+
+def request(url, method='GET'):
+    async def send():
+        async with httpx.AsyncClient(transport=RetryTransport()) as client:
+            return await client.request(method, url)
+    return asyncio.run(send())
+
+@pytest.mark.parametrize('status', [502, 503, 504])
+def test_gateway_errors_are_retried(upstream, status):
+    Upstream.status, Upstream.failures = status, 2
+    response = request(upstream)
+    assert response.status_code == 200 and Upstream.seen == 3
+
+def test_retries_stop_after_max_retries(upstream):
+    Upstream.status, Upstream.failures = 503, 100
+    assert request(upstream).status_code == 503
+    assert Upstream.seen == async_jira_client.MAX_RETRIES + 1
+
+def test_other_errors_and_non_idempotent_requests_are_not_retried(upstream):
+    Upstream.status, Upstream.failures = 500, 1
+    assert request(upstream).status_code == 500 and Upstream.seen == 1
+    Upstream.seen, Upstream.status = 0, 503
+    assert request(upstream, 'POST').status_code == 503 and Upstream.seen == 1
+
+def test_async_sync_waits_for_a_threaded_sync_of_the_same_scope(tmp_path, monkeypatch):
+    from issue_store import IssueStore
+    store = IssueStore(str(tmp_path / 'issues.db'))
+    calls = []
+
+    def sync_state(cloud_id, account_id):
+        calls.append(account_id)
+        return {'last_sync': 1e12, 'last_full_sync': 1e12}
+    monkeypatch.setattr(store, 'sync_state', sync_state)
+
+    async def run():
+        with store.sync_lock('cloud1', 'alice'):
+            task = asyncio.ensure_future(async_jira_client.sync_tasks(store, 'token', 'cloud1', 'alice'))
+            await asyncio.sleep(0.1)
+            assert calls == []  # Still waiting on the threaded holder
+        return await task
+    assert (asyncio.run(run()))['mode'] == 'fresh'
+    assert calls == ['alice'] and store._sync_locks == {}
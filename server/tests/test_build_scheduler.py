@@ -0,0 +1,120 @@
+import threading
+import time
+
+import pytest
+
+from build_scheduler import BuildScheduler, QueueFull
+
+class Recorder:
+    """run_fn that records starts and holds each job until it is released"""
+
+    def __init__(self):
+        self.started = []
+        self.release = {}
+        self.lock = threading.Lock()
+
+    def __call__(self, job_id, task_data, cancel_event):
+        with self.lock:
+            self.started.append(job_id)
+            release = self.release.setdefault(job_id, threading.Event())
+        while not release.wait(0.01):
+            if cancel_event.is_set():
+                return
+
+    def finish(self, job_id):
+        with self.lock:
+            self.release.setdefault(job_id, threading.Event()).set()
+
+def wait_until(predicate, timeout=5):
+    deadline = time.monotonic() + timeout
+    while not predicate():
+        if time.monotonic() > deadline:
+            raise AssertionError('condition not reached')
+        time.sleep(0.01)
+
+def test_cancelling_a_queued_job_drops_it_before_it_starts():
+    run = Recorder()
+    cancelled = []
+    scheduler = BuildScheduler(run, workers=1, on_cancelled=cancelled.append)
+    scheduler.submit('first', {})
+    wait_until(lambda: run.started == ['first'])
+    scheduler.submit('second', {})
+    scheduler.submit('third', {})
+
+    assert scheduler.position('third') == 2
+    assert scheduler.cancel('second') == 'queued'
+    assert cancelled == ['second']
+    assert scheduler.position('third') == 1
+    assert scheduler.cancel('second') is None
+
+    run.finish('first')
+    wait_until(lambda: run.started == ['first', 'third'])
+    run.finish('third')
+    wait_until(lambda: scheduler.stats()['finished'] == 2)
+    assert 'second' not in run.started
+
+def test_cancelling_a_running_job_sets_its_cancel_event():
+    run = Recorder()
+    scheduler = BuildScheduler(run, workers=1)
+    scheduler.submit('job', {})
+    wait_until(lambda: run.started == ['job'])
+    assert scheduler.cancel('job') == 'running'
+    wait_until(lambda: scheduler.stats()['finished'] == 1)
+
+def test_queued_jobs_start_in_priority_order():
+    run = Recorder()
+    scheduler = BuildScheduler(run, workers=1)
+    scheduler.submit('blocker', {})
+    wait_until(lambda: run.started == ['blocker'])
+    for job_id, priority in (('low', 'low'), ('medium', None), ('high', 'High')):
+        scheduler.submit(job_id, {'priority': priority})
+    for job_id in ('blocker', 'high', 'medium', 'low'):
+        run.finish(job_id)
+    wait_until(lambda: len(run.started) == 4)
+    assert run.started == ['blocker', 'high', 'medium', 'low']
+
+def test_submit_rejects_beyond_max_queue_and_duplicates():
+    run = Recorder()
+    scheduler = BuildScheduler(run, workers=1, max_queue=1)
+    scheduler.submit('running', {})
+    wait_until(lambda: run.started == ['running'])
+    scheduler.submit('queued', {})
+    with pytest.raises(QueueFull):
+        scheduler.submit('rejected', {})
+    with pytest.raises(ValueError):
+        scheduler.submit('queued', {})
+    assert scheduler.stats()['rejected'] == 1
+    run.finish('running')
+    run.finish('queued')
+
+def test_jobs_with_a_busy_key_stay_queued_without_holding_a_worker():
+    run = Recorder()
+    scheduler = BuildScheduler(run, workers=2)
+    scheduler.submit('a1', {}, key='site-a')
+    wait_until(lambda: run.started == ['a1'])
+    scheduler.submit('a2', {}, key='site-a')
+    scheduler.submit('b1', {}, key='site-b')
+
+    # The second worker skips a2 (its key is busy) and runs b1
+    wait_until(lambda: 'b1' in run.started)
+    assert 'a2' not in run.started
+    assert scheduler.is_busy('site-a') and scheduler.position('a2') == 1
+
+    run.finish('a1')
+    wait_until(lambda: 'a2' in run.started)
+    run.finish('a2')
+    run.finish('b1')
+    wait_until(lambda: scheduler.stats()['finished'] == 3)
+    assert scheduler.stats()['busy_keys'] == []
+
+def test_worker_threads_are_named_after_the_scheduler():
+    names = []
+    done = threading.Event()
+
+    def run(job_id, task_data, cancel_event):
+        names.append(threading.current_thread().name)
+        done.set()
+    scheduler = BuildScheduler(run, workers=1, name='deploy-worker')
+    scheduler.submit('d1', {})
+    assert done.wait(5)
+    assert names == ['deploy-worker-0']
@@ -0,0 +1,66 @@
+import pytest
+
+import oauth
+import vercel_standin
+from deploy_targets import DeployTarget, TargetRegistry
+
+@pytest.fixture
+def vercel(vercel_api, monkeypatch):
+    monkeypatch.setattr(oauth, 'VERCEL_API', vercel_api)
+    return vercel_standin
+
+@pytest.fixture
+def git_engine(tmp_path, monkeypatch):
+    """run_deployment with the git engine and GitHub stubbed out; returns the calls made to Vercel"""
+    registry = TargetRegistry(str(tmp_path / 'targets.json'))
+    calls = []
+    monkeypatch.setattr(oauth, 'DEPLOY_ENGINE', 'git')
+    monkeypatch.setattr(oauth, 'DEPLOY_WAIT_FOR_VERCEL', False)
+    monkeypatch.setattr(oauth, 'GITHUB_USERNAME', 'owner')
+    monkeypatch.setattr(oauth, 'deploy_target_registry', registry)
+    monkeypatch.setattr(oauth, 'commit_folder', lambda log, target: 'sha1')
+    monkeypatch.setattr(oauth, 'wait_for_github_ref', lambda *args, **kwargs: {'stage': 'github_ref_ready', 'seconds': 0})
+
+    def link(log, project_id, target):
+        calls.append(('link', project_id))
+        return project_id != 'prj_gone'
+
+    def trigger(log, target, project_id, sha):
+        calls.append(('trigger', project_id))
+        return {'id': f'dpl_{len(calls)}'}
+    monkeypatch.setattr(oauth, 'link_vercel_project', link)
+    monkeypatch.setattr(oauth, 'trigger_vercel_deployment', trigger)
+    monkeypatch.setattr(oauth, 'deploy_to_vercel', lambda log, name, target: f'https://{name}.vercel.app')
+    monkeypatch.setattr(oauth, 'wait_for_vercel_project',
+                        lambda api, name, token, **options: ({'id': 'prj_new'}, {'stage': 'vercel_project_ready', 'seconds': 0}))
+    target = DeployTarget('site', str(tmp_path), str(tmp_path))
+    registry.update(target.key, github_repo='owner/site')
+    return registry, target, calls
+
+def test_git_engine_links_a_project_the_files_engine_created(git_engine):
+    registry, target, calls = git_engine
+    registry.update(target.key, vercel_project_id='prj_1', vercel_project_name='site', vercel_engine='files')
+    assert oauth.run_deployment(log=lambda line: None, target=target) == 'https://site.vercel.app'
+    assert calls == [('link', 'prj_1'), ('trigger', 'prj_1')]
+    assert registry.get(target.key)['vercel_engine'] == 'git'
+
+    calls.clear()
+    oauth.run_deployment(log=lambda line: None, target=target)
+    assert calls == [('trigger', 'prj_1')]
+
+def test_git_engine_replaces_a_project_that_cannot_be_linked(git_engine):
+    registry, target, calls = git_engine
+    registry.update(target.key, vercel_project_id='prj_gone', vercel_project_name='site', vercel_engine='files')
+    oauth.run_deployment(log=lambda line: None, target=target)
+    assert calls == [('link', 'prj_gone'), ('link', 'prj_new'), ('trigger', 'prj_new')]
+    record = registry.get(target.key)
+    assert record['vercel_project_id'] == 'prj_new' and record['vercel_engine'] == 'git'
+
+def test_linking_turns_off_push_deployments(vercel, monkeypatch):
+    monkeypatch.setattr(oauth, 'GITHUB_USERNAME', 'owner')
+    project = vercel.Handler.project(None, 'linked-site')
+    target = DeployTarget('site', '/unused', '/unused')
+    assert oauth.link_vercel_project(lambda line: None, project['id'], target)
+    assert project['link'] == {'type': 'github', 'repo': 'owner/site'}
+    assert project['gitProviderOptions'] == {'createDeployments': 'disabled'}
+    assert not oauth.link_vercel_project(lambda line: None, 'prj_missing', target)
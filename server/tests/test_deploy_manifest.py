@@ -0,0 +1,83 @@
+import os
+import time
+
+import deploy_manifest
+from deploy_manifest import ManifestStore, diff_files, scan_changes, scan_tree
+
+def write(root, rel, content, age=60):
+    """Write a file with an mtime age seconds in the past"""
+    path = os.path.join(root, *rel.split('/'))
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, 'w') as f:
+        f.write(content)
+    mtime = time.time() - age
+    os.utime(path, (mtime, mtime))
+    return path
+
+def test_rescan_reuses_hashes_of_untouched_files(tmp_path):
+    root = str(tmp_path)
+    write(root, 'index.html', '<h1>hi</h1>')
+    write(root, 'assets/app.js', 'console.log(1)')
+    first = scan_tree(root)
+    assert first['hashed'] == 2
+
+    second = scan_tree(root, first)
+    assert second['hashed'] == 0
+    assert second['root'] == first['root']
+    assert second['files']['index.html']['sha'] == first['files']['index.html']['sha']
+
+def test_changed_files_are_rehashed_and_change_the_root(tmp_path):
+    root = str(tmp_path)
+    write(root, 'index.html', '<h1>hi</h1>')
+    write(root, 'assets/app.js', 'console.log(1)')
+    first = scan_tree(root)
+    write(root, 'assets/app.js', 'console.log(2)', age=30)
+
+    second = scan_tree(root, first)
+    assert second['hashed'] == 1
+    assert second['root'] != first['root']
+
+def test_files_modified_in_the_same_tick_as_the_scan_are_rehashed(tmp_path):
+    root = str(tmp_path)
+    path = write(root, 'index.html', '<h1>hi</h1>')
+    first = scan_tree(root)
+    # Same size and mtime as recorded, but the mtime is not older than the scan: it may have changed since
+    late = first['scanned_at_ns'] + 1
+    os.utime(path, ns=(late, late))
+    first['files']['index.html']['mtime_ns'] = late
+    assert scan_tree(root, first)['hashed'] == 1
+
+def test_skipped_directories_are_not_scanned(tmp_path):
+    root = str(tmp_path)
+    write(root, 'index.html', 'x')
+    write(root, 'node_modules/pkg/index.js', 'y')
+    write(root, '.git/HEAD', 'z')
+    assert list(scan_tree(root)['files']) == ['index.html']
+
+def test_large_files_are_hashed_through_mmap(tmp_path, monkeypatch):
+    root = str(tmp_path)
+    write(root, 'small.txt', 'abc')
+    plain = scan_tree(root)['files']['small.txt']['sha']
+    monkeypatch.setattr(deploy_manifest, 'MMAP_THRESHOLD', 1)
+    assert scan_tree(root)['files']['small.txt']['sha'] == plain
+
+def test_diff_files_summarises_added_modified_and_removed():
+    summary = diff_files({'a': '1', 'b': '2', 'c': '3'}, {'a': '1', 'b': '9', 'd': '4'})
+    assert (summary['added'], summary['modified'], summary['removed']) == (1, 1, 1)
+    assert summary['added_files'] == ['d'] and summary['modified_files'] == ['b'] and summary['removed_files'] == ['c']
+
+def test_store_reuses_the_persisted_scan_and_reports_the_deployed_tree(tmp_path):
+    root = str(tmp_path / 'site')
+    write(root, 'index.html', '<h1>hi</h1>')
+    store = ManifestStore(str(tmp_path / 'manifests'))
+
+    scan, deployed = store.scan('files-site', root)
+    assert scan['hashed'] == 1 and deployed is None
+    assert scan_changes(scan, deployed)['added'] == 1
+    store.mark_deployed('files-site', scan, deployed_url='https://site.vercel.app', job_id='d1')
+
+    # A new store (e.g. after a restart) reads the scan back from disk
+    scan, deployed = ManifestStore(str(tmp_path / 'manifests')).scan('files-site', root)
+    assert scan['hashed'] == 0
+    assert deployed['root'] == scan['root'] and deployed['deployed_url'] == 'https://site.vercel.app'
+    assert scan_changes(scan, deployed)['added'] == 0
@@ -0,0 +1,70 @@
+import threading
+
+import pytest
+
+import deploy_metrics
+from deploy_metrics import DeployTrace, Histogram, MetricsRegistry, bind, current_trace, traced_request
+
+@pytest.fixture
+def metrics(monkeypatch):
+    registry = MetricsRegistry()
+    monkeypatch.setattr(deploy_metrics, 'metrics', registry)
+    return registry
+
+def test_histogram_buckets_are_cumulative():
+    histogram = Histogram((1, 5))
+    for value in (0.5, 1, 3, 10):
+        histogram.observe(value)
+    snapshot = histogram.snapshot()
+    assert snapshot['buckets'] == {'1': 2, '5': 3, '+Inf': 4}
+    assert (snapshot['count'], snapshot['sum'], snapshot['min'], snapshot['max']) == (4, 14.5, 0.5, 10)
+
+def test_registry_snapshot_groups_by_name_then_label(metrics):
+    metrics.observe('deploy_stage_seconds', 'git_push', 0.2)
+    metrics.observe('deploy_stage_seconds', 'vercel_files', 3)
+    metrics.increment('deploy_jobs', 'completed')
+    metrics.increment('deploy_jobs', 'completed')
+    snapshot = metrics.snapshot()
+    assert sorted(snapshot['histograms']['deploy_stage_seconds']) == ['git_push', 'vercel_files']
+    assert snapshot['counters'] == {'deploy_jobs': {'completed': 2}}
+
+def test_trace_spans_feed_the_metrics(metrics):
+    trace = DeployTrace('git')
+    trace.add('git', 'push', 0.5, bytes=2048)
+    with pytest.raises(RuntimeError):
+        with trace.span('stage', 'git_push') as span:
+            span['files'] = 3
+            raise RuntimeError('push failed')
+    stage = trace.stages()[0]
+    assert stage['name'] == 'git_push' and stage['error'] == 'RuntimeError' and stage['files'] == 3
+    summary = trace.to_dict()
+    assert summary['engine'] == 'git' and summary['bytes_pushed'] == 2048 and len(summary['spans']) == 2
+    histograms = metrics.snapshot()['histograms']
+    assert histograms['deploy_git_bytes']['push']['count'] == 1
+    assert histograms['deploy_stage_seconds']['git_push']['count'] == 1
+
+def test_bind_is_per_thread():
+    trace = DeployTrace()
+    seen = []
+    with bind(trace):
+        thread = threading.Thread(target=lambda: seen.append(current_trace()))
+        thread.start()
+        thread.join()
+        assert current_trace() is trace
+    assert seen == [None] and current_trace() is None
+
+def test_traced_request_records_the_path_but_not_the_query(metrics, vercel_api):
+    trace = DeployTrace('files')
+    with bind(trace):
+        traced_request('vercel', 'GET', f'{vercel_api}/v2/user?token=secret')
+    span = trace.to_dict()['spans'][0]
+    assert span['name'] == 'GET /v2/user' and span['status_code'] == 200 and span['service'] == 'vercel'
+    counters = metrics.snapshot()['counters']['deploy_http_responses']
+    assert counters == {'vercel 200': 1}
+    assert 'secret' not in repr(metrics.snapshot())
+
+def test_metrics_endpoint():
+    import oauth
+    body = oauth.app.test_client().get('/api/deploy/metrics').json
+    assert body['success'] and {'histograms', 'counters'} <= set(body['metrics'])
+    assert body['scheduler']['workers'] == oauth.deploy_scheduler.workers
@@ -0,0 +1,71 @@
+import threading
+import time
+
+from deploy_probe import CachedProbe, probe_endpoint
+
+class Counter:
+    def __init__(self, fail=False):
+        self.calls = 0
+        self.fail = fail
+        self.release = threading.Event()
+        self.release.set()
+
+    def __call__(self):
+        self.release.wait(5)
+        self.calls += 1
+        if self.fail:
+            raise RuntimeError('boom')
+        return {'calls': self.calls}
+
+def wait_until(predicate, timeout=5):
+    deadline = time.monotonic() + timeout
+    while not predicate():
+        assert time.monotonic() < deadline
+        time.sleep(0.01)
+
+def test_fresh_results_come_from_memory():
+    probe_fn = Counter()
+    probe = CachedProbe(probe_fn, ttl=60)
+    first = probe.get()
+    assert first['calls'] == 1 and 'checked_at' in first
+    assert probe.get()['calls'] == 1 and probe_fn.calls == 1
+
+def test_stale_results_are_served_while_one_refresh_runs():
+    probe_fn = Counter()
+    probe = CachedProbe(probe_fn, ttl=0).start()
+    wait_until(lambda: probe.refreshes == 1)
+    probe_fn.release.clear()
+    assert [probe.get()['calls'] for _ in range(3)] == [1, 1, 1]
+    probe_fn.release.set()
+    wait_until(lambda: probe.refreshes == 2)
+    assert probe_fn.calls == 2
+
+def test_force_probes_again_synchronously():
+    probe_fn = Counter()
+    probe = CachedProbe(probe_fn, ttl=60)
+    probe.get()
+    assert probe.get(force=True)['calls'] == 2
+
+def test_a_slow_first_probe_answers_pending():
+    probe_fn = Counter()
+    probe_fn.release.clear()
+    probe = CachedProbe(probe_fn, ttl=60, first_wait=0.01)
+    assert probe.get() == {'pending': True}
+    probe_fn.release.set()
+
+def test_probe_failures_are_reported_not_raised():
+    probe = CachedProbe(Counter(fail=True), ttl=60)
+    assert probe.get()['error'] == 'boom' and probe.failures == 1
+
+def test_probe_endpoint(vercel_api):
+    assert probe_endpoint(f'{vercel_api}/v2/user')['authorized'] is True
+    missing = probe_endpoint(f'{vercel_api}/nowhere')
+    assert missing['reachable'] and not missing['authorized'] and missing['status_code'] == 404
+    assert probe_endpoint('http://127.0.0.1:9/', timeout=0.5)['reachable'] is False
+
+def test_status_route_answers_from_the_cached_probe():
+    import oauth
+    client = oauth.app.test_client()
+    status = client.get('/api/deploy/status').json['status']
+    assert 'ready_for_deployment' in status and 'age_seconds' in status
+    assert client.get('/api/deploy/status?refresh=1').json['status']['age_seconds'] < 1
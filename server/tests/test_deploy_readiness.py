@@ -0,0 +1,36 @@
+import pytest
+import requests
+
+import deploy_readiness
+from deploy_readiness import NotReady, wait_for_vercel_deployment
+
+def responses(monkeypatch, *states):
+    """Make each poll answer with the next readyState (None for a 404)"""
+    seen = []
+    pending = list(states)
+
+    def get(url, headers, params=None, service='GitHub'):
+        seen.append(url)
+        state = pending.pop(0) if len(pending) > 1 else pending[0]
+        response = requests.Response()
+        response.status_code = 404 if state is None else 200
+        response._content = b'{}' if state is None else f'{{"id": "dpl_1", "readyState": "{state}"}}'.encode()
+        return response
+    monkeypatch.setattr(deploy_readiness, '_get', get)
+    return seen
+
+def test_waits_for_the_given_deployment(monkeypatch):
+    seen = responses(monkeypatch, None, 'BUILDING', 'READY')
+    deployment, timing = wait_for_vercel_deployment('https://vercel.test', 'dpl_1', 'token', initial_delay=0)
+    assert deployment['readyState'] == 'READY' and timing['attempts'] == 3
+    assert set(seen) == {'https://vercel.test/v13/deployments/dpl_1'}
+
+def test_a_failed_deployment_raises_at_once(monkeypatch):
+    responses(monkeypatch, 'ERROR')
+    with pytest.raises(Exception, match='ended in ERROR'):
+        wait_for_vercel_deployment('https://vercel.test', 'dpl_1', 'token', initial_delay=0)
+
+def test_gives_up_after_the_timeout(monkeypatch):
+    responses(monkeypatch, 'BUILDING')
+    with pytest.raises(NotReady):
+        wait_for_vercel_deployment('https://vercel.test', 'dpl_1', 'token', timeout=0.05, initial_delay=0.01)
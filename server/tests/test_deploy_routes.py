@@ -0,0 +1,84 @@
+import threading
+import time
+
+import pytest
+
+import oauth
+from build_scheduler import BuildScheduler
+
+@pytest.fixture
+def release():
+    return threading.Event()
+
+@pytest.fixture
+def client(tmp_path, monkeypatch, release):
+    (tmp_path / 'web').mkdir()
+    (tmp_path / 'web' / 'index.html').write_text('<h1>hi</h1>')
+    monkeypatch.setattr(oauth, 'LOCAL_DIR', str(tmp_path))
+    monkeypatch.setattr(oauth, 'REPO_NAME', 'site')
+    monkeypatch.setattr(oauth, 'DEPLOY_TARGETS', {'site': 'web', 'missing': 'nowhere'})
+    monkeypatch.setattr(oauth, 'DEPLOY_ENGINE', 'files')
+    monkeypatch.setattr(oauth, 'VERCEL_TOKEN', 'token')
+
+    def run(job_id, data, cancel_event):
+        oauth.update_deploy_status(job_id, status='processing')
+        while not release.wait(0.01):
+            if cancel_event.is_set():
+                oauth.update_deploy_status(job_id, status='cancelled')
+                return
+        oauth.update_deploy_status(job_id, status='completed', meta={'deployed_url': 'https://site.vercel.app'})
+    monkeypatch.setattr(oauth, 'deploy_scheduler', BuildScheduler(run, workers=1, max_queue=1, name='deploy-worker'))
+    return oauth.app.test_client()
+
+def wait_for_status(client, job_id, status):
+    deadline = time.monotonic() + 5
+    while time.monotonic() < deadline:
+        current = client.get(f'/api/deploy/{job_id}/status').json['status']
+        if current['status'] == status:
+            return current
+        time.sleep(0.01)
+    raise AssertionError(f'{job_id} never reached {status}')
+
+def test_deploy_returns_a_job_id_at_once(client, release):
+    response = client.post('/api/deploy', json={'taskTitle': 'Ship it'})
+    assert response.status_code == 202
+    job_id = response.json['job_id']
+    assert response.json['changes']['added'] == 1
+    wait_for_status(client, job_id, 'processing')
+    assert job_id in [job['job_id'] for job in client.get('/api/deploy/jobs').json['deploys']]
+
+    release.set()
+    status = wait_for_status(client, job_id, 'completed')
+    assert status['deployed_url'] == 'https://site.vercel.app' and status['task_title'] == 'Ship it'
+    assert client.post(f'/api/deploy/{job_id}/cancel').status_code == 409
+
+def test_running_deploys_can_be_cancelled(client):
+    job_id = client.post('/api/deploy', json={}).json['job_id']
+    wait_for_status(client, job_id, 'processing')
+    response = client.post(f'/api/deploy/{job_id}/cancel')
+    assert response.status_code == 202 and response.json['cancelled_while'] == 'running'
+    wait_for_status(client, job_id, 'cancelled')
+
+def test_a_full_queue_answers_429_with_retry_after(client):
+    first = client.post('/api/deploy', json={}).json['job_id']
+    wait_for_status(client, first, 'processing')
+    assert client.post('/api/deploy', json={'force': True}).status_code == 202
+    response = client.post('/api/deploy', json={'force': True})
+    assert response.status_code == 429 and 'Retry-After' in response.headers
+
+@pytest.mark.parametrize('body, status', [
+    ({'repoName': 'elsewhere'}, 400),
+    ({'folder': '../etc'}, 400),
+    ({'repoName': 'missing'}, 404),
+])
+def test_deploy_only_takes_configured_targets(client, body, status):
+    assert client.post('/api/deploy', json=body).status_code == status
+
+def test_deploy_needs_credentials(client, monkeypatch):
+    monkeypatch.setattr(oauth, 'VERCEL_TOKEN', None)
+    assert client.post('/api/deploy', json={}).status_code == 400
+
+def test_unknown_jobs_are_404(client):
+    for path in ('status', 'log', 'events'):
+        assert client.get(f'/api/deploy/nope/{path}').status_code == 404
+    assert client.post('/api/deploy/nope/cancel').status_code == 404
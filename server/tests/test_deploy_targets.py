@@ -0,0 +1,84 @@
+import threading
+import time
+
+import pytest
+
+from deploy_readiness import DeployCancelled
+from deploy_targets import TargetLocks, TargetRegistry, parse_targets, resolve_target
+
+def test_targets_get_their_own_workspace_repo(tmp_path):
+    site = resolve_target(str(tmp_path), '/workspaces', 'my_site', 'web')
+    other = resolve_target(str(tmp_path), '/workspaces', 'other', 'web2')
+    assert site.folder_path == str(tmp_path / 'web') and site.git_dir == '/workspaces/my_site.git'
+    assert site.project_name == 'my-site' and other.git_dir != site.git_dir
+
+@pytest.mark.parametrize('repo_name, folder', [
+    ('../site', 'web'), ('', 'web'), ('site', '../outside'), ('site', '/etc'), ('site', ''),
+])
+def test_resolve_target_rejects_bad_input(tmp_path, repo_name, folder):
+    with pytest.raises(ValueError):
+        resolve_target(str(tmp_path), '/workspaces', repo_name, folder)
+
+def test_parse_targets():
+    assert parse_targets('site=web, other = web2 ,') == {'site': 'web', 'other': 'web2'}
+    assert parse_targets('', 'site', 'web') == {'site': 'web'}
+    assert parse_targets(None) == {}
+    with pytest.raises(ValueError):
+        parse_targets('site')
+    with pytest.raises(ValueError):
+        parse_targets('bad/name=web')
+
+def test_target_locks_serialize_one_target_only():
+    locks = TargetLocks()
+    held = locks.acquire('site')
+    assert locks.acquire('other').locked() and locks.busy() == ['other', 'site']
+    locks.get('other').release()
+
+    waited = []
+    acquired = threading.Event()
+
+    def second():
+        locks.acquire('site', on_wait=lambda: waited.append(True))
+        acquired.set()
+    threading.Thread(target=second, daemon=True).start()
+    time.sleep(0.05)
+    assert waited == [True] and not acquired.is_set()
+    held.release()
+    assert acquired.wait(5)
+
+def test_waiting_for_a_target_lock_can_be_cancelled():
+    locks = TargetLocks()
+    locks.acquire('site')
+    cancel = threading.Event()
+    cancel.set()
+    with pytest.raises(DeployCancelled):
+        locks.acquire('site', cancel_event=cancel)
+
+def test_registry_merges_and_persists_records(tmp_path):
+    path = str(tmp_path / 'state' / 'targets.json')
+    registry = TargetRegistry(path)
+    registry.update('site', github_repo='owner/site')
+    record = registry.update('site', vercel_project_id='prj_1')
+    assert record['github_repo'] == 'owner/site' and record['vercel_project_id'] == 'prj_1'
+    assert 'created_at' in record and record['updated_at'] >= record['created_at']
+    assert TargetRegistry(path).get('site') == record
+
+def test_registry_forgets_fields_or_whole_targets(tmp_path):
+    registry = TargetRegistry(str(tmp_path / 'targets.json'))
+    registry.update('site', vercel_project_id='prj_1', vercel_project_name='site', github_repo='owner/site')
+    registry.forget('site', 'vercel_project_id', 'vercel_project_name')
+    assert 'vercel_project_id' not in registry.get('site') and registry.get('site')['github_repo'] == 'owner/site'
+    registry.forget('site')
+    registry.forget('unknown')
+    assert registry.get('site') == {} and registry.all() == {}
+
+def test_registry_records_are_copies(tmp_path):
+    registry = TargetRegistry(str(tmp_path / 'targets.json'))
+    registry.update('site', github_repo='owner/site')
+    registry.get('site')['github_repo'] = 'changed'
+    assert registry.get('site')['github_repo'] == 'owner/site'
+
+def test_a_corrupt_registry_file_starts_empty(tmp_path):
+    path = tmp_path / 'targets.json'
+    path.write_text('{not json')
+    assert TargetRegistry(str(path)).all() == {}
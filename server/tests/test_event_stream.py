@@ -0,0 +1,76 @@
+import asyncio
+import threading
+
+from event_stream import EventHub, format_sse, parse_last_event_id
+
+def take(subscription, count):
+    return [next(subscription) for _ in range(count)]
+
+def test_subscriber_resumes_after_last_event_id():
+    hub = EventHub()
+    for i in range(3):
+        hub.publish('site', 'issue_updated', {'n': i})
+    events = take(hub.subscribe('site', last_event_id=1, heartbeat=0.01), 2)
+    assert [(event_id, data['n']) for event_id, _, data in events] == [(2, 1), (3, 2)]
+
+def test_expired_last_event_id_gets_a_reset(monkeypatch):
+    monkeypatch.setattr('event_stream.HISTORY_SIZE', 2)
+    hub = EventHub()
+    for i in range(5):
+        hub.publish('site', 'issue_updated', {'n': i})
+    assert next(hub.subscribe('site', last_event_id=1)) == (5, 'reset', {'reason': 'history_expired'})
+
+def test_idle_subscription_yields_heartbeats():
+    hub = EventHub()
+    hub.open('site')
+    assert next(hub.subscribe('site', heartbeat=0.01)) == (None, None, None)
+
+def test_close_ends_subscriptions_and_remembers_the_last_id():
+    hub = EventHub()
+    subscription = hub.subscribe('job', last_event_id=0, heartbeat=5)
+    hub.publish('job', 'status', {'status': 'completed'})
+    assert next(subscription)[0] == 1
+    hub.close('job')
+    assert list(subscription) == []
+    assert hub.last_id('job') == 1 and hub.last_id('unknown') == 0
+    assert hub.stats()['subscribers'] == 0
+
+def test_subscribing_never_creates_or_reopens_a_topic():
+    hub = EventHub()
+    hub.publish('job', 'status', {'status': 'completed'})
+    hub.close('job')
+    assert list(hub.subscribe('job', heartbeat=5)) == []
+    assert list(hub.subscribe('unknown', heartbeat=5)) == []
+
+    async def drain(name):
+        return [event async for event in hub.subscribe_async(name, heartbeat=5)]
+    assert asyncio.run(drain('job')) == [] and asyncio.run(drain('unknown')) == []
+    assert hub.stats()['topics'] == 0 and hub.last_id('job') == 1
+
+def test_async_subscriber_is_woken_by_a_publishing_thread():
+    hub = EventHub()
+    hub.open('site')
+
+    async def main():
+        received = []
+
+        async def listen():
+            async for event in hub.subscribe_async('site', heartbeat=5):
+                received.append(event)
+                if len(received) == 2:
+                    return
+
+        listener = asyncio.ensure_future(listen())
+        await asyncio.sleep(0.01)
+        threading.Thread(target=lambda: [hub.publish('site', 'issue_created', {'n': n}) for n in range(2)]).start()
+        await asyncio.wait_for(listener, 2)
+        return received
+
+    received = asyncio.run(main())
+    assert [event_id for event_id, _, _ in received] == [1, 2]
+    assert hub.stats()['subscribers'] == 0
+
+def test_format_sse_and_last_event_id_parsing():
+    assert format_sse(3, 'status', {'a': 1}, retry=1000) == 'retry: 1000\nid: 3\nevent: status\ndata: {"a":1}\n\n'
+    assert format_sse(None, None, None).startswith(': keep-alive')
+    assert [parse_last_event_id(v) for v in ('7', '', None, 'x')] == [7, None, None, None]
@@ -0,0 +1,76 @@
+import gzip
+import json
+import types
+
+import pytest
+from flask import Flask, jsonify
+
+import http_cache
+from http_cache import body_etag, choose_encoding, etag_matches, setup_conditional_responses
+
+ISSUES = [{'key': f'PROJ-{n}', 'summary': 'x' * 40} for n in range(100)]
+
+@pytest.fixture
+def client():
+    app = Flask(__name__)
+
+    @app.route('/api/jira/tasks')
+    def tasks():
+        return jsonify(ISSUES)
+
+    @app.route('/api/jira/small')
+    def small():
+        return jsonify(ok=True)
+
+    @app.route('/api/other')
+    def other():
+        return jsonify(ISSUES)
+
+    return setup_conditional_responses(app).test_client()
+
+def test_etag_is_weak_and_stable():
+    assert body_etag(b'abc') == body_etag(b'abc') != body_etag(b'abd')
+    assert body_etag(b'abc').startswith('W/"')
+
+@pytest.mark.parametrize('header, matches', [
+    ('W/"x"', True), ('"x"', True), ('"y", W/"x"', True), ('*', True), ('"y"', False), (None, False),
+])
+def test_etag_matching_is_weak(header, matches):
+    assert etag_matches(header, 'W/"x"') is matches
+
+def test_choose_encoding_prefers_brotli_when_installed(monkeypatch):
+    monkeypatch.setattr(http_cache, 'brotli', None)
+    assert choose_encoding('gzip, deflate, br') == 'gzip'
+    assert choose_encoding('gzip;q=0, br') is None
+    assert choose_encoding(None) is None
+    monkeypatch.setattr(http_cache, 'brotli', types.SimpleNamespace(compress=lambda body, quality: body))
+    assert choose_encoding('gzip, br') == 'br'
+    assert choose_encoding('br;q=0, gzip') == 'gzip'
+
+def test_if_none_match_gets_304_without_a_body(client):
+    first = client.get('/api/jira/tasks')
+    etag = first.headers['ETag']
+    assert first.headers['Cache-Control'] == 'private, no-cache'
+    second = client.get('/api/jira/tasks', headers={'If-None-Match': etag})
+    assert second.status_code == 304 and second.data == b''
+    assert 'Authorization' in second.headers['Vary']
+
+def test_large_bodies_are_gzipped_with_the_identity_etag(client):
+    plain = client.get('/api/jira/tasks')
+    zipped = client.get('/api/jira/tasks', headers={'Accept-Encoding': 'gzip'})
+    assert zipped.headers['Content-Encoding'] == 'gzip'
+    assert json.loads(gzip.decompress(zipped.data)) == ISSUES
+    assert zipped.headers['ETag'] == plain.headers['ETag']
+    assert 'Accept-Encoding' in zipped.headers['Vary']
+
+def test_small_bodies_and_other_routes_are_left_alone(client):
+    small = client.get('/api/jira/small', headers={'Accept-Encoding': 'gzip'})
+    assert 'Content-Encoding' not in small.headers and 'ETag' in small.headers
+    other = client.get('/api/other', headers={'Accept-Encoding': 'gzip'})
+    assert 'Content-Encoding' not in other.headers and 'ETag' not in other.headers
+
+def test_brotli_round_trip(client):
+    brotli = pytest.importorskip('brotli')
+    response = client.get('/api/jira/tasks', headers={'Accept-Encoding': 'br, gzip'})
+    assert response.headers['Content-Encoding'] == 'br'
+    assert json.loads(brotli.decompress(response.data)) == ISSUES
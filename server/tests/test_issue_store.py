@@ -0,0 +1,105 @@
+import sqlite3
+import threading
+
+import pytest
+
+from issue_store import RECONCILE_INTERVAL, SCHEMA_VERSION, SYNC_INTERVAL, IssueStore, sync_plan
+
+def issue(key, status='To Do', assignee=None, updated='2026-01-01T00:00:00.000+0000'):
+    return {'id': key, 'key': key, 'fields': {
+        'status': {'name': status},
+        'assignee': {'accountId': assignee} if assignee else None,
+        'updated': updated,
+    }}
+
+def keys(issues):
+    return sorted(item['key'] for item in issues)
+
+def test_users_only_see_issues_their_own_sync_fetched(tmp_path):
+    store = IssueStore(str(tmp_path / 'issues.db'))
+    store.upsert_issues('cloud1', [issue('SEC-1'), issue('PUB-1')], account_id='alice')
+    store.upsert_issues('cloud1', [issue('PUB-1')], account_id='bob')
+    assert keys(store.tasks_for('cloud1', 'alice')) == ['PUB-1', 'SEC-1']
+    assert keys(store.tasks_for('cloud1', 'bob')) == ['PUB-1']
+    assert not store.is_visible('cloud1', 'bob', 'SEC-1')
+
+def test_webhook_upserts_update_known_issues_but_grant_no_visibility(tmp_path):
+    store = IssueStore(str(tmp_path / 'issues.db'))
+    store.upsert_issues('cloud1', [issue('PUB-1')], account_id='bob')
+    assert store.upsert_issues('cloud1', [issue('PUB-1', status='In Progress'), issue('SEC-2')]) == 1
+    assert store.get_issue('cloud1', 'PUB-1')['fields']['status']['name'] == 'In Progress'
+    assert store.get_issue('cloud1', 'SEC-2') is None
+
+def test_tasks_are_mine_or_not_done(tmp_path):
+    store = IssueStore(str(tmp_path / 'issues.db'))
+    store.upsert_issues('cloud1', [issue('P-1', 'Done', 'alice'), issue('P-2', 'Done', 'bob'), issue('P-3')],
+                        account_id='alice')
+    assert keys(store.tasks_for('cloud1', 'alice')) == ['P-1', 'P-3']
+
+def test_reconcile_drops_what_a_full_pass_did_not_return(tmp_path):
+    store = IssueStore(str(tmp_path / 'issues.db'))
+    store.upsert_issues('cloud1', [issue('PUB-1'), issue('PUB-2')], account_id='alice')
+    store.upsert_issues('cloud1', [issue('PUB-2')], account_id='bob')
+
+    assert store.reconcile('cloud1', 'alice', {'PUB-1'}) == 1
+    assert keys(store.tasks_for('cloud1', 'alice')) == ['PUB-1']
+    assert store.get_issue('cloud1', 'PUB-2') is not None  # bob still sees it
+
+    assert store.reconcile('cloud1', 'bob', set()) == 1
+    assert store.get_issue('cloud1', 'PUB-2') is None
+    assert store.count('cloud1') == 1
+
+def test_sync_plan_is_full_first_then_delta_then_full_again():
+    assert sync_plan(None, 1000)[0] == 'full'
+    state = {'last_sync': 1000, 'last_full_sync': 1000}
+    assert sync_plan(state, 1000 + SYNC_INTERVAL / 2) is None
+    assert sync_plan(state, 1000 + SYNC_INTERVAL / 2, force=True)[0] == 'delta'
+    assert sync_plan(state, 1000 + SYNC_INTERVAL)[1].startswith('updated >= -')
+    assert sync_plan(state, 1000 + RECONCILE_INTERVAL)[0] == 'full'
+
+def test_old_databases_are_migrated_once(tmp_path):
+    path = str(tmp_path / 'issues.db')
+    conn = sqlite3.connect(path)
+    conn.execute('CREATE TABLE sync_state (cloud_id TEXT PRIMARY KEY, last_sync REAL)')
+    conn.commit()
+    conn.close()
+
+    IssueStore(path).close()
+    conn = sqlite3.connect(path)
+    tables = {row[0] for row in conn.execute("SELECT name FROM sqlite_master WHERE type = 'table'")}
+    assert 'sync_state' not in tables and 'user_sync' in tables
+    assert conn.execute('PRAGMA user_version').fetchone()[0] == SCHEMA_VERSION
+
+    # Migrations do not run again on later starts
+    conn.execute('CREATE TABLE sync_state (cloud_id TEXT)')
+    conn.commit()
+    conn.close()
+    IssueStore(path).close()
+    conn = sqlite3.connect(path)
+    assert conn.execute("SELECT COUNT(*) FROM sqlite_master WHERE name = 'sync_state'").fetchone()[0] == 1
+    conn.close()
+
+def test_close_closes_every_thread_connection(tmp_path):
+    store = IssueStore(str(tmp_path / 'issues.db'))
+    thread = threading.Thread(target=lambda: store.upsert_issues('cloud1', [issue('P-1')], account_id='alice'))
+    thread.start()
+    thread.join()
+    connections = set(store._connections)
+    assert len(connections) == 2
+
+    store.close()
+    for conn in connections:
+        with pytest.raises(sqlite3.ProgrammingError):
+            conn.execute('SELECT 1')
+    assert keys(store.tasks_for('cloud1', 'alice')) == ['P-1']  # Reconnects after close
+    store.close()
+
+def test_sync_locks_are_dropped_once_released(tmp_path):
+    store = IssueStore(str(tmp_path / 'issues.db'))
+    holder = store.sync_lock('cloud1', 'alice')
+    with holder:
+        waiter = store.sync_lock('cloud1', 'alice')
+        assert len(store._sync_locks) == 1
+    with waiter:
+        assert len(store._sync_locks) == 1
+    assert store._sync_locks == {}
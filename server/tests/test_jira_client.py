@@ -0,0 +1,74 @@
+import threading
+import time
+
+import pytest
+
+import jira_client
+from jira_client import iter_search_pages
+
+class FakeSearch:
+    """search_page stand-in over `total` issues that caps maxResults like Jira does"""
+
+    def __init__(self, total, cap=100, fail_at=None, delay=0.0):
+        self.total = total
+        self.cap = cap
+        self.fail_at = fail_at
+        self.delay = delay
+        self.calls = []
+        self.active = 0
+        self.peak = 0
+        self.lock = threading.Lock()
+
+    def __call__(self, access_token, cloud_id, jql=jira_client.TASKS_JQL, start_at=0, max_results=100, params=None):
+        with self.lock:
+            self.calls.append((start_at, max_results))
+            self.active += 1
+            self.peak = max(self.peak, self.active)
+        try:
+            time.sleep(self.delay)
+            if start_at == self.fail_at:
+                raise RuntimeError(f'page {start_at} failed')
+            size = min(max_results, self.cap)
+            keys = [f'P-{n}' for n in range(start_at, min(start_at + size, self.total))]
+            return {'startAt': start_at, 'maxResults': size, 'total': self.total,
+                    'issues': [{'key': key} for key in keys]}
+        finally:
+            with self.lock:
+                self.active -= 1
+
+def collect(pages):
+    return [issue['key'] for page in pages for issue in page['issues']]
+
+def test_every_issue_is_fetched_once(monkeypatch):
+    fake = FakeSearch(total=950)
+    monkeypatch.setattr(jira_client, 'search_page', fake)
+    pages = list(iter_search_pages('tok', 'cloud1', page_size=100))
+    assert pages[0]['startAt'] == 0  # The first page always comes first
+    assert sorted(collect(pages)) == sorted(f'P-{n}' for n in range(950))
+    assert sorted(start for start, _ in fake.calls) == list(range(0, 950, 100))
+
+def test_pages_follow_the_page_size_jira_returned(monkeypatch):
+    fake = FakeSearch(total=120, cap=50)
+    monkeypatch.setattr(jira_client, 'search_page', fake)
+    assert len(collect(iter_search_pages('tok', 'cloud1', page_size=100))) == 120
+    assert sorted(fake.calls) == [(0, 100), (50, 50), (100, 50)]
+
+def test_one_search_keeps_at_most_workers_pages_in_flight(monkeypatch):
+    fake = FakeSearch(total=2000, delay=0.01)
+    monkeypatch.setattr(jira_client, 'search_page', fake)
+    assert len(collect(iter_search_pages('tok', 'cloud1', page_size=100, workers=3))) == 2000
+    assert fake.peak <= 3
+
+def test_a_failed_page_is_raised_and_pending_pages_are_dropped(monkeypatch):
+    fake = FakeSearch(total=5000, fail_at=100, delay=0.01)
+    monkeypatch.setattr(jira_client, 'search_page', fake)
+    with pytest.raises(RuntimeError, match='page 100 failed'):
+        list(iter_search_pages('tok', 'cloud1', page_size=100, workers=2))
+    time.sleep(0.1)
+    assert len(fake.calls) < 10
+
+def test_single_page_results_make_no_further_calls(monkeypatch):
+    fake = FakeSearch(total=30)
+    monkeypatch.setattr(jira_client, 'search_page', fake)
+    assert len(collect(iter_search_pages('tok', 'cloud1'))) == 30
+    assert fake.calls == [(0, jira_client.SEARCH_PAGE_SIZE)]
@@ -0,0 +1,48 @@
+import pytest
+
+from jira_issues import DEFAULT_COMPACT_FIELDS, compact_issue, parse_fields_param, project_issues, upstream_params
+
+ISSUE = {
+    'id': '10001',
+    'key': 'PROJ-1',
+    'fields': {
+        'summary': 'Fix login',
+        'status': {'name': 'In Progress', 'id': '3'},
+        'priority': {'name': 'High'},
+        'assignee': {'accountId': 'alice', 'displayName': 'Alice'},
+        'reporter': None,
+        'project': {'key': 'PROJ'},
+        'components': [{'name': 'web'}, {'name': 'api'}],
+        'updated': '2026-01-01T00:00:00.000+0000',
+    },
+}
+
+@pytest.mark.parametrize('value', [None, '', 'all'])
+def test_no_projection_by_default(value):
+    assert parse_fields_param(value) is None
+
+def test_compact_selects_the_default_fields():
+    assert parse_fields_param('compact') == DEFAULT_COMPACT_FIELDS
+
+def test_key_and_id_are_always_included_and_not_projections():
+    assert parse_fields_param(' key, summary ,id,status') == ['summary', 'status']
+
+def test_unknown_fields_are_rejected():
+    with pytest.raises(ValueError, match='Unknown fields: secret'):
+        parse_fields_param('summary,secret')
+
+def test_upstream_params_request_only_the_projected_fields():
+    assert upstream_params(None) == {}
+    assert upstream_params(['summary', 'assignee']) == {'fields': 'summary,assignee', 'expand': ''}
+    assert upstream_params([])['fields'] == 'summary'  # Only key/id asked for
+
+def test_compact_issue_flattens_nested_fields():
+    record = compact_issue(ISSUE, ['summary', 'status', 'assignee', 'reporter', 'project', 'components', 'labels'])
+    assert record == {
+        'id': '10001', 'key': 'PROJ-1', 'summary': 'Fix login', 'status': 'In Progress', 'assignee': 'Alice',
+        'reporter': None, 'project': 'PROJ', 'components': ['web', 'api'], 'labels': [],
+    }
+
+def test_project_issues_passes_full_issues_through_without_fields():
+    assert project_issues([ISSUE], None) == [ISSUE]
+    assert project_issues([ISSUE], ['priority']) == [{'id': '10001', 'key': 'PROJ-1', 'priority': 'High'}]
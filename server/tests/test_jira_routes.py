@@ -0,0 +1,41 @@
+import requests
+
+import oauth
+
+def http_error(status, headers=None):
+    response = requests.Response()
+    response.status_code = status
+    response.headers.update(headers or {})
+    response.url = 'https://api.atlassian.com/ex/jira/site/rest/api/3/search?jql=secret'
+    return requests.HTTPError(response=response)
+
+def failing_pages(error):
+    def pages(*args, **kwargs):
+        raise error
+        yield
+    return pages
+
+def test_stream_tasks_passes_on_a_first_page_429(monkeypatch):
+    monkeypatch.setattr(oauth, 'iter_search_pages', failing_pages(http_error(429, {'Retry-After': '7'})))
+    with oauth.app.app_context():
+        response, status = oauth.stream_tasks('token', 'site')
+    assert status == 429
+    assert response.headers['Retry-After'] == '7'
+
+def test_stream_tasks_hides_the_upstream_url(monkeypatch):
+    monkeypatch.setattr(oauth, 'iter_search_pages', failing_pages(http_error(502)))
+    with oauth.app.app_context():
+        response, status = oauth.stream_tasks('token', 'site')
+    assert status == 500
+    assert 'secret' not in response.get_data(as_text=True)
+
+def test_stream_tasks_reports_a_later_page_failure_without_the_url(monkeypatch):
+    def pages(*args, **kwargs):
+        yield {'total': 2, 'issues': [{'key': 'PROJ-1'}]}
+        raise http_error(503)
+    monkeypatch.setattr(oauth, 'iter_search_pages', pages)
+    with oauth.app.app_context():
+        response = oauth.stream_tasks('token', 'site')
+    lines = response.get_data(as_text=True).splitlines()
+    assert lines[0] == '{"key":"PROJ-1"}'
+    assert lines[-1] == '{"error": "Error fetching tasks: 503"}'
@@ -0,0 +1,75 @@
+import hashlib
+import hmac
+import json
+
+import pytest
+from flask import Flask
+
+import jira_webhook_routes
+from event_stream import EventHub, StreamTickets
+from jira_webhook_routes import setup_jira_webhook_routes, valid_signature
+
+SECRET = 'webhook-secret'
+EVENT = {'webhookEvent': 'jira:issue_updated', 'issue': {'key': 'SEC-1', 'fields': {'summary': 'private'}}}
+
+def sign(body, secret=SECRET):
+    return 'sha256=' + hmac.new(secret.encode('utf-8'), body, hashlib.sha256).hexdigest()
+
+@pytest.fixture
+def hub():
+    return EventHub()
+
+@pytest.fixture
+def tickets():
+    return StreamTickets(ttl=60)
+
+@pytest.fixture
+def client(hub, tickets, monkeypatch):
+    monkeypatch.setenv('JIRA_WEBHOOK_SECRET', SECRET)
+    monkeypatch.setattr(jira_webhook_routes, 'get_accessible_resources', lambda token: [{'id': 'cloud1'}])
+    return setup_jira_webhook_routes(Flask(__name__), None, hub, tickets).test_client()
+
+def post_event(client, event=EVENT, signature=None):
+    body = json.dumps(event).encode('utf-8')
+    return client.post('/api/jira/webhook?cloud_id=cloud1', data=body, content_type='application/json',
+                       headers={'X-Hub-Signature': signature or sign(body)})
+
+def test_valid_signature():
+    assert valid_signature(b'{}', sign(b'{}'), SECRET)
+    assert not valid_signature(b'{}', sign(b'{ }'), SECRET)
+    assert not valid_signature(b'{}', sign(b'{}', 'other'), SECRET)
+    assert not valid_signature(b'{}', 'sha1=' + sign(b'{}')[7:], SECRET)
+    assert not valid_signature(b'{}', None, SECRET)
+
+def test_webhook_publishes_only_the_issue_key(client, hub):
+    response = post_event(client)
+    assert response.status_code == 200 and response.json['event'] == 'issue_updated'
+    assert hub.last_event('cloud1') == (1, 'issue_updated', {'key': 'SEC-1'})
+
+def test_webhook_rejects_bad_signatures(client, hub):
+    assert post_event(client, signature='sha256=00').status_code == 401
+    assert hub.last_event('cloud1') is None
+
+def test_webhook_is_disabled_without_a_secret(client, monkeypatch):
+    monkeypatch.delenv('JIRA_WEBHOOK_SECRET')
+    assert post_event(client).status_code == 503
+
+def test_stream_tickets_are_scoped_and_expire():
+    tickets = StreamTickets(ttl=60)
+    ticket = tickets.issue(('jira', 'cloud1'))
+    assert tickets.check(ticket, ('jira', 'cloud1'))
+    assert not tickets.check(ticket, ('jira', 'cloud2'))
+    assert not tickets.check(None, ('jira', 'cloud1'))
+    expired = StreamTickets(ttl=0)
+    assert not expired.check(expired.issue(('jira', 'cloud1')), ('jira', 'cloud1'))
+
+def test_ticket_route_needs_access_to_the_site(client, tickets):
+    assert client.post('/api/jira/cloud1/events/ticket').status_code == 401
+    assert client.post('/api/jira/cloud2/events/ticket', headers={'Authorization': 'Bearer t'}).status_code == 403
+    response = client.post('/api/jira/cloud1/events/ticket', headers={'Authorization': 'Bearer t'})
+    assert tickets.check(response.json['ticket'], ('jira', 'cloud1'))
+
+def test_events_route_needs_a_ticket_or_token(client, tickets):
+    assert client.get('/api/jira/cloud1/events').status_code == 401
+    other = tickets.issue(('jira', 'cloud2'))
+    assert client.get(f'/api/jira/cloud1/events?ticket={other}').status_code == 401
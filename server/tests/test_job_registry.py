@@ -0,0 +1,90 @@
+import time
+
+import pytest
+
+from job_registry import JobRecord, JobRegistry
+
+def test_jobs_move_to_finished_on_a_terminal_status():
+    jobs = JobRegistry()
+    jobs.create('b1', 'build', status='queued')
+    snapshot = jobs.update('b1', status='completed', progress=100)
+    assert snapshot['status'] == 'completed' and 'completed_at' in snapshot
+    assert jobs.stats()['active'] == 0 and jobs.stats()['finished'] == 1
+
+def test_update_of_an_unknown_job_raises():
+    jobs = JobRegistry()
+    with pytest.raises(KeyError):
+        jobs.update('missing', status='failed')
+    assert jobs.get('missing') is None
+
+def test_meta_is_merged_and_flattened_into_the_snapshot():
+    jobs = JobRegistry()
+    jobs.create('d1', 'deploy', meta={'target': 'site'})
+    snapshot = jobs.update('d1', meta={'deployed_url': 'https://site.vercel.app'})
+    assert snapshot['target'] == 'site' and snapshot['deployed_url'] == 'https://site.vercel.app'
+
+def test_meta_can_be_left_out_of_the_snapshot():
+    jobs = JobRegistry()
+    jobs.create('d1', 'deploy', status='queued', meta={'changes': ['a.txt']})
+    assert 'changes' not in jobs.get('d1', meta=False) and jobs.get('d1')['changes'] == ['a.txt']
+
+def test_finished_jobs_are_evicted_oldest_first_but_active_jobs_are_kept():
+    jobs = JobRegistry(max_finished=2)
+    jobs.create('active', 'build')
+    for job_id in ('f1', 'f2', 'f3'):
+        jobs.create(job_id, 'build', status='failed')
+    assert jobs.get('f1') is None
+    assert jobs.get('f2') and jobs.get('f3') and jobs.get('active')
+    assert jobs.evicted == 1
+
+def test_finished_jobs_expire_after_ttl():
+    jobs = JobRegistry(finished_ttl=60)
+    jobs.create('old', 'build', status='completed', finished_at=time.time() - 120)
+    jobs.create('new', 'build', status='completed')
+    assert [job['job_id'] for job in jobs.list()] == ['new']
+
+def test_list_filters_by_kind_and_status_newest_first():
+    jobs = JobRegistry()
+    jobs.create('b1', 'build', created_at=1)
+    jobs.create('d1', 'deploy', created_at=2)
+    jobs.create('d2', 'deploy', created_at=3, status='failed')
+    assert [job['job_id'] for job in jobs.list(kind='deploy')] == ['d2', 'd1']
+    assert [job['job_id'] for job in jobs.list(status='failed')] == ['d2']
+
+def test_log_indexes_stay_stable_when_old_lines_are_dropped():
+    job = JobRecord('d1', 'deploy')
+    indexes = [job.append_log(f'line {i}', max_lines=3) for i in range(5)]
+    assert indexes == [0, 1, 2, 3, 4]
+    assert job.log_offset == 2 and [line for _, line in job.log] == ['line 2', 'line 3', 'line 4']
+
+def test_get_log_returns_lines_since_an_index():
+    jobs = JobRegistry()
+    jobs.create('d1', 'deploy')
+    for i in range(3):
+        jobs.append_log('d1', f'line {i}')
+    assert [entry['index'] for entry in jobs.get_log('d1')] == [0, 1, 2]
+    assert [entry['line'] for entry in jobs.get_log('d1', since=2)] == ['line 2']
+    assert jobs.get_log('missing') is None
+
+def test_persisted_jobs_reload_and_running_ones_come_back_failed(tmp_path):
+    path = str(tmp_path / 'jobs.db')
+    jobs = JobRegistry(path=path, log_flush=0)
+    jobs.create('done', 'build', status='completed')
+    jobs.create('running', 'deploy', status='processing')
+    jobs.append_log('running', 'pushing')
+
+    reloaded = JobRegistry(path=path)
+    assert reloaded.get('done')['status'] == 'completed'
+    running = reloaded.get('running')
+    assert running['status'] == 'failed' and running['error'] == 'Interrupted by server restart'
+    assert [entry['line'] for entry in reloaded.get_log('running')] == ['pushing']
+
+def test_log_lines_are_persisted_at_most_every_log_flush_and_on_status_changes(tmp_path):
+    path = str(tmp_path / 'jobs.db')
+    jobs = JobRegistry(path=path, log_flush=60)
+    jobs.create('d1', 'deploy', status='processing')
+    for i in range(3):
+        jobs.append_log('d1', f'line {i}')
+    assert JobRegistry(path=path).get_log('d1') == []
+    jobs.update('d1', status='completed')
+    assert [entry['line'] for entry in JobRegistry(path=path).get_log('d1')] == ['line 0', 'line 1', 'line 2']
@@ -0,0 +1,13 @@
+import oauth
+from event_stream import EventHub
+
+def test_status_events_carry_only_the_meta_of_their_transition():
+    events = EventHub()
+    oauth.record_job_status(events, 'deploy', 'job-events-1', replace=True, status='queued',
+                            meta={'changes': ['a.txt'] * 100})
+    oauth.record_job_status(events, 'deploy', 'job-events-1', status='processing', progress=10)
+    assert 'changes' not in events.last_event('job-events-1')[2]
+    oauth.record_job_status(events, 'deploy', 'job-events-1', status='completed',
+                            meta={'deployed_url': 'https://site.vercel.app'})
+    assert events.last_id('job-events-1') == 3
+    assert oauth.build_jobs.get('job-events-1')['changes'] == ['a.txt'] * 100
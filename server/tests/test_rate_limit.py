@@ -0,0 +1,60 @@
+import email.utils
+import time
+
+import pytest
+
+from rate_limit import RateLimiter, TokenBucket, retry_after_seconds
+
+def test_burst_is_free_then_reservations_are_spaced_by_rate():
+    bucket = TokenBucket(rate=10, capacity=3)
+    now = bucket.updated
+    assert [bucket.reserve(now) for _ in range(3)] == [0.0, 0.0, 0.0]
+    assert bucket.reserve(now) == pytest.approx(0.1)
+    assert bucket.reserve(now) == pytest.approx(0.2)
+    assert bucket.throttled == 2
+
+def test_budget_refills_over_time():
+    bucket = TokenBucket(rate=10, capacity=2)
+    now = bucket.updated
+    bucket.reserve(now)
+    bucket.reserve(now)
+    assert bucket.reserve(now + 0.1) == 0.0
+
+def test_reservations_after_block_wait_for_it_and_are_released_one_by_one():
+    bucket = TokenBucket(rate=10, capacity=5)
+    now = bucket.updated
+    bucket.block(now, 5)
+    # The block clears the burst budget, so waiters do not all retry the moment it ends
+    delays = [bucket.reserve(now) for _ in range(3)]
+    assert delays == [pytest.approx(5.1), pytest.approx(5.2), pytest.approx(5.3)]
+    assert bucket.rejected == 1
+
+def test_block_never_shortens_an_existing_block():
+    bucket = TokenBucket(rate=10, capacity=5)
+    now = bucket.updated
+    bucket.block(now, 10)
+    bucket.block(now, 1)
+    assert bucket.blocked_until == pytest.approx(now + 10)
+
+def test_limiter_uses_token_and_site_buckets():
+    limiter = RateLimiter()
+    keys = limiter.keys_for('/ex/jira/cloud1/rest/api/3/search', 'tok')
+    assert keys == [('token', 'tok'), ('site', 'cloud1')]
+    assert limiter.keys_for('/me', 'tok') == [('token', 'tok')]
+
+def test_on_throttled_blocks_every_bucket_for_retry_after():
+    limiter = RateLimiter()
+    keys = limiter.keys_for('/ex/jira/cloud1/rest/api/3/search', 'tok')
+    delay = limiter.on_throttled(keys, '2', attempt=0)
+    assert 2 <= delay <= 2.5  # Retry-After plus up to 25% jitter
+    assert limiter.reserve(keys) >= 2
+    assert limiter.stats()['rejected'] == 2 and limiter.retries == 1
+
+@pytest.mark.parametrize('value, expected', [('7', 7.0), (' 30 ', 30.0), (None, None), ('', None), ('soon', None)])
+def test_retry_after_seconds(value, expected):
+    assert retry_after_seconds(value) == expected
+
+def test_retry_after_http_date():
+    value = email.utils.formatdate(time.time() + 60, usegmt=True)
+    assert 55 <= retry_after_seconds(value) <= 60
+    assert retry_after_seconds(email.utils.formatdate(time.time() - 60, usegmt=True)) == 0.0
@@ -0,0 +1,118 @@
+import asyncio
+import threading
+
+import pytest
+
+from singleflight import AsyncSingleFlight, SingleFlight
+
+def start_waiters(flight, key, fn, count):
+    """Run flight.do(key, fn) on count threads; returns (threads, results) with results[i] a value or exception"""
+    results = [None] * count
+
+    def call(i):
+        try:
+            results[i] = flight.do(key, fn)
+        except Exception as e:
+            results[i] = e
+
+    threads = [threading.Thread(target=call, args=(i,)) for i in range(count)]
+    for thread in threads:
+        thread.start()
+    return threads, results
+
+def wait_for_coalesced(flight, endpoint, count):
+    for _ in range(500):
+        if flight.stats()['by_endpoint'].get(endpoint, {}).get('coalesced') == count:
+            return
+        threading.Event().wait(0.01)
+    raise AssertionError('waiters did not join the call')
+
+def test_waiters_share_the_leader_result():
+    flight = SingleFlight()
+    release = threading.Event()
+    calls = []
+
+    def fn():
+        calls.append(1)
+        release.wait(5)
+        return {'value': 42}
+
+    threads, results = start_waiters(flight, ('profile', 'tok'), fn, 5)
+    wait_for_coalesced(flight, 'profile', 4)
+    release.set()
+    for thread in threads:
+        thread.join(5)
+
+    assert calls == [1]
+    assert all(result == {'value': 42} for result in results)
+    assert results[0] is results[1]  # The very same object, not a copy
+    stats = flight.stats()
+    assert stats['executions'] == 1 and stats['coalesced'] == 4 and stats['in_flight'] == 0
+
+def test_leader_error_reaches_every_waiter():
+    flight = SingleFlight()
+    release = threading.Event()
+
+    def fn():
+        release.wait(5)
+        raise ValueError('upstream failed')
+
+    threads, results = start_waiters(flight, ('tasks', 'tok'), fn, 4)
+    wait_for_coalesced(flight, 'tasks', 3)
+    release.set()
+    for thread in threads:
+        thread.join(5)
+
+    assert all(isinstance(result, ValueError) and str(result) == 'upstream failed' for result in results)
+
+def test_key_is_released_after_an_error():
+    flight = SingleFlight()
+
+    def fail():
+        raise RuntimeError('boom')
+
+    with pytest.raises(RuntimeError):
+        flight.do(('tasks', 'tok'), fail)
+    # Nothing is cached: the next call runs again
+    assert flight.do(('tasks', 'tok'), lambda: 'ok') == 'ok'
+    assert flight.stats()['executions'] == 2
+
+def test_async_waiters_share_result_and_error():
+    flight = AsyncSingleFlight()
+    calls = []
+
+    async def fetch(value):
+        calls.append(value)
+        await asyncio.sleep(0.01)
+        if value == 'bad':
+            raise ValueError(value)
+        return value
+
+    async def main():
+        ok = await asyncio.gather(*(flight.do(('profile', 'a'), fetch, 'good') for _ in range(3)))
+        bad = await asyncio.gather(*(flight.do(('profile', 'b'), fetch, 'bad') for _ in range(3)),
+                                   return_exceptions=True)
+        return ok, bad
+
+    ok, bad = asyncio.run(main())
+    assert ok == ['good'] * 3
+    assert all(isinstance(error, ValueError) for error in bad)
+    assert calls == ['good', 'bad']
+
+def test_async_cancelled_waiter_does_not_cancel_the_call():
+    flight = AsyncSingleFlight()
+
+    async def slow():
+        await asyncio.sleep(0.05)
+        return 'done'
+
+    async def main():
+        leader = asyncio.ensure_future(flight.do('key', slow))
+        waiter = asyncio.ensure_future(flight.do('key', slow))
+        await asyncio.sleep(0)
+        waiter.cancel()
+        return await leader, waiter
+
+    result, waiter = asyncio.run(main())
+    assert result == 'done'
+    assert waiter.cancelled()
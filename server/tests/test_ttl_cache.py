@@ -0,0 +1,55 @@
+import pytest
+
+import ttl_cache
+from ttl_cache import TTLCache
+
+@pytest.fixture
+def clock(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(ttl_cache.time, 'monotonic', lambda: now[0])
+    return now
+
+def test_least_recently_used_entry_is_evicted(clock):
+    cache = TTLCache(maxsize=2, ttl=60)
+    cache.set('a', 1)
+    cache.set('b', 2)
+    assert cache.get('a') == 1  # 'b' is now the least recently used
+    cache.set('c', 3)
+    assert cache.get('b') is None
+    assert cache.get('a') == 1 and cache.get('c') == 3
+    assert cache.evictions == 1 and len(cache) == 2
+
+def test_entries_expire_after_ttl(clock):
+    cache = TTLCache(maxsize=10, ttl=30)
+    cache.set('a', 1)
+    clock[0] += 29.9
+    assert cache.get('a') == 1
+    clock[0] += 0.1
+    assert cache.get('a', 'gone') == 'gone'
+    assert cache.expirations == 1 and len(cache) == 0
+
+def test_per_entry_ttl_overrides_the_default(clock):
+    cache = TTLCache(maxsize=10, ttl=30)
+    cache.set('short', 1, ttl=5)
+    cache.set('long', 2)
+    clock[0] += 10
+    assert cache.get('short') is None
+    assert cache.get('long') == 2
+
+def test_set_refreshes_expiry_and_invalidate_drops(clock):
+    cache = TTLCache(maxsize=10, ttl=30)
+    cache.set('a', 1)
+    clock[0] += 20
+    cache.set('a', 2)
+    clock[0] += 20
+    assert cache.get('a') == 2
+    assert cache.invalidate('a') is True
+    assert cache.invalidate('a') is False
+
+def test_stats_count_hits_and_misses(clock):
+    cache = TTLCache(maxsize=10, ttl=30)
+    cache.set('a', 1)
+    cache.get('a')
+    cache.get('missing')
+    stats = cache.stats()
+    assert (stats['hits'], stats['misses'], stats['hit_rate']) == (1, 1, 0.5)
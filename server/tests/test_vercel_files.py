@@ -0,0 +1,37 @@
+import os
+import uuid
+
+import pytest
+
+from vercel_files import build_manifest, deploy_files
+
+@pytest.fixture
+def folder(tmp_path):
+    """A deploy folder whose contents no other test has uploaded to the shared stand-in"""
+    marker = uuid.uuid4().hex
+    (tmp_path / 'assets').mkdir()
+    (tmp_path / 'index.html').write_text(f'<h1>{marker}</h1>')
+    (tmp_path / 'assets' / 'app.js').write_text(f'console.log("{marker}")')
+    return tmp_path
+
+def test_manifest_is_keyed_by_posix_path(folder):
+    manifest = build_manifest(str(folder))
+    assert sorted(manifest) == ['assets/app.js', 'index.html']
+    assert manifest['index.html']['size'] == os.path.getsize(folder / 'index.html')
+
+def test_only_files_vercel_lacks_are_uploaded(vercel_api, folder):
+    lines = []
+    first = deploy_files(vercel_api, str(folder), 'site', 'token', lines.append)
+    assert first['files'] == 2 and first['uploaded'] == 2
+    assert first['url'] == f"https://{first['deployment']['url']}"
+
+    again = deploy_files(vercel_api, str(folder), 'site', 'token', lines.append)
+    assert again['uploaded'] == 0 and again['deployment']['id'] != first['deployment']['id']
+
+    (folder / 'index.html').write_text('<h1>changed</h1>' + uuid.uuid4().hex)
+    changed = deploy_files(vercel_api, str(folder), 'site', 'token', lines.append)
+    assert changed['uploaded'] == 1 and changed['uploaded_bytes'] == os.path.getsize(folder / 'index.html')
+
+def test_a_forgotten_project_falls_back_to_the_project_name(vercel_api, folder):
+    result = deploy_files(vercel_api, str(folder), 'fallback-site', 'token', lambda line: None, project_id='prj_missing')
+    assert result['deployment']['name'] == 'fallback-site' and result['deployment']['projectId'] != 'prj_missing'
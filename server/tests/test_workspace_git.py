@@ -0,0 +1,50 @@
+import os
+import shutil
+import subprocess
+
+import pytest
+
+import oauth
+from deploy_targets import DeployTarget
+
+pytestmark = pytest.mark.skipif(shutil.which('git') is None, reason='git is not installed')
+
+def git(*args, cwd=None):
+    return subprocess.run(['git', *args], cwd=cwd, capture_output=True, text=True, check=True).stdout.strip()
+
+@pytest.fixture
+def workspace(tmp_path, monkeypatch):
+    remote = tmp_path / 'remotes' / 'site.git'
+    git('init', '--quiet', '--bare', '--initial-branch=main', str(remote))
+    monkeypatch.setattr(oauth, 'DEPLOY_GIT_REMOTE', str(tmp_path / 'remotes' / '{repo}.git'))
+    monkeypatch.setattr(oauth, 'GITHUB_USERNAME', 'deployer')
+    target = DeployTarget('site', str(tmp_path / 'web'), str(tmp_path / 'workspace'))
+    return target, str(remote)
+
+def test_each_deploy_adds_one_commit_on_the_remote_main(workspace):
+    target, remote = workspace
+    lines = []
+    cwd = os.getcwd()
+    first = oauth.commit_folder(lines.append, target)
+    assert git('rev-parse', 'main', cwd=remote) == first
+    assert os.getcwd() == cwd
+
+    assert oauth.commit_folder(lines.append, target) == first
+    assert '[!] No changes since the last deploy, nothing to commit' in lines
+
+    with open(os.path.join(target.folder_path, 'about.html'), 'w') as f:
+        f.write('<p>about</p>')
+    second = oauth.commit_folder(lines.append, target)
+    assert git('rev-parse', 'main^', cwd=remote) == first and git('rev-parse', 'main', cwd=remote) == second
+
+def test_the_push_url_is_never_stored_in_the_workspace_repo(workspace):
+    target, remote = workspace
+    oauth.commit_folder(lambda line: None, target)
+    with open(os.path.join(target.git_dir, 'config')) as f:
+        assert remote not in f.read()
+    assert not os.path.exists(os.path.join(target.folder_path, '.git'))
+
+def test_git_push_stats():
+    assert oauth.git_push_stats('Writing objects: 100% (3/3), 1.50 KiB | 1.50 MiB/s, done.') == \
+        {'objects': 3, 'bytes': 1536}
+    assert oauth.git_push_stats('Everything up-to-date') == {'objects': 0, 'bytes': 0}
@@ -0,0 +1,119 @@
+# coding=utf-8
+"""Git-less deploy engine: content-addressed file uploads straight to the Vercel API
+
+Every file in the deploy folder is hashed (SHA-1). The deployment is
+created from that manifest; Vercel answers with the hashes it does not
+have yet (missing_files), only those are uploaded, concurrently, and the
+deployment is created again. Unchanged files are never re-sent.
+"""
+
+import os
+import requests
+from concurrent.futures import ThreadPoolExecutor
+from requests.adapters import HTTPAdapter
+from deploy_readiness import check_cancelled
+from deploy_manifest import scan_tree
+from deploy_metrics import bind, current_trace, traced_request
+
+UPLOAD_WORKERS = int(os.getenv("DEPLOY_UPLOAD_WORKERS", "8"))
+UPLOAD_TIMEOUT = (3.05, 60)
+CREATE_ATTEMPTS = 3  # Manifest posts; a retry only happens after uploading what was missing
+
+_session = None
+
+def get_session():
+    global _session
+    if _session is None:
+        _session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=UPLOAD_WORKERS)
+        _session.mount('https://', adapter)
+        _session.mount('http://', adapter)
+    return _session
+
+def build_manifest(root):
+    """{relative posix path: {'sha', 'size', 'path', ...}} for every file under root"""
+    return scan_tree(root)['files']
+
+def _headers(token):
+    return {'Authorization': f'Bearer {token}'}
+
+def upload_file(api, entry, token):
+    """POST one file body to /v2/files, addressed by its SHA-1"""
+    headers = {
+        **_headers(token),
+        'Content-Type': 'application/octet-stream',
+        'Content-Length': str(entry['size']),
+        'x-vercel-digest': entry['sha'],
+    }
+    with open(entry['path'], 'rb') as f:
+        response = traced_request('vercel', 'POST', f'{api}/v2/files', get_session(), headers=headers, data=f,
+                                  timeout=UPLOAD_TIMEOUT)
+    if response.status_code != 200:
+        raise Exception(f"Vercel upload Error: {response.status_code}, {response.text}")
+    return entry['size']
+
+def create_deployment(api, name, manifest, token, target='production', project_id=None):
+    """POST the manifest to /v13/deployments; returns (deployment, missing_shas)"""
+    payload = {
+        'name': name,
+        'target': target,
+        'files': [{'file': rel, 'sha': entry['sha'], 'size': entry['size']} for rel, entry in manifest.items()],
+        'projectSettings': {'framework': None},
+    }
+    if project_id:
+        payload['project'] = project_id  # Deploy into the known project rather than resolving it by name
+    response = traced_request('vercel', 'POST', f'{api}/v13/deployments', get_session(),
+                              headers=_headers(token), json=payload, timeout=UPLOAD_TIMEOUT)
+    if response.status_code in (200, 201):
+        return response.json(), []
+    if response.status_code == 404 and project_id:
+        # The remembered project is gone; let Vercel resolve (or create) it by name
+        return create_deployment(api, name, manifest, token, target)
+    try:
+        error = response.json().get('error') or {}
+    except ValueError:
+        error = {}
+    if error.get('code') == 'missing_files':
+        return None, error.get('missing') or []
+    raise Exception(f'Vercel Error: {response.status_code}, {response.text}')
+
+def deploy_files(api, root, name, token, log=print, cancel_event=None, manifest=None, project_id=None):
+    """Deploy the folder at root as project name (or project_id) through the Vercel API at api
+
+    Returns a summary with keys: deployment, url, files, uploaded, uploaded_bytes.
+    """
+    manifest = manifest if manifest is not None else build_manifest(root)
+    log(f'[✔] Hashed {len(manifest)} files')
+    by_sha = {entry['sha']: entry for entry in manifest.values()}
+    uploaded = uploaded_bytes = 0
+
+    for _ in range(CREATE_ATTEMPTS):
+        check_cancelled(cancel_event)
+        deployment, missing = create_deployment(api, name, manifest, token, project_id=project_id)
+        if deployment is not None:
+            log(f"[✔] Vercel deployment {deployment.get('id')} created from manifest")
+            return {
+                'deployment': deployment,
+                'url': f"https://{deployment.get('url')}",
+                'files': len(manifest),
+                'uploaded': uploaded,
+                'uploaded_bytes': uploaded_bytes,
+            }
+
+        entries = [by_sha[sha] for sha in missing if sha in by_sha]
+        log(f'[!] Vercel is missing {len(entries)} of {len(by_sha)} files, uploading...')
+
+        trace = current_trace()
+
+        def upload(entry):
+            check_cancelled(cancel_event)
+            with bind(trace):  # Pool threads record their uploads on the deploy's trace
+                return upload_file(api, entry, token)
+
+        with ThreadPoolExecutor(max_workers=UPLOAD_WORKERS, thread_name_prefix='vercel-upload') as pool:
+            sizes = list(pool.map(upload, entries))
+        uploaded += len(sizes)
+        uploaded_bytes += sum(sizes)
+        log(f'[✔] Uploaded {len(sizes)} files ({sum(sizes)} bytes)')
+
+    raise Exception(f'Vercel still reports missing files after {CREATE_ATTEMPTS} attempts')
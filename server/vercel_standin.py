@@ -0,0 +1,158 @@
+"""Local stand-in for the parts of the Vercel API the deploy engines use
+
+Usage:
+    python vercel_standin.py --port 8787
+    VERCEL_API=http://localhost:8787 DEPLOY_ENGINE=files python oauth.py
+
+Implements /v2/files (content-addressed uploads checked against
+x-vercel-digest), /v13/deployments (answers missing_files until every
+manifest hash has been uploaded; git deployments via gitSource are
+accepted as is), /v9/projects (plus /link and PATCH of
+gitProviderOptions), /v6/deployments and /v2/user.
+State is in memory; every request is printed with its status code.
+"""
+
+import argparse
+import hashlib
+import itertools
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse, parse_qs
+
+blobs = {}  # sha1 -> size
+projects = {}  # name -> project
+deployments = {}  # id -> deployment
+lock = threading.Lock()
+ids = itertools.count(1)
+
+class Handler(BaseHTTPRequestHandler):
+    disable_nagle_algorithm = True
+
+    def log_message(self, format, *args):
+        pass
+
+    def send(self, status, body):
+        data = json.dumps(body).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+        print(f'{status} {self.command} {self.path}')
+
+    def body(self):
+        return self.rfile.read(int(self.headers.get('Content-Length') or 0))
+
+    def project(self, name):
+        with lock:
+            if name not in projects:
+                projects[name] = {'id': f'prj_{next(ids)}', 'name': name, 'createdAt': int(time.time() * 1000)}
+            return projects[name]
+
+    def find_project(self, id_or_name):
+        with lock:
+            return projects.get(id_or_name) or next((p for p in projects.values() if p['id'] == id_or_name), None)
+
+    def do_POST(self):
+        path = urlparse(self.path).path
+        parts = path.strip('/').split('/')
+        if parts[:2] == ['v9', 'projects'] and parts[3:] == ['link']:
+            project = self.find_project(parts[2])
+            if project is None:
+                return self.send(404, {'error': {'code': 'not_found'}})
+            payload = json.loads(self.body() or b'{}')
+            with lock:
+                project['link'] = {'type': payload.get('type'), 'repo': payload.get('repo')}
+            return self.send(200, project)
+
+        if path == '/v2/files':
+            data = self.body()
+            digest = self.headers.get('x-vercel-digest')
+            if hashlib.sha1(data).hexdigest() != digest:
+                return self.send(400, {'error': {'code': 'invalid_digest', 'message': 'Digest does not match body'}})
+            with lock:
+                blobs[digest] = len(data)
+            return self.send(200, {'urls': []})
+
+        if path == '/v13/deployments':
+            payload = json.loads(self.body() or b'{}')
+            with lock:
+                missing = sorted({f['sha'] for f in payload.get('files', []) if f['sha'] not in blobs})
+            if missing:
+                return self.send(400, {'error': {'code': 'missing_files', 'message': 'Missing files', 'missing': missing}})
+            if payload.get('project'):
+                with lock:
+                    project = next((p for p in projects.values() if payload['project'] in (p['id'], p['name'])), None)
+                if project is None:
+                    return self.send(404, {'error': {'code': 'not_found', 'message': 'Project not found'}})
+            else:
+                project = self.project(payload['name'])
+            deployment_id = f'dpl_{next(ids)}'
+            deployment = {
+                'id': deployment_id,
+                'uid': deployment_id,
+                'name': payload['name'],
+                'projectId': project['id'],
+                'url': f"{payload['name']}-{deployment_id}.vercel.app",
+                'readyState': 'READY',
+                'createdAt': int(time.time() * 1000),
+            }
+            with lock:
+                deployments[deployment_id] = deployment
+            return self.send(200, deployment)
+
+        if path == '/v9/projects':
+            payload = json.loads(self.body() or b'{}')
+            project = self.project(payload['name'])
+            if payload.get('gitRepository'):
+                with lock:
+                    project['link'] = dict(payload['gitRepository'])
+            return self.send(200, project)
+
+        self.send(404, {'error': {'code': 'not_found'}})
+
+    def do_PATCH(self):
+        parts = urlparse(self.path).path.strip('/').split('/')
+        if parts[:2] == ['v9', 'projects'] and len(parts) == 3:
+            project = self.find_project(parts[2])
+            if project is None:
+                return self.send(404, {'error': {'code': 'not_found'}})
+            payload = json.loads(self.body() or b'{}')
+            with lock:
+                project.update(payload)
+            return self.send(200, project)
+        self.send(404, {'error': {'code': 'not_found'}})
+
+    def do_GET(self):
+        url = urlparse(self.path)
+        parts = url.path.strip('/').split('/')
+        if parts[:2] == ['v9', 'projects'] and len(parts) == 3:
+            project = self.find_project(parts[2])
+            return self.send(200, project) if project else self.send(404, {'error': {'code': 'not_found'}})
+
+        if parts[:2] == ['v13', 'deployments'] and len(parts) == 3:
+            with lock:
+                deployment = deployments.get(parts[2])
+            return self.send(200, deployment) if deployment else self.send(404, {'error': {'code': 'not_found'}})
+
+        if parts == ['v2', 'user']:
+            return self.send(200, {'user': {'id': 'standin', 'username': 'standin'}})
+
+        if parts == ['v6', 'deployments']:
+            project_id = parse_qs(url.query).get('projectId', [None])[0]
+            with lock:
+                matching = [d for d in deployments.values() if project_id in (None, d['projectId'])]
+            matching.sort(key=lambda d: d['createdAt'], reverse=True)
+            limit = int(parse_qs(url.query).get('limit', ['20'])[0])
+            return self.send(200, {'deployments': [{**d, 'state': d['readyState']} for d in matching[:limit]]})
+
+        self.send(404, {'error': {'code': 'not_found'}})
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='Local stand-in for the Vercel deploy API')
+    parser.add_argument('--port', type=int, default=8787)
+    args = parser.parse_args()
+    print(f'Vercel stand-in on http://localhost:{args.port}')
+    ThreadingHTTPServer(('127.0.0.1', args.port), Handler).serve_forever()
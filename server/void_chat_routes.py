@@ -1,8 +1,15 @@
 from flask import request, jsonify
-from app import VoidChatPaster
 
-# Global instance
-paster = VoidChatPaster()
+# Global instance, created on first use: app.py imports pyautogui, which needs a
+# desktop session, and the rest of the server (and its tests) should not
+_paster = None
+
+def get_paster():
+    global _paster
+    if _paster is None:
+        from app import VoidChatPaster
+        _paster = VoidChatPaster()
+    return _paster
 
 def setup_void_chat_routes(app):
     """Add VoidChat API routes to existing Flask app"""
@@ -34,7 +41,7 @@ def setup_void_chat_routes(app):
                 if field in data:
                     task_data[field] = data[field]
             
-            success = paster.smart_chat_locate(task_data)
+            success = get_paster().smart_chat_locate(task_data)
             
             if success:
                 return jsonify({
@@ -82,7 +89,7 @@ def setup_void_chat_routes(app):
                 if field in data:
                     task_data[field] = data[field]
             
-            formatted_message = paster.format_message(task_data)
+            formatted_message = get_paster().format_message(task_data)
             
             return jsonify({
                 'success': True,